@@ -0,0 +1,175 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-11-26 11:20:45
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-11-26 11:20:45
+ # @ Description: 列表/导出响应快照缓存
+
+ 快照以变更日志的最新游标作为版本，任何写入都会推进游标，
+ 下次请求时重新生成，多 worker 下同样有效。快照保存序列化后的原始字节，
+ br/gzip 压缩结果在首次请求时生成并随快照保存，同一快照只压缩一次。
+ '''
+
+__all__ = [
+    "Snapshot",
+    "SnapshotCache",
+    "snapshot_cache",
+    "snapshot_response",
+]
+
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from fastapi import Request, Response
+from starlette.concurrency import run_in_threadpool
+from app.config import compression_config
+from app.db.models import ChangeLog
+from app.middleware.compression import compress_bytes, negotiate_encoding
+from app.responses import dumps
+
+
+class Snapshot:
+    """一份已序列化的响应及其压缩副本"""
+
+    def __init__(self, cursor: int, body: bytes):
+        self.cursor = cursor
+        self.body = body
+        self.encoded: Dict[str, bytes] = {}
+        self._lock = asyncio.Lock()
+
+    @property
+    def size(self) -> int:
+        """占用字节数"""
+        return len(self.body) + sum(len(v) for v in self.encoded.values())
+
+    async def encode(self, encoding: str) -> bytes:
+        """取压缩副本，不存在时在线程池中压缩一次"""
+        data = self.encoded.get(encoding)
+        if data is not None:
+            return data
+        async with self._lock:
+            if encoding not in self.encoded:
+                level = (compression_config.snapshot_brotli_quality
+                         if encoding == "br"
+                         else compression_config.snapshot_gzip_level)
+                self.encoded[encoding] = await run_in_threadpool(
+                    compress_bytes, self.body, encoding, level)
+        return self.encoded[encoding]
+
+    async def response(
+        self, request: Request, headers: Optional[Dict[str, str]] = None
+    ) -> Response:
+        """按客户端支持的编码返回响应"""
+        headers = dict(headers or {})
+        headers["Vary"] = "Accept-Encoding"
+        body = self.body
+        if (compression_config.enabled
+                and len(body) >= compression_config.minimum_size):
+            encoding = negotiate_encoding(
+                request.headers.get("accept-encoding", ""))
+            if encoding is not None:
+                body = await self.encode(encoding)
+                headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="application/json",
+                        headers=headers)
+
+
+class SnapshotCache:
+    """按 LRU 淘汰的快照缓存(进程内)"""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Snapshot]" = OrderedDict()
+        self._building: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, cursor: int) -> Optional[Snapshot]:
+        """取未过期的快照"""
+        snapshot = self._entries.get(key)
+        if snapshot is None or snapshot.cursor != cursor:
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return snapshot
+
+    def put(self, key: Hashable, snapshot: Snapshot) -> None:
+        """保存快照并淘汰最久未使用的条目"""
+        if self.max_entries <= 0 or len(snapshot.body) > self.max_bytes:
+            return
+        self._entries[key] = snapshot
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def _evict(self) -> None:
+        """超过条目数或总大小时淘汰"""
+        while self._entries and (
+                len(self._entries) > self.max_entries
+                or self.total_bytes > self.max_bytes):
+            self._entries.popitem(last=False)
+
+    @property
+    def total_bytes(self) -> int:
+        """缓存占用字节数"""
+        return sum(s.size for s in self._entries.values())
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._entries.clear()
+
+    async def get_or_build(
+        self, key: Hashable, build: Callable[[], Awaitable[Any]]
+    ) -> Snapshot:
+        """取快照，过期时重新生成；同一 key 的并发请求共用一次生成"""
+        cursor = await ChangeLog.latest_cursor()
+        snapshot = self.get(key, cursor)
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+        task = self._building.get((key, cursor))
+        if task is None:
+            self.misses += 1
+            # 生成过程放在独立任务中，发起请求被取消(客户端断开)时
+            # 其他等待者仍能拿到结果
+            task = asyncio.ensure_future(self._build(key, cursor, build))
+            self._building[(key, cursor)] = task
+        return await asyncio.shield(task)
+
+    async def _build(
+        self, key: Hashable, cursor: int,
+        build: Callable[[], Awaitable[Any]]
+    ) -> Snapshot:
+        """生成并保存快照"""
+        try:
+            snapshot = Snapshot(cursor, dumps(await build()))
+            self.put(key, snapshot)
+            return snapshot
+        finally:
+            self._building.pop((key, cursor), None)
+
+    def stats(self) -> Dict[str, int]:
+        """缓存统计"""
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+snapshot_cache = SnapshotCache(
+    max_entries=compression_config.snapshot_entries,
+    max_bytes=compression_config.snapshot_max_bytes,
+)
+
+
+async def snapshot_response(
+    request: Request,
+    key: Hashable,
+    build: Callable[[], Awaitable[Any]],
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """返回缓存的 JSON 响应，数据变化后自动重新生成"""
+    snapshot = await snapshot_cache.get_or_build(key, build)
+    return await snapshot.response(request, headers)
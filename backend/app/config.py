@@ -2,22 +2,71 @@
  # @ Author: Alucard
  # @ Create Time: 2025-09-30 14:49:51
  # @ Modified by: Alucard
- # @ Modified time: 2025-10-10 17:04:50
- # @ Description:
+ # @ Modified time: 2025-12-04 11:02:45
+ # @ Description: 应用配置
+
+ 各配置类都从同一个 .env 文件读取，文件只解析一次，解析结果由所有配置类共享。
  '''
 
 __all__ = ["system_settings", "db_settings",
-           "admin_config", "jwt_config", "rate_limit_config"]
+           "admin_config", "jwt_config", "rate_limit_config",
+           "profiler_config", "backup_config", "sync_config",
+           "events_config", "compression_config", "searxng_config",
+           "link_check_config", "visit_config"]
 
-from typing import Optional, List, Dict
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Optional, List, Dict, Mapping, Tuple
 from functools import lru_cache
-from pydantic_settings import BaseSettings
+from pydantic_settings import (
+    BaseSettings, DotEnvSettingsSource, PydanticBaseSettingsSource)
 from pydantic import SecretStr
 
 ENV_FILE = "/root/.env"
 
 
-class SystemConfig(BaseSettings):
+@lru_cache(maxsize=None)
+def _parse_env_file(
+    path: Path, encoding: Optional[str], case_sensitive: bool,
+    ignore_empty: bool, parse_none_str: Optional[str]
+) -> Mapping[str, Optional[str]]:
+    """解析 .env 文件，相同参数只解析一次"""
+    return DotEnvSettingsSource._static_read_env_file(
+        path, encoding=encoding, case_sensitive=case_sensitive,
+        ignore_empty=ignore_empty, parse_none_str=parse_none_str)
+
+
+class CachedDotEnvSource(DotEnvSettingsSource):
+    """读取缓存的 .env 解析结果"""
+
+    def _read_env_file(self, file_path: Path) -> Mapping[str, Optional[str]]:
+        return _parse_env_file(
+            file_path, self.env_file_encoding or "utf-8", self.case_sensitive,
+            self.env_ignore_empty, self.env_parse_none_str)
+
+
+class EnvFileSettings(BaseSettings):
+    """配置基类：.env 由 CachedDotEnvSource 读取，不再每个配置类各解析一遍"""
+
+    def __init__(self, **values: Any) -> None:
+        # 关闭内置的 .env 读取(其在构造时就会解析文件)
+        values.setdefault("_env_file", None)
+        super().__init__(**values)
+
+    @classmethod
+    def settings_customise_sources(
+        cls, settings_cls: type[BaseSettings],
+        init_settings: PydanticBaseSettingsSource,
+        env_settings: PydanticBaseSettingsSource,
+        dotenv_settings: PydanticBaseSettingsSource,
+        file_secret_settings: PydanticBaseSettingsSource,
+    ) -> Tuple[PydanticBaseSettingsSource, ...]:
+        return (init_settings, env_settings,
+                CachedDotEnvSource(settings_cls), file_secret_settings)
+
+
+class SystemConfig(EnvFileSettings):
     """应用配置类"""
     # 时区配置
     timezone: str = "Asia/Shanghai"
@@ -32,6 +81,31 @@ class SystemConfig(BaseSettings):
     cache_header: str = "public, max-age=3600"
     js_cache_header: str = "public, max-age=600"
     css_cache_header: str = "public, max-age=86400"
+    # JSON 序列化库：auto(优先 orjson) 或 json(标准库)
+    json_encoder: str = "auto"
+    # 工作进程数(gunicorn 与 uvicorn --workers 都读取 WEB_CONCURRENCY)，
+    # 大于 1 时限流状态、事件转发与定时任务改为在同机进程间共享
+    web_concurrency: int = 1
+    # 同机进程共享的运行时目录(限流数据库、任务锁、事件 socket)，为空时使用
+    # /dev/shm(内存文件系统，不存在时用系统临时目录)下的 mynavi；
+    # 同一主机部署多套实例时需分别设置
+    runtime_dir: Optional[str] = None
+
+    @property
+    def multi_worker(self) -> bool:
+        """是否以多个工作进程运行"""
+        return self.web_concurrency > 1
+
+    def runtime_path(self, name: str) -> Path:
+        """运行时目录下的文件路径(目录不存在时创建)"""
+        if self.runtime_dir:
+            directory = Path(self.runtime_dir)
+        else:
+            base = "/dev/shm" if os.path.isdir("/dev/shm") \
+                else tempfile.gettempdir()
+            directory = Path(base) / "mynavi"
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory / name
 
     class Config:
         """系统配置类"""
@@ -44,7 +118,7 @@ class SystemConfig(BaseSettings):
         extra = "ignore"  # 或者使用 "ignore"
 
 
-class JwtConfig(BaseSettings):
+class JwtConfig(EnvFileSettings):
     """应用配置类"""
     # 应用配置
     algorithm: str = "HS256"
@@ -67,7 +141,7 @@ class JwtConfig(BaseSettings):
         extra = "ignore"  # 或者使用 "ignore"
 
 
-class DatabaseSettings(BaseSettings):
+class DatabaseSettings(EnvFileSettings):
     """应用配置类"""
     # 数据库类型选择: "postgres" 或 "sqlite"
     db_type: str = "postgres"
@@ -78,25 +152,80 @@ class DatabaseSettings(BaseSettings):
     user: str = "its_me"
     password: SecretStr = SecretStr("itsmynavidb")
     database: str = "my_navi"
+    # PostgreSQL 连接池配置(每个 worker 一个连接池)
+    # workers * pool_max_size 需小于服务端 max_connections
+    pool_min_size: int = 1
+    pool_max_size: int = 10
+    # 单个连接执行多少次查询后重建，0 表示不限制
+    pool_max_queries: int = 50000
+    # 空闲连接存活秒数，超时后关闭，0 表示不关闭
+    pool_max_inactive_lifetime: float = 300.0
+    # 每个连接缓存的预编译语句数量，使用 pgbouncer 事务模式时需设为 0
+    statement_cache_size: int = 100
+    # 单条语句超时秒数，0 表示不限制
+    command_timeout: float = 0
+    # 只读副本配置(可选)，未设置 replica_host 时全部查询走主库
+    # 用户名、密码、库名未设置时沿用主库配置
+    replica_host: Optional[str] = None
+    replica_port: Optional[int] = None
+    replica_user: Optional[str] = None
+    replica_password: Optional[SecretStr] = None
+    replica_database: Optional[str] = None
+    # 写入后多少秒内该用户的读请求仍走主库(覆盖复制延迟)
+    replica_sticky_seconds: float = 5.0
 
     # SQLite 数据库配置
     sqlite_db_path: str = "./db_data/my_navi.sqlite3"
+    # SQLite 性能配置(建立连接时以 PRAGMA 方式设置)
+    # WAL 模式下读写互不阻塞，NORMAL 同步在 WAL 下仍可保证一致性
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    # 内存映射大小(字节)，0 表示关闭
+    sqlite_mmap_size: int = 128 * 1024 * 1024
+    # 页缓存大小，负数表示 KiB
+    sqlite_cache_size: int = -8192
+    sqlite_temp_store: str = "MEMORY"
+    # 等待数据库锁的毫秒数
+    sqlite_busy_timeout: int = 5000
+
+    @property
+    def replica_enabled(self) -> bool:
+        """是否启用只读副本"""
+        return bool(self.replica_host) and self.db_type.lower() != "sqlite"
 
     @property
     def config(self) -> Dict:
         """获取 PostgreSQL 配置"""
+        connections = {
+            "default": {
+                # 在 asyncpg 客户端基础上增加连接池统计
+                "engine": "app.db.pool",
+                "credentials": {
+                    "host": self.host,
+                    "port": self.port,
+                    "user": self.user,
+                    "password": str(self.password.get_secret_value()),
+                    "database": self.database,
+                    **self.pool_options},
+            }
+        }
+        routers = []
+        if self.replica_enabled:
+            password = self.replica_password or self.password
+            connections["replica"] = {
+                "engine": "app.db.pool",
+                "credentials": {
+                    "host": self.replica_host,
+                    "port": self.replica_port or self.port,
+                    "user": self.replica_user or self.user,
+                    "password": str(password.get_secret_value()),
+                    "database": self.replica_database or self.database,
+                    **self.pool_options},
+            }
+            routers.append("app.db.routing.ReplicaRouter")
         return {
-            "connections": {
-                "default": {
-                    "engine": "tortoise.backends.asyncpg",
-                    "credentials": {
-                        "host": self.host,
-                        "port": self.port,
-                        "user": self.user,
-                        "password": str(self.password.get_secret_value()),
-                        "database": self.database},
-                }
-            },
+            "connections": connections,
+            "routers": routers,
             "apps": {
                 "models": {
                     "models": ["app.db.models", "aerich.models"],
@@ -107,6 +236,33 @@ class DatabaseSettings(BaseSettings):
             "timezone": "Asia/Shanghai",
         }
 
+    @property
+    def pool_options(self) -> Dict:
+        """获取 asyncpg 连接池参数"""
+        options = {
+            "minsize": self.pool_min_size,
+            "maxsize": self.pool_max_size,
+            "max_queries": self.pool_max_queries,
+            "max_inactive_connection_lifetime":
+                self.pool_max_inactive_lifetime,
+            "statement_cache_size": self.statement_cache_size,
+        }
+        if self.command_timeout > 0:
+            options["command_timeout"] = self.command_timeout
+        return options
+
+    @property
+    def sqlite_pragmas(self) -> Dict:
+        """获取 SQLite 连接 PRAGMA"""
+        return {
+            "journal_mode": self.sqlite_journal_mode,
+            "synchronous": self.sqlite_synchronous,
+            "mmap_size": self.sqlite_mmap_size,
+            "cache_size": self.sqlite_cache_size,
+            "temp_store": self.sqlite_temp_store,
+            "busy_timeout": self.sqlite_busy_timeout,
+        }
+
     @property
     def sqlite_config(self) -> Dict:
         """获取 SQLite 配置"""
@@ -115,7 +271,9 @@ class DatabaseSettings(BaseSettings):
                 "default": {
                     "engine": "tortoise.backends.sqlite",
                     "credentials": {
-                        "file_path": self.sqlite_db_path
+                        "file_path": self.sqlite_db_path,
+                        # 其余参数由 Tortoise 在建立连接时逐条执行 PRAGMA
+                        **self.sqlite_pragmas,
                     }
                 }
             },
@@ -147,7 +305,7 @@ class DatabaseSettings(BaseSettings):
         extra = "ignore"  # 或者使用 "ignore"
 
 
-class AdminConfig(BaseSettings):
+class AdminConfig(EnvFileSettings):
     """应用配置类"""
     name: str = ""
     password: SecretStr = SecretStr("")
@@ -167,7 +325,7 @@ class AdminConfig(BaseSettings):
         extra = "ignore"  # 或者使用 "ignore"
 
 
-class RateLimitConfig(BaseSettings):
+class RateLimitConfig(EnvFileSettings):
     """限流配置"""
     # 是否启用限流
     enabled: bool = True
@@ -184,6 +342,10 @@ class RateLimitConfig(BaseSettings):
     whitelist_ips: str = ""
     # 是否启用自动清理
     enable_cleanup: bool = True
+    # 限流状态存储：memory(进程内)、sqlite(同机进程共享)、auto(多 worker 时用 sqlite)
+    storage: str = "auto"
+    # sqlite 存储的文件路径，为空时放在运行时目录
+    storage_path: Optional[str] = None
 
     def get_whitelist_ips(self) -> list:
         """获取白名单IP列表"""
@@ -191,6 +353,15 @@ class RateLimitConfig(BaseSettings):
             return []
         return [ip.strip() for ip in self.whitelist_ips.split(",") if ip.strip()]
 
+    def get_storage_path(self) -> Optional[str]:
+        """共享限流数据库路径，使用进程内存储时返回 None"""
+        storage = self.storage.lower()
+        if storage == "memory" or (
+                storage == "auto" and not system_settings.multi_worker):
+            return None
+        return self.storage_path or str(
+            system_settings.runtime_path("rate_limit.sqlite3"))
+
     class Config:
         """配置类"""
         env_file = ENV_FILE
@@ -199,6 +370,204 @@ class RateLimitConfig(BaseSettings):
         extra = 'ignore'
 
 
+class BackupConfig(EnvFileSettings):
+    """SQLite 定时备份配置"""
+    # 是否启用定时备份(仅 SQLite)
+    enabled: bool = True
+    # 备份间隔(秒)
+    interval: int = 6 * 60 * 60
+    # 启动后延迟多久进行第一次备份(秒)，避免与启动、预热争抢磁盘
+    startup_delay: int = 60
+    # 备份目录，默认为数据库所在目录下的 backup
+    directory: Optional[str] = None
+    # 每步复制的页数及步间休眠秒数，步间释放读锁，避免长时间阻塞写入
+    pages: int = 256
+    sleep: float = 0.01
+    # 是否 gzip 压缩备份文件
+    compress: bool = True
+    # 保留最近 N 天每天最新的一份、最近 M 周每周最新的一份
+    keep_daily: int = 7
+    keep_weekly: int = 4
+
+    class Config:
+        """配置类"""
+        env_file = ENV_FILE
+        env_prefix = "BACKUP_"
+        case_sensitive = False
+        extra = 'ignore'
+
+
+class SyncConfig(EnvFileSettings):
+    """增量同步配置"""
+    # 单次同步最多返回的变更条数
+    page_size: int = 1000
+    # 删除记录(墓碑)保留天数，超过后离线更久的客户端需全量加载
+    tombstone_days: int = 30
+    # 变更日志压缩间隔(秒)
+    compact_interval: int = 6 * 60 * 60
+
+    class Config:
+        """配置类"""
+        env_file = ENV_FILE
+        env_prefix = "SYNC_"
+        case_sensitive = False
+        extra = 'ignore'
+
+
+class EventsConfig(EnvFileSettings):
+    """SSE 推送配置"""
+    enabled: bool = True
+    # 心跳间隔(秒)，防止代理断开空闲连接
+    heartbeat: float = 15.0
+    # 客户端断线重连等待(毫秒)
+    retry_ms: int = 3000
+    # 每个连接最多积压的事件数，超过后改为通知客户端重新同步
+    queue_size: int = 100
+    # 单个 worker 最多同时保持的连接数
+    max_clients: int = 200
+    # 多 worker 部署时用于转发事件的目录(unix socket)，为空则只在本进程内推送
+    fanout_dir: Optional[str] = None
+
+    class Config:
+        """配置类"""
+        env_file = ENV_FILE
+        env_prefix = "EVENTS_"
+        case_sensitive = False
+        extra = 'ignore'
+
+
+class CompressionConfig(EnvFileSettings):
+    """响应压缩配置"""
+    enabled: bool = True
+    # 小于该字节数的响应不压缩
+    minimum_size: int = 1024
+    # 按请求压缩时的级别，取偏低值以节省 CPU
+    gzip_level: int = 6
+    brotli_quality: int = 4
+    # 列表/导出快照只压缩一次，可使用更高级别
+    snapshot_gzip_level: int = 9
+    snapshot_brotli_quality: int = 9
+    # 快照缓存条目数与总字节数上限(含压缩副本)，条目数为 0 时不缓存
+    snapshot_entries: int = 64
+    snapshot_max_bytes: int = 64 * 1024 * 1024
+
+    class Config:
+        """配置类"""
+        env_file = ENV_FILE
+        env_prefix = "COMPRESSION_"
+        case_sensitive = False
+        extra = 'ignore'
+
+
+class SearxngConfig(EnvFileSettings):
+    """SearXNG 搜索代理配置"""
+    # 容器内部访问地址
+    host: str = "searxng"
+    port: int = 8080
+    # 对外暴露的地址(浏览器直接访问时使用)
+    bind_host: str = "localhost"
+    bind_port: int = 8080
+    # 单次搜索超时(秒)
+    timeout: float = 8.0
+    # 长连接池大小
+    max_connections: int = 20
+    max_keepalive: int = 10
+    # 搜索结果缓存时间(秒)与条目数，条目数为 0 时不缓存
+    cache_ttl: int = 300
+    cache_entries: int = 512
+    # 查询串最大长度
+    max_query_length: int = 256
+    # 后台健康探测间隔与超时(秒)，间隔为 0 时不在后台探测，每次请求实时检查
+    health_interval: float = 30.0
+    health_timeout: float = 2.0
+    # 连续失败该次数后熔断，熔断期间不再代理搜索；经过 breaker_reset 秒后放行一次试探
+    breaker_failures: int = 3
+    breaker_reset: float = 30.0
+    # 统一搜索等待 SearXNG 结果的截止时间(秒)，超时后只返回本地结果
+    federated_deadline: float = 3.0
+
+    @property
+    def internal_url(self) -> str:
+        """后端访问 SearXNG 的地址"""
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def external_url(self) -> str:
+        """浏览器访问 SearXNG 的地址"""
+        return f"http://{self.bind_host}:{self.bind_port}"
+
+    class Config:
+        """配置类"""
+        env_file = ENV_FILE
+        env_prefix = "SEARXNG_"
+        case_sensitive = False
+        extra = 'ignore'
+
+
+class LinkCheckConfig(EnvFileSettings):
+    """网址可用性检测配置"""
+    enabled: bool = True
+    # 两轮检测的间隔与应用启动后首轮的延迟(秒)
+    interval: int = 24 * 60 * 60
+    startup_delay: int = 300
+    # 总并发数与同一主机的并发数
+    concurrency: int = 64
+    per_host: int = 2
+    # 同一主机两次请求之间的最小间隔(秒)
+    host_delay: float = 0.5
+    # 单个请求超时(秒)
+    timeout: float = 10.0
+    # 每次从数据库读取、每批保存结果的网址数
+    batch_size: int = 500
+    # 连续失败该次数后视为失效
+    dead_after: int = 2
+    user_agent: str = "Mozilla/5.0 (compatible; MyNavi-LinkChecker/1.0)"
+
+    class Config:
+        """配置类"""
+        env_file = ENV_FILE
+        env_prefix = "LINK_CHECK_"
+        case_sensitive = False
+        extra = 'ignore'
+
+
+class VisitConfig(EnvFileSettings):
+    """访问计数配置"""
+    enabled: bool = True
+    # 内存中的计数写入数据库的间隔(秒)
+    flush_interval: float = 5.0
+    # 常用/最近访问列表保留的条目数
+    top_k: int = 50
+    # 两次写入之间最多累积的不同网址数，超过后提前写入
+    max_pending: int = 10000
+
+    class Config:
+        """配置类"""
+        env_file = ENV_FILE
+        env_prefix = "VISITS_"
+        case_sensitive = False
+        extra = 'ignore'
+
+
+class ProfilerConfig(EnvFileSettings):
+    """SQL 性能分析配置(开发用)"""
+    # 是否启用按请求统计SQL
+    enabled: bool = False
+    # 超过该耗时(毫秒)的请求记录汇总日志
+    slow_request_ms: int = 500
+    # 同一语句形态在单个请求中重复超过该次数视为疑似 N+1
+    repeat_threshold: int = 5
+    # 是否添加 Server-Timing 响应头
+    server_timing: bool = True
+
+    class Config:
+        """配置类"""
+        env_file = ENV_FILE
+        env_prefix = "PROFILER_"  # 使用 PROFILER_ 前缀
+        case_sensitive = False
+        extra = 'ignore'
+
+
 @lru_cache()
 def get_settings() -> SystemConfig:
     """获取配置实例（单例模式）"""
@@ -211,3 +580,11 @@ db_settings = DatabaseSettings()
 admin_config = AdminConfig()
 jwt_config = JwtConfig()
 rate_limit_config = RateLimitConfig()
+profiler_config = ProfilerConfig()
+backup_config = BackupConfig()
+sync_config = SyncConfig()
+events_config = EventsConfig()
+compression_config = CompressionConfig()
+searxng_config = SearxngConfig()
+link_check_config = LinkCheckConfig()
+visit_config = VisitConfig()
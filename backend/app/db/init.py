@@ -2,45 +2,54 @@
  # @ Author: Alucard
  # @ Create Time: 2025-09-30 14:49:55
  # @ Modified by: Alucard
- # @ Modified time: 2025-10-10 15:36:03
- # @ Description:
+ # @ Modified time: 2025-12-04 10:21:37
+ # @ Description: 数据库初始化
+
+ 建表、迁移与超级管理员检查完成后在 schema_version 中记录结构指纹，
+ 模型、迁移与管理员用户名都没有变化时，重启只比较一次指纹即可就绪。
  '''
 
 __all__ = ['init_db', 'close_db']
 
 from typing import Dict
-from tortoise import Tortoise
+from tortoise import Tortoise, connections
 from tortoise.transactions import in_transaction
 from tortoise.exceptions import IntegrityError
 from app.config import admin_config as admin
 from app.security import get_password_hash
 from .models import User
+from .migrations import (
+    run_migrations, schema_fingerprint, stored_fingerprint, save_fingerprint)
 
 
 async def init_db(config: Dict) -> None:
     """初始化数据库"""
     await Tortoise.init(config=config)
-    # 不生成模式，避免约束冲突
-    try:
-        await Tortoise.generate_schemas(safe=True)
-        superadmin = await User.get_or_none(
-            username=admin.name)
-        if not superadmin:
-            try:
-                async with in_transaction():
-                    hashed_password = get_password_hash(
-                        f"{admin.password_value}")
-                    await User.create(
-                        username=admin.name,
-                        password_hash=hashed_password
-                    )
-                    print("Superadmin account created.")
-                    print(f'Superadmin: {admin.name}')
-                    print("Superadmin Password: ", admin.password_value)
-            except IntegrityError:
-                pass
-    except IntegrityError:
-        pass
+    fingerprint = schema_fingerprint(
+        connections.get("default"), admin.name)
+    if await stored_fingerprint() == fingerprint:
+        return
+    # 建表与迁移出错时直接抛出，不记录指纹，避免带着不完整的结构启动
+    await Tortoise.generate_schemas(safe=True)
+    await run_migrations()
+    superadmin = await User.get_or_none(
+        username=admin.name)
+    if not superadmin:
+        try:
+            async with in_transaction("default"):
+                hashed_password = get_password_hash(
+                    f"{admin.password_value}")
+                await User.create(
+                    username=admin.name,
+                    password_hash=hashed_password
+                )
+                print("Superadmin account created.")
+                print(f'Superadmin: {admin.name}')
+                print("Superadmin Password: ", admin.password_value)
+        except IntegrityError:
+            # 多个 worker 同时启动时由其他进程创建
+            pass
+    await save_fingerprint(fingerprint)
 
 
 async def close_db() -> None:
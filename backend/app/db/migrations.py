@@ -0,0 +1,179 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-11-22 14:05:12
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-11-22 14:05:12
+ # @ Description: 数据库迁移
+
+ generate_schemas(safe=True) 只会创建缺失的表，已有数据库上新增的索引和字段
+ 由这里按版本依次补齐。每个迁移都需要可重复执行(新库建表时已包含对应结构)；
+依赖迁移新增字段的索引不能放进模型 Meta.indexes，只能在迁移中创建。
+ '''
+
+__all__ = ["MIGRATIONS", "run_migrations", "model_index_sqls",
+           "schema_fingerprint", "stored_fingerprint", "save_fingerprint"]
+
+import hashlib
+from typing import (
+    Awaitable, Callable, Iterable, List, Optional, Set, Tuple, Type)
+from tortoise import connections
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.exceptions import BaseORMException
+from tortoise.indexes import Index
+from tortoise.models import Model
+from tortoise.transactions import in_transaction
+from tortoise.utils import get_schema_sql
+from app.logging import setup_logging, INFO
+from app.urls import url_hash
+from .models import Category, Website, SchemaVersion
+
+
+logger = setup_logging(logger_name=__name__, level=INFO, backup_count=1)
+
+Migration = Callable[[BaseDBAsyncClient], Awaitable[None]]
+
+# schema_version 中保存结构指纹的行(迁移版本号从 1 开始)
+FINGERPRINT_VERSION = 0
+
+
+def model_index_sqls(
+    conn: BaseDBAsyncClient, model: Type[Model],
+    names: Optional[Iterable[str]] = None,
+    indexes: Optional[Iterable[Index]] = None
+) -> List[str]:
+    """按模型 Meta.indexes(或传入的 indexes)生成可重复执行的建索引语句，
+    可只取指定名称的索引"""
+    generator = conn.schema_generator(conn)
+    wanted = set(names) if names is not None else None
+    if indexes is None:
+        indexes = model._meta.indexes
+    return [index.get_sql(generator, model, safe=True)
+            for index in indexes
+            if wanted is None or index.name in wanted]
+
+
+async def column_exists(
+    conn: BaseDBAsyncClient, table: str, column: str
+) -> bool:
+    """表中是否已有指定字段"""
+    if conn.capabilities.dialect == "sqlite":
+        rows = await conn.execute_query_dict(f'PRAGMA table_info("{table}")')
+        return any(row["name"] == column for row in rows)
+    rows = await conn.execute_query_dict(
+        "SELECT 1 FROM information_schema.columns "
+        "WHERE table_name = $1 AND column_name = $2", [table, column])
+    return bool(rows)
+
+
+async def add_sort_indexes(conn: BaseDBAsyncClient) -> None:
+    """为列表、筛选、导出查询添加组合索引"""
+    indexes = {
+        Category: ("idx_categories_sort", "idx_categories_user_sort"),
+        Website: ("idx_websites_sort", "idx_websites_category_sort",
+                  "idx_websites_owner_category_sort"),
+    }
+    for model, names in indexes.items():
+        for sql in model_index_sqls(conn, model, names):
+            await conn.execute_query(sql)
+
+
+async def add_url_hash(conn: BaseDBAsyncClient) -> None:
+    """添加规范化网址摘要字段并回填，建立(用户, 摘要)唯一索引
+
+    已有的重复网址按 id 顺序只给最早的一条写入摘要，其余保持为空，
+    由 /api/websites/duplicates 列出后交给用户处理
+    """
+    table = Website._meta.db_table
+    if not await column_exists(conn, table, "url_hash"):
+        await conn.execute_script(
+            f'ALTER TABLE "{table}" ADD COLUMN "url_hash" VARCHAR(32);')
+    rows = await Website.filter().using_db(conn).order_by("id").values_list(
+        "id", "owner_id", "url", "url_hash")
+    taken: Set[Tuple[int, str]] = {
+        (owner_id, digest) for _, owner_id, _, digest in rows if digest}
+    backfill = []
+    for website_id, owner_id, url, digest in rows:
+        if digest:
+            continue
+        digest = url_hash(url)
+        if (owner_id, digest) in taken:
+            continue
+        taken.add((owner_id, digest))
+        backfill.append(Website(id=website_id, url_hash=digest))
+    if backfill:
+        # bulk_update 不触发信号，摘要不属于对外数据，不写变更日志
+        await Website.bulk_update(
+            backfill, fields=["url_hash"], batch_size=500, using_db=conn)
+    for sql in model_index_sqls(
+            conn, Website, ("idx_websites_owner_url_hash",),
+            Website.URL_HASH_INDEXES):
+        await conn.execute_query(sql)
+    logger.info("Backfilled url_hash for %s websites, %s duplicates left",
+                len(backfill), len(rows) - len(taken))
+
+
+async def add_url_hash_index(conn: BaseDBAsyncClient) -> None:
+    """为统一搜索的已收藏判断添加摘要单列索引"""
+    for sql in model_index_sqls(conn, Website, ("idx_websites_url_hash",),
+                                Website.URL_HASH_INDEXES):
+        await conn.execute_query(sql)
+
+
+# (版本, 说明, 迁移函数)，版本号只增不改
+MIGRATIONS: List[Tuple[int, str, Migration]] = [
+    (1, "add sort/filter composite indexes", add_sort_indexes),
+    (2, "add websites.url_hash with per-owner unique index", add_url_hash),
+    (3, "add websites.url_hash index for search", add_url_hash_index),
+]
+
+
+async def run_migrations(connection_name: str = "default") -> None:
+    """执行尚未应用的迁移"""
+    conn = connections.get(connection_name)
+    applied = set(await SchemaVersion.all().values_list("version", flat=True))
+    for version, description, migration in MIGRATIONS:
+        if version in applied:
+            continue
+        async with in_transaction(connection_name) as tx:
+            await migration(tx)
+            await SchemaVersion.create(
+                version=version, description=description, using_db=tx)
+        logger.info("Applied migration %s: %s", version, description)
+    if conn.capabilities.dialect == "sqlite":
+        # 让查询规划器获得索引统计信息
+        await conn.execute_script("PRAGMA optimize;")
+
+
+def schema_fingerprint(conn: BaseDBAsyncClient, *extra: str) -> str:
+    """模型建表语句与迁移版本的摘要，extra 为其他需要参与比较的启动参数
+
+    只在内存中生成 SQL，不访问数据库
+    """
+    digest = hashlib.sha256(get_schema_sql(conn, safe=True).encode())
+    for version, description, _ in MIGRATIONS:
+        digest.update(f"{version}:{description}".encode())
+    for value in extra:
+        digest.update(value.encode())
+    return digest.hexdigest()
+
+
+async def stored_fingerprint(
+    connection_name: str = "default"
+) -> Optional[str]:
+    """上次完成初始化时保存的结构指纹，新库(尚无 schema_version 表)返回 None"""
+    try:
+        return await SchemaVersion.filter(
+            version=FINGERPRINT_VERSION
+        ).using_db(connections.get(connection_name)).first().values_list(
+            "description", flat=True)
+    except BaseORMException:
+        return None
+
+
+async def save_fingerprint(
+    fingerprint: str, connection_name: str = "default"
+) -> None:
+    """记录结构指纹，下次启动相同则跳过建表与迁移"""
+    await SchemaVersion.update_or_create(
+        defaults={"description": fingerprint}, version=FINGERPRINT_VERSION,
+        using_db=connections.get(connection_name))
@@ -11,15 +11,162 @@ __all__ = [
     "User",
     "Category",
     "Website",
+    "LinkCheck",
+    "WebsiteVisit",
+    "SchemaVersion",
+    "ChangeLog",
 ]
-from typing import List, Dict, Union
-from tortoise import fields
+from bisect import bisect_left
+from datetime import timedelta
+from typing import List, Dict, Union, Optional, Tuple, Iterable, Any
+from tortoise import connections, fields, timezone
 from tortoise.models import Model
-from tortoise.expressions import Q
-from app.schemas import CategoryCreate, WebsiteCreate
+from tortoise.expressions import F, Q
+from tortoise.functions import Max
+from tortoise.transactions import in_transaction
+from tortoise.indexes import Index
+from tortoise.signals import post_save, post_delete
+from tortoise.backends.base.client import (
+    BaseDBAsyncClient, TransactionalDBClient)
+from app.schemas import CategoryCreate, WebsiteCreate, WebsiteBatchUpdateItem
+from app.urls import url_hash
 
 
 SORT_RULE = ["-sort_order", "created_at"]
+DEFAULT_ICON = "default.webp"
+# 拖拽排序时相邻记录 sort_order 的间隔
+SORT_GAP = 1024
+
+
+class SortIndex(Index):
+    """支持降序列的索引
+
+    列表查询按 SORT_RULE(sort_order 降序, created_at 升序)排序，
+    方向混合时需要索引列方向一致才能避免额外排序；unique=True 时建唯一索引
+    """
+
+    def __init__(self, *, fields, name: str, desc=("sort_order",),
+                 unique: bool = False) -> None:
+        super().__init__(fields=fields, name=name)
+        self.desc = set(desc)
+        self.unique = unique
+
+    def get_sql(self, schema_generator, model, safe: bool) -> str:
+        columns = []
+        for field in self.fields:
+            field_object = model._meta.fields_map.get(field)
+            column = (field_object.source_field if field_object else None) or field
+            columns.append(schema_generator.quote(column)
+                           + (" DESC" if field in self.desc else ""))
+        template = (schema_generator.UNIQUE_INDEX_CREATE_TEMPLATE
+                    if self.unique else schema_generator.INDEX_CREATE_TEMPLATE)
+        return template.format(
+            exists="IF NOT EXISTS " if safe else "",
+            index_name=self.name,
+            index_type="",
+            table_name=model._meta.db_table,
+            fields=", ".join(columns),
+            extra="",
+        )
+
+
+def plan_sort_order(
+    current: Dict[int, int], ordered_ids: List[int], gap: int = SORT_GAP
+) -> Dict[int, int]:
+    """根据目标顺序计算需要修改的 sort_order
+
+    排序规则为 sort_order 降序，保留当前值已满足降序的最长子序列，
+    其余记录在相邻保留值之间按间隔插入，只有间隔耗尽时才整体重排。
+
+    Args:
+        current: 当前 {id: sort_order}
+        ordered_ids: 目标顺序(靠前的排在前面)
+        gap: 新分配值之间的间隔
+
+    Returns:
+        需要更新的 {id: 新 sort_order}
+    """
+    keys = [current[i] for i in ordered_ids]
+    # 求 keys 的最长严格递减子序列(即 -keys 的最长严格递增子序列)
+    tails: List[int] = []
+    tail_idx: List[int] = []
+    prev = [-1] * len(keys)
+    for idx, key in enumerate(keys):
+        pos = bisect_left(tails, -key)
+        if pos > 0:
+            prev[idx] = tail_idx[pos - 1]
+        if pos == len(tails):
+            tails.append(-key)
+            tail_idx.append(idx)
+        else:
+            tails[pos] = -key
+            tail_idx[pos] = idx
+    kept = set()
+    idx = tail_idx[-1] if tail_idx else -1
+    while idx >= 0:
+        kept.add(idx)
+        idx = prev[idx]
+
+    new_keys = list(keys)
+    start = 0
+    while start < len(keys):
+        if start in kept:
+            start += 1
+            continue
+        end = start
+        while end < len(keys) and end not in kept:
+            end += 1
+        upper = new_keys[start - 1] if start > 0 else None
+        lower = keys[end] if end < len(keys) else None
+        count = end - start
+        if upper is not None and lower is not None:
+            step = (upper - lower) // (count + 1)
+            if step < 1:
+                # 间隔耗尽，整体重排
+                new_keys = [(len(keys) - i) * gap for i in range(len(keys))]
+                break
+        else:
+            step = gap
+        for offset in range(count):
+            if upper is not None:
+                new_keys[start + offset] = upper - step * (offset + 1)
+            else:
+                new_keys[start + offset] = lower + step * (count - offset)
+        start = end
+    return {i: k for i, k in zip(ordered_ids, new_keys) if current[i] != k}
+
+
+async def apply_sort_order(
+    model: type, ordered_ids: List[int], f: Optional[Q] = None
+) -> Union[List[int], int]:
+    """在事务内按目标顺序批量更新 sort_order
+
+    Args:
+        model: 模型类
+        ordered_ids: 目标顺序
+        f: 额外的过滤条件(如所属用户)
+
+    Returns:
+        存在未找到的记录时返回其 id 列表，否则返回更新的记录数
+    """
+    f = f if f is not None else Q()
+    async with in_transaction("default"):
+        # 查询集需在事务内创建，否则会使用事务外的连接
+        records = {
+            r.id: r for r in await model.filter(f, id__in=ordered_ids)}
+        missing = [i for i in ordered_ids if i not in records]
+        if missing:
+            return missing
+        changes = plan_sort_order(
+            {i: r.sort_order for i, r in records.items()}, ordered_ids)
+        changed = []
+        for i, key in changes.items():
+            records[i].sort_order = key
+            changed.append(records[i])
+        if changed:
+            await model.bulk_update(changed, fields=["sort_order"])
+            await ChangeLog.record(model, [r.id for r in changed])
+    return len(changed)
 
 
 class User(Model):
@@ -49,6 +196,14 @@ class Category(Model):
     class Meta:
         """分类模型元数据"""
         table = "categories"
+        indexes = (
+            # 分类列表排序
+            SortIndex(fields=("sort_order", "created_at"),
+                      name="idx_categories_sort"),
+            # 按创建用户导出
+            SortIndex(fields=("created_user_id", "sort_order", "created_at"),
+                      name="idx_categories_user_sort"),
+        )
 
     @classmethod
     async def get_list_categories(cls, q: str) -> List["Category"]:
@@ -57,17 +212,39 @@ class Category(Model):
         return await cls.filter(f).order_by(*SORT_RULE)
 
     @classmethod
-    async def clean(cls, category_id: int):
-        """清理当前分类内容"""
-        record = await cls.get_or_none(id=category_id)
-        if record is None:
-            return False
-        websites = await Website.filter(category_id=category_id)
-        if websites:
-            for website in websites:
-                await website.delete()
-        await record.delete()
-        return True
+    async def clean(cls, category_id: int) -> Union[bool, List[str]]:
+        """清理当前分类内容
+
+        在同一事务内按分类批量删除网址后删除分类本身
+
+        Returns:
+            分类不存在时返回 False，否则返回被删除网址使用的图标文件名
+        """
+        async with in_transaction("default"):
+            record = await cls.get_or_none(id=category_id)
+            if record is None:
+                return False
+            websites = Website.filter(category_id=category_id)
+            rows = await websites.values_list("id", "icon")
+            await websites.delete()
+            await ChangeLog.record(
+                Website, [i for i, _ in rows], ChangeLog.DELETE)
+            await record.delete()
+        return sorted({icon for _, icon in rows})
+
+    @classmethod
+    async def missing_ids(cls, ids: Iterable[Optional[int]]) -> List[int]:
+        """一次查询返回不存在的分类 id"""
+        wanted = {i for i in ids if i}
+        if not wanted:
+            return []
+        found = await cls.filter(id__in=wanted).values_list("id", flat=True)
+        return sorted(wanted - set(found))
+
+    @classmethod
+    async def reorder(cls, ids: List[int]) -> Union[List[int], int]:
+        """按给定顺序批量更新分类排序"""
+        return await apply_sort_order(cls, ids)
 
     @classmethod
     async def dumpdata(cls, user: User) -> List[Dict]:
@@ -103,10 +280,13 @@ class Website(Model):
     id = fields.IntField(pk=True)
     name = fields.CharField(max_length=128, index=True)
     url = fields.CharField(max_length=255)
+    # 规范化网址的摘要(app.urls.url_hash)，同一用户内唯一；
+    # 迁移前已存在的重复网址只有最早的一条保留摘要，其余为空
+    url_hash = fields.CharField(max_length=32, null=True)
     back_url = fields.CharField(max_length=255, null=True)
     description = fields.TextField(null=True)
     sort_order = fields.IntField(default=0)
-    icon = fields.CharField(max_length=255, default="default.webp")
+    icon = fields.CharField(max_length=255, default=DEFAULT_ICON)
     category = fields.ForeignKeyField(
         "models.Category", related_name="websites",
         on_delete=fields.RESTRICT, null=True
@@ -117,9 +297,34 @@ class Website(Model):
 
     created_at = fields.DatetimeField(auto_now_add=True)
 
+    # url_hash 上的索引不放在 Meta.indexes 中：旧库的 websites 表没有该字段，
+    # generate_schemas 会在迁移补字段之前建索引(SQLite 会把列名当作字符串常量)，
+    # 因此只由迁移 2、3 在字段就绪后创建，新库同样经由迁移建立
+    URL_HASH_INDEXES = (
+        # 按规范化网址查重
+        SortIndex(fields=("owner_id", "url_hash"),
+                  name="idx_websites_owner_url_hash",
+                  desc=(), unique=True),
+        # 统一搜索按规范化网址标记已收藏(不区分用户)
+        SortIndex(fields=("url_hash",), name="idx_websites_url_hash",
+                  desc=()),
+    )
+
     class Meta:
         """网站模型元数据"""
         table = "websites"
+        indexes = (
+            # 全部网址列表排序
+            SortIndex(fields=("sort_order", "created_at"),
+                      name="idx_websites_sort"),
+            # 按分类筛选
+            SortIndex(fields=("category_id", "sort_order", "created_at"),
+                      name="idx_websites_category_sort"),
+            # 按用户导出/批量操作
+            SortIndex(fields=("owner_id", "category_id",
+                              "sort_order", "created_at"),
+                      name="idx_websites_owner_category_sort"),
+        )
 
     @classmethod
     async def dumpdata(cls, user: User) -> List[Dict]:
@@ -150,14 +355,160 @@ class Website(Model):
         return await Website.create(
             name=payload.name,
             url=str(payload.url),
+            url_hash=url_hash(str(payload.url)),
             back_url=str(payload.back_url) if payload.back_url else None,
             description=payload.description,
             sort_order=payload.sort_order,
-            icon=payload.icon if payload.icon else "default.webp",
+            icon=payload.icon if payload.icon else DEFAULT_ICON,
             category=category,
             owner=user,
         )
 
+    @classmethod
+    async def bulk_delete(
+        cls, ids: List[int], user: User
+    ) -> Tuple[int, List[str]]:
+        """批量删除当前用户的网址
+
+        Returns:
+            (删除数量, 被删除网址使用的图标文件名)
+        """
+        async with in_transaction("default"):
+            websites = cls.filter(id__in=ids, owner_id=user.id)
+            rows = await websites.values_list("id", "icon")
+            count = await websites.delete()
+            await ChangeLog.record(cls, [i for i, _ in rows], ChangeLog.DELETE)
+        return count, sorted({icon for _, icon in rows})
+
+    @classmethod
+    def build(cls, payload: WebsiteCreate, user: User) -> "Website":
+        """根据创建模型构造未保存的实例"""
+        return cls(
+            name=payload.name,
+            url=str(payload.url),
+            url_hash=url_hash(str(payload.url)),
+            back_url=str(payload.back_url) if payload.back_url else None,
+            description=payload.description,
+            sort_order=payload.sort_order,
+            icon=payload.icon if payload.icon else DEFAULT_ICON,
+            category_id=payload.category_id or None,
+            owner=user,
+        )
+
+    @classmethod
+    async def missing_ids(cls, ids: Iterable[int], user: User) -> List[int]:
+        """一次查询返回当前用户不存在的网址 id"""
+        wanted = set(ids)
+        found = await cls.filter(
+            id__in=wanted, owner_id=user.id).values_list("id", flat=True)
+        return sorted(wanted - set(found))
+
+    @classmethod
+    async def existing_hashes(
+        cls, hashes: Iterable[str], user: User
+    ) -> Dict[str, int]:
+        """一次 IN 查询返回当前用户已存在的网址摘要 {摘要: 网址id}"""
+        wanted = set(hashes)
+        if not wanted:
+            return {}
+        return dict(await cls.filter(
+            owner_id=user.id, url_hash__in=wanted
+        ).values_list("url_hash", "id"))
+
+    @classmethod
+    async def duplicate_clusters(cls, user: User) -> List[List[Dict]]:
+        """当前用户规范化网址相同的网址分组(每组至少两条，按 id 排序)
+
+        唯一索引保证有摘要的记录互不重复，重复只会出现在迁移前遗留的
+        无摘要记录中：按当前规则计算它们的摘要，再一次查询取回同组的记录
+        """
+        columns = ("id", "name", "url", "category_id", "created_at")
+        legacy = await cls.filter(
+            owner_id=user.id, url_hash__isnull=True).values(*columns)
+        clusters: Dict[str, List[Dict]] = {}
+        for row in legacy:
+            clusters.setdefault(url_hash(row["url"]), []).append(row)
+        if clusters:
+            for row in await cls.filter(
+                    owner_id=user.id, url_hash__in=list(clusters)
+            ).values("url_hash", *columns):
+                clusters[row.pop("url_hash")].append(row)
+        groups = [sorted(group, key=lambda row: row["id"])
+                  for group in clusters.values() if len(group) > 1]
+        return sorted(groups, key=lambda group: group[0]["id"])
+
+    @classmethod
+    async def batch_create(
+        cls, payloads: List[WebsiteCreate], user: User
+    ) -> List["Website"]:
+        """在事务内批量创建网址(分类需由调用方预先校验)"""
+        websites = [cls.build(p, user) for p in payloads]
+        async with in_transaction("default"):
+            await cls.bulk_create(websites)
+            # bulk_create 不回填主键；摘要在同一用户下唯一，按摘要取回新记录
+            # (按 id 范围取回会混入其他请求并发插入的记录)
+            records = await cls.filter(
+                owner_id=user.id,
+                url_hash__in=[w.url_hash for w in websites]
+            ).order_by("id")
+            await ChangeLog.record(cls, [r.id for r in records])
+        return records
+
+    @classmethod
+    async def batch_update(
+        cls, items: List[WebsiteBatchUpdateItem], user: User
+    ) -> List["Website"]:
+        """在事务内批量更新网址(网址与分类需由调用方预先校验)"""
+        changes: Dict[int, Dict[str, Any]] = {}
+        for item in items:
+            data = item.model_dump(exclude_unset=True, exclude={"id"})
+            for key in ("url", "back_url"):
+                if data.get(key) is not None:
+                    data[key] = str(data[key])  # AnyUrl -> str
+            if data.get("url") is not None:
+                data["url_hash"] = url_hash(data["url"])
+            changes[item.id] = data
+        fields_set = sorted({k for data in changes.values() for k in data})
+        async with in_transaction("default"):
+            records = await cls.filter(
+                id__in=list(changes), owner_id=user.id).order_by("id")
+            for record in records:
+                for k, v in changes[record.id].items():
+                    setattr(record, k, v)
+            if records and fields_set:
+                await cls.bulk_update(records, fields=fields_set)
+                await ChangeLog.record(cls, [r.id for r in records])
+        return records
+
+    @classmethod
+    async def move(
+        cls, ids: List[int], category_id: Optional[int], user: User
+    ) -> int:
+        """批量移动网址到指定分类(分类需由调用方预先校验)"""
+        async with in_transaction("default"):
+            websites = cls.filter(id__in=ids, owner_id=user.id)
+            moved = await websites.values_list("id", flat=True)
+            count = await websites.update(category_id=category_id)
+            await ChangeLog.record(cls, moved)
+        return count
+
+    @classmethod
+    async def reorder(
+        cls, ids: List[int], user: User
+    ) -> Union[List[int], int]:
+        """按给定顺序批量更新当前用户网址的排序"""
+        return await apply_sort_order(cls, ids, Q(owner_id=user.id))
+
+    @classmethod
+    async def unused_icons(cls, icons: List[Optional[str]]) -> List[str]:
+        """从给定图标中筛选出已无网址引用的图标"""
+        candidates = {i for i in icons if i and i != DEFAULT_ICON}
+        if not candidates:
+            return []
+        used = await cls.filter(icon__in=candidates).distinct().values_list(
+            "icon", flat=True)
+        return sorted(candidates - set(used))
+
     @classmethod
     async def list_websites(cls, q: str = "", cid: int = 0) -> List['Website']:
         """查询网址列表"""
@@ -167,3 +518,260 @@ class Website(Model):
         if cid:
             f &= Q(category_id=cid)
         return await cls.filter(f).order_by(*SORT_RULE)
+
+
+class LinkCheck(Model):
+    """网址可用性检测结果
+
+    单独成表，检测结果的写入不经过网址的变更日志，不会使列表快照失效。
+    """
+    id = fields.IntField(pk=True)
+    website: fields.OneToOneRelation[Website] = fields.OneToOneField(
+        "models.Website", related_name="link_check", on_delete=fields.CASCADE
+    )
+    ok = fields.BooleanField(default=True)
+    status_code = fields.IntField(null=True)
+    latency_ms = fields.IntField(null=True)
+    error = fields.CharField(max_length=255, null=True)
+    # 连续失败次数，偶发失败不视为失效
+    failures = fields.IntField(default=0)
+    # 备用链接可用性，未检测为空
+    back_ok = fields.BooleanField(null=True)
+    checked_at = fields.DatetimeField()
+
+    class Meta:
+        """检测结果元数据"""
+        table = "link_checks"
+        indexes = (("ok", "failures"),)
+
+    @classmethod
+    async def save_results(cls, results: List[Dict[str, Any]]) -> int:
+        """批量保存一批检测结果(按网址覆盖)，返回保存条数"""
+        ids = [r["website_id"] for r in results]
+        if not ids:
+            return 0
+        async with in_transaction("default") as conn:
+            previous = dict(await cls.filter(website_id__in=ids).using_db(
+                conn).values_list("website_id", "failures"))
+            # 检测期间被删除的网址不再保存
+            existing = set(await Website.filter(id__in=ids).using_db(
+                conn).values_list("id", flat=True))
+            await cls.filter(website_id__in=ids).using_db(conn).delete()
+            now = timezone.now()
+            rows = [
+                cls(website_id=r["website_id"], ok=r["ok"],
+                    status_code=r.get("status_code"),
+                    latency_ms=r.get("latency_ms"),
+                    error=(r.get("error") or "")[:255] or None,
+                    failures=0 if r["ok"]
+                    else previous.get(r["website_id"], 0) + 1,
+                    back_ok=r.get("back_ok"), checked_at=now)
+                for r in results if r["website_id"] in existing
+            ]
+            await cls.bulk_create(rows, batch_size=500, using_db=conn)
+        return len(rows)
+
+    @classmethod
+    async def statuses(cls, dead_only: bool = False,
+                       min_failures: int = 1) -> List[Dict[str, Any]]:
+        """检测结果列表；dead_only 时只返回连续失败达到次数的网址"""
+        query = cls.all()
+        if dead_only:
+            query = query.filter(ok=False, failures__gte=min_failures)
+        return await query.order_by("website_id").values(
+            "website_id", "ok", "status_code", "latency_ms", "error",
+            "failures", "back_ok", "checked_at")
+
+
+class WebsiteVisit(Model):
+    """网址访问统计
+
+    与检测结果一样单独成表，访问计数的写入不产生变更日志。
+    """
+    id = fields.IntField(pk=True)
+    website: fields.OneToOneRelation[Website] = fields.OneToOneField(
+        "models.Website", related_name="visit", on_delete=fields.CASCADE
+    )
+    count = fields.IntField(default=0)
+    last_visited_at = fields.DatetimeField(null=True)
+
+    class Meta:
+        """访问统计元数据"""
+        table = "website_visits"
+        indexes = (("count",), ("last_visited_at",))
+
+    @classmethod
+    async def add_counts(cls, counts: Dict[int, int], visited_at: Any) -> int:
+        """累加一批访问次数，返回写入的网址数
+
+        缺少的行先以 0 插入(已存在则忽略)，再按增量分组执行
+        count = count + n，多个 worker 同时写入也不会丢失计数。
+        同一批的最近访问时间统一记为 visited_at(批次内最后一次访问)。
+        """
+        async with in_transaction("default") as conn:
+            ids = set(await Website.filter(id__in=list(counts)).using_db(
+                conn).values_list("id", flat=True))
+            if not ids:
+                return 0
+            existing = set(await cls.filter(website_id__in=ids).using_db(
+                conn).values_list("website_id", flat=True))
+            await cls.bulk_create(
+                [cls(website_id=i, count=0) for i in ids - existing],
+                batch_size=500, ignore_conflicts=True, using_db=conn)
+            # 同一增量的网址合并为一条 UPDATE
+            groups: Dict[int, List[int]] = {}
+            for i in ids:
+                groups.setdefault(counts[i], []).append(i)
+            for delta, group in groups.items():
+                await cls.filter(website_id__in=group).using_db(conn).update(
+                    count=F("count") + delta, last_visited_at=visited_at)
+        return len(ids)
+
+    @classmethod
+    async def top(cls, order: str, limit: int) -> List[Tuple[int, int, Any]]:
+        """按访问次数或最近访问时间取前 limit 个 (网址id, 次数, 最近访问)"""
+        field = "-count" if order == "most" else "-last_visited_at"
+        return await cls.filter(count__gt=0).order_by(
+            field, "website_id").limit(limit).values_list(
+            "website_id", "count", "last_visited_at")
+
+
+class SchemaVersion(Model):
+    """已执行的数据库迁移版本"""
+    id = fields.IntField(pk=True)
+    version = fields.IntField(unique=True)
+    description = fields.CharField(max_length=255, default="")
+    applied_at = fields.DatetimeField(auto_now_add=True)
+
+    class Meta:
+        """迁移版本元数据"""
+        table = "schema_version"
+
+
+class ChangeLog(Model):
+    """网址与分类的变更日志，自增 id 即同步游标
+
+    同一对象只需保留最新一条记录，删除记录作为墓碑保留一段时间后清理；
+    清理后在 RESET 记录的 object_id 中记下被清理的最大游标，
+    早于该游标的客户端需重新全量加载。
+
+    游标要求 id 小于已见游标的记录都已提交。SQLite 写入本身串行；
+    Postgres 上并发事务可能不按 id 顺序提交，客户端在两次提交之间同步
+    会越过尚不可见的记录，因此写入变更前先获取事务级咨询锁，
+    持锁到提交，使 id 顺序与提交顺序一致。
+    """
+    UPSERT = "upsert"
+    DELETE = "delete"
+    RESET = "reset"
+    # Postgres 咨询锁的键，串行化变更记录的写入
+    ADVISORY_LOCK = 0x6368616e6765  # "change"
+
+    id = fields.BigIntField(pk=True)
+    model = fields.CharField(max_length=16)
+    object_id = fields.BigIntField()
+    action = fields.CharField(max_length=8)
+    created_at = fields.DatetimeField(auto_now_add=True)
+
+    class Meta:
+        """变更日志元数据"""
+        table = "change_log"
+        indexes = (("model", "object_id"),)
+
+    @staticmethod
+    def model_name(model: type) -> str:
+        """变更日志中的模型名"""
+        return model.__name__.lower()
+
+    @classmethod
+    async def record(
+        cls,
+        model: type,
+        ids: Iterable[int],
+        action: str = UPSERT,
+        using_db: Optional[BaseDBAsyncClient] = None,
+    ) -> None:
+        """记录一批对象的变更(在调用方事务内执行)"""
+        name = cls.model_name(model)
+        entries = [cls(model=name, object_id=i, action=action) for i in ids]
+        if not entries:
+            return
+        conn = using_db or connections.get("default")
+        if conn.capabilities.dialect != "postgres":
+            await cls.bulk_create(entries, using_db=conn)
+            return
+        if isinstance(conn, TransactionalDBClient):
+            # 在调用方事务内加锁后再分配 id
+            await cls.lock(conn)
+            await cls.bulk_create(entries, using_db=conn)
+            return
+        # 不在事务中时新开事务，加锁与写入在同一连接上
+        async with in_transaction("default") as tx:
+            await cls.lock(tx)
+            await cls.bulk_create(entries, using_db=tx)
+
+    @classmethod
+    async def lock(cls, conn: BaseDBAsyncClient) -> None:
+        """Postgres 上获取变更日志的事务级咨询锁，最外层事务结束时释放"""
+        if conn.capabilities.dialect == "postgres":
+            await conn.execute_query(
+                "SELECT pg_advisory_xact_lock($1)", [cls.ADVISORY_LOCK])
+
+    @classmethod
+    async def latest_cursor(cls) -> int:
+        """当前最新游标"""
+        last = await cls.all().order_by("-id").limit(1).values_list(
+            "id", flat=True)
+        return last[0] if last else 0
+
+    @classmethod
+    async def reset_cursor(cls) -> int:
+        """墓碑已清理到的游标，早于此游标无法增量同步"""
+        result = await cls.filter(model=cls.RESET).annotate(
+            horizon=Max("object_id")).values_list("horizon", flat=True)
+        return (result[0] if result else None) or 0
+
+    @classmethod
+    async def changes_since(
+        cls, cursor: int, limit: int
+    ) -> Tuple[List["ChangeLog"], bool]:
+        """按游标顺序返回变更，以及是否还有更多"""
+        rows = await cls.filter(
+            id__gt=cursor, model__not=cls.RESET
+        ).order_by("id").limit(limit + 1)
+        return rows[:limit], len(rows) > limit
+
+    @classmethod
+    async def compact(cls, tombstone_days: int) -> Dict[str, int]:
+        """合并同一对象的历史记录并清理过期墓碑"""
+        cutoff = timezone.now() - timedelta(days=tombstone_days)
+        table = cls._meta.db_table
+        async with in_transaction("default") as conn:
+            # RESET 记录也会推进最新游标，同样需要按提交顺序分配 id
+            await cls.lock(conn)
+            # 同一对象仅保留最新一条
+            superseded, _ = await conn.execute_query(
+                f"DELETE FROM {table} WHERE id NOT IN "
+                f"(SELECT MAX(id) FROM {table} GROUP BY model, object_id)")
+            expired = cls.filter(action=cls.DELETE, created_at__lt=cutoff)
+            horizon = await expired.annotate(
+                horizon=Max("id")).values_list("horizon", flat=True)
+            purged = 0
+            if horizon and horizon[0]:
+                purged = await expired.delete()
+                await cls.filter(model=cls.RESET).delete()
+                await cls.create(model=cls.RESET, object_id=horizon[0],
+                                 action=cls.RESET)
+        return {"superseded": superseded, "purged": purged}
+
+
+@post_save(Website, Category)
+async def record_saved(sender, instance, created, using_db, update_fields):
+    """单条保存时记录变更"""
+    await ChangeLog.record(sender, [instance.pk], using_db=using_db)
+
+
+@post_delete(Website, Category)
+async def record_deleted(sender, instance, using_db):
+    """单条删除时记录墓碑"""
+    await ChangeLog.record(
+        sender, [instance.pk], ChangeLog.DELETE, using_db=using_db)
@@ -0,0 +1,155 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-11-23 15:02:47
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-11-23 15:02:47
+ # @ Description: 带连接池统计的 asyncpg 客户端
+
+ 通过 Tortoise 的 engine 配置加载("engine": "app.db.pool")，
+ 在 asyncpg 连接池外包一层，统计借出连接数、排队数与获取连接的等待时间，
+ 用于按 gunicorn workers 数量调整连接池大小。
+ '''
+
+__all__ = ["PoolStats", "MeteredAsyncpgClient", "client_class", "pool_stats"]
+
+import time
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+from tortoise import connections
+from tortoise.backends.asyncpg import AsyncpgDBClient
+
+
+class PoolStats:
+    """连接池统计"""
+
+    def __init__(self, window: int = 1024):
+        self.acquired = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.max_in_use = 0
+        self.max_waiting = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        # 最近若干次获取连接的等待时间，用于计算分位数
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def on_wait(self) -> None:
+        """开始等待连接"""
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+
+    def on_acquired(self, elapsed: float) -> None:
+        """成功获取连接"""
+        self.waiting -= 1
+        self.acquired += 1
+        self.in_use += 1
+        self.max_in_use = max(self.max_in_use, self.in_use)
+        self.wait_total += elapsed
+        self.wait_max = max(self.wait_max, elapsed)
+        self.recent.append(elapsed)
+
+    def on_failed(self, timeout: bool) -> None:
+        """获取连接失败"""
+        self.waiting -= 1
+        if timeout:
+            self.timeouts += 1
+
+    def on_release(self) -> None:
+        """归还连接"""
+        self.in_use = max(0, self.in_use - 1)
+
+    def percentile(self, p: float) -> float:
+        """最近等待时间的百分位(毫秒)"""
+        if not self.recent:
+            return 0.0
+        values = sorted(self.recent)
+        index = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+        return round(values[index] * 1000, 3)
+
+    def snapshot(self, pool: Any = None) -> Dict:
+        """导出统计数据"""
+        data = {
+            "acquired": self.acquired,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "max_in_use": self.max_in_use,
+            "max_waiting": self.max_waiting,
+            "timeouts": self.timeouts,
+            "acquire_avg_ms": round(
+                self.wait_total / self.acquired * 1000, 3
+            ) if self.acquired else 0.0,
+            "acquire_p50_ms": self.percentile(50),
+            "acquire_p95_ms": self.percentile(95),
+            "acquire_p99_ms": self.percentile(99),
+            "acquire_max_ms": round(self.wait_max * 1000, 3),
+        }
+        if pool is not None:
+            data.update({
+                "size": pool.get_size(),
+                "idle": pool.get_idle_size(),
+                "min_size": pool.get_min_size(),
+                "max_size": pool.get_max_size(),
+            })
+        return data
+
+
+class _MeteredPool:
+    """asyncpg 连接池代理，仅拦截 acquire/release"""
+
+    def __init__(self, pool, stats: PoolStats):
+        self._pool = pool
+        self._stats = stats
+
+    async def acquire(self, *, timeout: Optional[float] = None):
+        """获取连接并记录等待时间"""
+        self._stats.on_wait()
+        start = time.perf_counter()
+        try:
+            connection = await self._pool.acquire(timeout=timeout)
+        except asyncio.TimeoutError:
+            self._stats.on_failed(timeout=True)
+            raise
+        except BaseException:
+            self._stats.on_failed(timeout=False)
+            raise
+        self._stats.on_acquired(time.perf_counter() - start)
+        return connection
+
+    async def release(self, connection, *, timeout: Optional[float] = None):
+        """归还连接"""
+        try:
+            await self._pool.release(connection, timeout=timeout)
+        finally:
+            self._stats.on_release()
+
+    def __getattr__(self, name: str):
+        return getattr(self._pool, name)
+
+
+class MeteredAsyncpgClient(AsyncpgDBClient):
+    """带连接池统计的 asyncpg 客户端"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool_stats = PoolStats()
+
+    async def create_pool(self, **kwargs):
+        """创建连接池并包装"""
+        pool = await super().create_pool(**kwargs)
+        return _MeteredPool(pool, self.pool_stats)
+
+
+# Tortoise 按 engine 模块的 client_class 创建连接
+client_class = MeteredAsyncpgClient
+
+
+def pool_stats(connection_name: str = "default") -> Optional[Dict]:
+    """获取指定连接的连接池统计，非 PostgreSQL 连接返回 None"""
+    conn = connections.get(connection_name)
+    stats: Optional[PoolStats] = getattr(conn, "pool_stats", None)
+    if stats is None:
+        return None
+    pool = conn._pool._pool if conn._pool is not None else None
+    return stats.snapshot(pool)
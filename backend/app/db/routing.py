@@ -0,0 +1,118 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-11-24 09:41:15
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-11-24 09:41:15
+ # @ Description: 只读副本路由
+
+ 只有显式声明 use_replica 依赖的只读接口才会走副本，其余查询(包括事务内的读)
+ 仍使用主库。用户写入后的一小段时间内，其读请求也留在主库，避免读到复制延迟前的旧数据。
+ '''
+
+__all__ = [
+    "REPLICA_CONNECTION",
+    "STICKY_COOKIE",
+    "ReplicaRouter",
+    "WriteTracker",
+    "write_tracker",
+    "request_key",
+    "use_replica",
+    "replica_active",
+]
+
+import time
+from contextvars import ContextVar
+from typing import AsyncGenerator, Dict, Optional
+from fastapi import Request
+from app.config import db_settings
+from app.security import decode_token
+
+
+REPLICA_CONNECTION = "replica"
+# 跨 worker 传递写入时间，保证多进程下读己之写
+STICKY_COOKIE = "db_primary_until"
+
+_use_replica: ContextVar[bool] = ContextVar("use_replica", default=False)
+
+
+def replica_active() -> bool:
+    """当前上下文是否读取副本"""
+    return _use_replica.get()
+
+
+class ReplicaRouter:
+    """Tortoise 连接路由：标记为只读的请求从副本读取"""
+
+    def db_for_read(self, model) -> Optional[str]:
+        """读操作"""
+        return REPLICA_CONNECTION if _use_replica.get() else None
+
+    def db_for_write(self, model) -> Optional[str]:
+        """写操作始终使用主库"""
+        return None
+
+
+class WriteTracker:
+    """记录每个用户最近一次写入时间(进程内)"""
+
+    def __init__(self, window: float, max_entries: int = 10000):
+        self.window = window
+        self.max_entries = max_entries
+        self._last_write: Dict[str, float] = {}
+
+    def mark(self, key: str) -> float:
+        """记录写入，返回主库粘滞截止时间(unix 时间戳)"""
+        now = time.time()
+        if len(self._last_write) >= self.max_entries:
+            self._prune(now)
+        self._last_write[key] = now
+        return now + self.window
+
+    def is_sticky(self, key: str) -> bool:
+        """是否仍处于写后粘滞窗口内"""
+        last = self._last_write.get(key)
+        return last is not None and time.time() - last < self.window
+
+    def _prune(self, now: float) -> None:
+        """清理已过期的记录"""
+        self._last_write = {
+            k: t for k, t in self._last_write.items()
+            if now - t < self.window
+        }
+
+
+write_tracker = WriteTracker(window=db_settings.replica_sticky_seconds)
+
+
+def request_key(request: Request) -> Optional[str]:
+    """按令牌中的用户名区分用户，未登录时使用客户端地址"""
+    auth_header = request.headers.get("Authorization", "")
+    if auth_header.startswith("Bearer "):
+        payload = decode_token(auth_header.split(" ", 1)[1])
+        if payload and payload.get("sub"):
+            return f"user:{payload['sub']}"
+    return f"ip:{request.client.host}" if request.client else None
+
+
+def _cookie_sticky(request: Request) -> bool:
+    """读取跨 worker 的粘滞标记"""
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+async def use_replica(request: Request) -> AsyncGenerator[None, None]:
+    """只读接口依赖：未配置副本或处于写后粘滞窗口时仍读主库"""
+    if not db_settings.replica_enabled:
+        yield
+        return
+    key = request_key(request)
+    if _cookie_sticky(request) or (key and write_tracker.is_sticky(key)):
+        yield
+        return
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
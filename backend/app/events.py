@@ -0,0 +1,222 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-11-25 09:12:44
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-11-25 09:12:44
+ # @ Description: 进程内事件发布/订阅(SSE 推送)
+
+ 每个订阅者一个有界队列，消费过慢导致队列满时清空并改发 resync，
+ 客户端收到后通过 /api/sync 增量拉取即可，不会丢失数据。
+ 多 worker 部署时配置 EVENTS_FANOUT_DIR，各 worker 在该目录下绑定
+ unix datagram socket，发布时转发给其余 worker。
+ '''
+
+__all__ = [
+    "Subscriber",
+    "EventBroker",
+    "UnixFanout",
+    "broker",
+    "publish_change",
+    "format_sse",
+]
+
+import os
+import json
+import signal
+import socket
+import asyncio
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set
+from app.config import events_config
+from app.logging import setup_logging, INFO
+
+
+logger = setup_logging(logger_name=__name__, level=INFO, backup_count=1)
+
+RESYNC = {"event": "resync", "data": {}}
+# 关闭时通知订阅流结束
+CLOSE = {"event": "close", "data": {}}
+
+
+def format_sse(event: Dict) -> str:
+    """格式化为 SSE 消息"""
+    data = json.dumps(event.get("data", {}), ensure_ascii=False,
+                      separators=(",", ":"))
+    return f"event: {event['event']}\ndata: {data}\n\n"
+
+
+class Subscriber:
+    """单个 SSE 连接的事件队列"""
+
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def put(self, event: Dict) -> None:
+        """非阻塞投递，队列满时丢弃积压并要求客户端重新同步"""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(CLOSE if event is CLOSE else RESYNC)
+
+    async def get(self, timeout: float) -> Optional[Dict]:
+        """等待下一个事件，超时返回 None"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class UnixFanout:
+    """通过 unix datagram socket 在同机 worker 之间转发事件"""
+
+    def __init__(self, directory: str, on_message):
+        self.directory = Path(directory)
+        self.path = self.directory / f"{os.getpid()}.sock"
+        self.on_message = on_message
+        self._sock: Optional[socket.socket] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self) -> None:
+        """绑定本 worker 的 socket 并开始接收"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path.unlink(missing_ok=True)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(str(self.path))
+        sock.setblocking(False)
+        self._sock = sock
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(sock.fileno(), self._on_readable)
+
+    def _on_readable(self) -> None:
+        """读取其他 worker 转发的事件"""
+        while self._sock is not None:
+            try:
+                data = self._sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                return
+            try:
+                self.on_message(json.loads(data))
+            except ValueError:
+                logger.warning("Invalid fan-out message dropped")
+
+    def send(self, event: Dict) -> None:
+        """转发给其余 worker，失效的 socket 文件直接清理"""
+        if self._sock is None:
+            return
+        data = json.dumps(event, separators=(",", ":")).encode()
+        for peer in self.directory.glob("*.sock"):
+            if peer == self.path:
+                continue
+            try:
+                self._sock.sendto(data, str(peer))
+            except (ConnectionRefusedError, FileNotFoundError):
+                peer.unlink(missing_ok=True)
+            except BlockingIOError:
+                # 对端接收缓冲区已满，由其客户端的 resync 兜底
+                logger.warning("Fan-out peer %s is busy, event dropped",
+                               peer.name)
+
+    def stop(self) -> None:
+        """停止接收并删除 socket 文件"""
+        if self._sock is None:
+            return
+        if self._loop is not None:
+            self._loop.remove_reader(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+        self.path.unlink(missing_ok=True)
+
+
+class EventBroker:
+    """进程内事件代理"""
+
+    def __init__(self, queue_size: int, max_clients: int):
+        self.queue_size = queue_size
+        self.max_clients = max_clients
+        self._subscribers: Set[Subscriber] = set()
+        self._fanout: Optional[UnixFanout] = None
+
+    @property
+    def client_count(self) -> int:
+        """当前订阅数"""
+        return len(self._subscribers)
+
+    def subscribe(self) -> Optional[Subscriber]:
+        """新增订阅，超过上限时返回 None"""
+        if len(self._subscribers) >= self.max_clients:
+            return None
+        subscriber = Subscriber(self.queue_size)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        """取消订阅"""
+        self._subscribers.discard(subscriber)
+
+    def _deliver(self, event: Dict) -> None:
+        """投递给本进程的订阅者"""
+        for subscriber in list(self._subscribers):
+            subscriber.put(event)
+
+    def publish(self, event: str, data: Dict) -> None:
+        """发布事件(本进程及其余 worker)"""
+        message = {"event": event, "data": data}
+        self._deliver(message)
+        if self._fanout is not None:
+            self._fanout.send(message)
+
+    def start(self, fanout_dir: Optional[str] = None) -> None:
+        """启动跨 worker 转发(可选)并在收到退出信号时结束订阅流"""
+        if fanout_dir:
+            self._fanout = UnixFanout(fanout_dir, self._deliver)
+            self._fanout.start()
+        self._chain_exit_signals(asyncio.get_running_loop())
+
+    def _chain_exit_signals(self, loop: asyncio.AbstractEventLoop) -> None:
+        """uvicorn 要等所有连接结束才执行 lifespan 关闭，
+        SSE 长连接需要在收到信号时先行结束，否则无法退出"""
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            previous = signal.getsignal(sig)
+            if not callable(previous):
+                continue
+
+            def handler(signum, frame, previous=previous):
+                loop.call_soon_threadsafe(self.close_streams)
+                previous(signum, frame)
+            try:
+                signal.signal(sig, handler)
+            except ValueError:
+                # 非主线程(如测试客户端)无法设置信号处理
+                return
+
+    def close_streams(self) -> None:
+        """结束所有订阅流"""
+        for subscriber in list(self._subscribers):
+            subscriber.put(CLOSE)
+
+    def stop(self) -> None:
+        """结束所有订阅流并停止转发"""
+        self.close_streams()
+        if self._fanout is not None:
+            self._fanout.stop()
+            self._fanout = None
+
+
+broker = EventBroker(
+    queue_size=events_config.queue_size,
+    max_clients=events_config.max_clients,
+)
+
+
+def publish_change(
+    model: str, ids: Iterable[int], action: str = "upsert"
+) -> None:
+    """发布数据变更通知，客户端收到后调用 /api/sync 拉取"""
+    ids = list(ids)
+    if ids and events_config.enabled:
+        broker.publish("change", {"model": model, "action": action,
+                                  "ids": ids})
@@ -0,0 +1,50 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-12-04 11:30:18
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-12-04 11:30:18
+ # @ Description: 延迟导入
+
+ httpx、aiofiles、jose.jwt、passlib 等模块导入较慢，且启动阶段用不到。
+ lazy_import 返回的模块对象在第一次访问属性时才真正执行导入，
+ 启动时只查找模块位置，不执行模块代码。
+ 使用处的类型注解需配合 from __future__ import annotations，避免定义函数时就触发导入。
+ gunicorn 预加载(preload_app)时由主进程调用 load_all 提前导入，
+ fork 出的 worker 以写时复制方式共享这些模块。
+ '''
+
+__all__ = ["lazy_import", "load_all"]
+
+import sys
+import importlib.util
+from types import ModuleType
+from typing import List
+
+# 通过 lazy_import 登记的模块名
+_registered: List[str] = []
+
+
+def lazy_import(name: str) -> ModuleType:
+    """导入模块，模块代码推迟到第一次访问属性时执行"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    _registered.append(name)
+    return module
+
+
+def load_all() -> None:
+    """立即执行所有延迟导入的模块"""
+    for name in _registered:
+        module = sys.modules.get(name)
+        if module is not None:
+            # 访问任意属性即触发真正的导入
+            getattr(module, "__dict__")
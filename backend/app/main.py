@@ -9,33 +9,101 @@
 from typing import AsyncGenerator, Dict
 from contextlib import asynccontextmanager
 import importlib
-from concurrent.futures import ThreadPoolExecutor
 import asyncio
 from fastapi import FastAPI, APIRouter
-from app.middleware import AuthMiddleware, RateLimitMiddleware
-from app.config import db_settings, rate_limit_config
+from app.middleware import (
+    AuthMiddleware,
+    RateLimitMiddleware,
+    QueryProfilerMiddleware,
+    install_query_profiler,
+    ReadAfterWriteMiddleware,
+    CompressionMiddleware,
+)
+from app.config import (
+    db_settings, rate_limit_config, profiler_config, backup_config,
+    events_config, compression_config, searxng_config, link_check_config,
+    visit_config, system_settings)
 from app.db.init import close_db, init_db
-from app.tasks.db_backup import safe_backup
+from app.tasks.db_backup import backup_service
+from app.tasks.changes import compact_change_log
+from app.tasks.links import link_checker, run_link_checker
+from app.tasks.visits import run_visit_flusher, stop_visit_flusher
+from app.tasks.locks import acquire_task_lock, release_task_locks
+from app.events import broker
+from app.responses import FastJSONResponse
+from app.searxng import searxng
 
 endpoints_module = importlib.import_module("app.routers")
-executor = ThreadPoolExecutor(max_workers=2)
 
 
 # 定义 lifespan
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """生命周期"""
-    # 初始化数据库连接（根据配置自动选择 PostgreSQL 或 SQLite）
-    if db_settings.db_type == "sqlite":
-        loop = asyncio.get_event_loop()
-        loop.run_in_executor(executor, safe_backup)
-    await init_db(config=db_settings.db_config)
-    yield
+    # 多 worker 时定时任务只由拿到任务锁的 worker 运行
+    backup_enabled = (db_settings.db_type == "sqlite"
+                      and backup_config.enabled
+                      and acquire_task_lock("backup"))
+    if backup_enabled:
+        # 定时备份在独立线程中循环运行，关闭时通知退出
+        backup_service.start()
+    compaction = None
+    link_check = None
+    visits = None
+    try:
+        # 初始化数据库连接（根据配置自动选择 PostgreSQL 或 SQLite）
+        await init_db(config=db_settings.db_config)
+        if profiler_config.enabled:
+            install_query_profiler()
+        # 定期压缩增量同步的变更日志
+        if acquire_task_lock("compaction"):
+            compaction = asyncio.create_task(compact_change_log())
+        if events_config.enabled:
+            fanout_dir = events_config.fanout_dir
+            if fanout_dir is None and system_settings.multi_worker:
+                fanout_dir = str(system_settings.runtime_path("events"))
+            broker.start(fanout_dir=fanout_dir)
+        # 后台探测 SearXNG 健康状态，页面加载时无需等待实时检查
+        searxng.start(searxng_config.health_interval)
+        # 定期检测网址可用性
+        if link_check_config.enabled and acquire_task_lock("link_check"):
+            link_check = asyncio.create_task(run_link_checker())
+        # 访问计数定期批量写入
+        if visit_config.enabled:
+            visits = asyncio.create_task(run_visit_flusher())
+        yield
+    finally:
+        # 结束 SSE 连接，避免阻塞关闭
+        broker.stop()
+        if compaction is not None:
+            compaction.cancel()
+        if link_check is not None:
+            link_check.cancel()
+        link_checker.stop()
+        if visits is not None:
+            # 写入尚未保存的访问计数
+            await stop_visit_flusher(visits)
+        # 启动失败时也要通知备份线程退出，否则进程无法结束
+        if backup_enabled:
+            backup_service.stop()
+    # 关闭 SearXNG 连接池
+    await searxng.close()
     # 关闭数据库连接
     await close_db()
+    release_task_locks()
     # 清理资源
 
-app = FastAPI(lifespan=lifespan, title="MyNavi API", version="0.1.0")
+app = FastAPI(lifespan=lifespan, title="MyNavi API", version="0.1.0",
+              default_response_class=FastJSONResponse)
+
+# 响应压缩放在最内层，外层 BaseHTTPMiddleware 会把响应体拆成流式分块
+if compression_config.enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=compression_config.minimum_size,
+        gzip_level=compression_config.gzip_level,
+        brotli_quality=compression_config.brotli_quality,
+    )
 
 # 添加限流中间件（如果启用）
 if rate_limit_config.enabled:
@@ -48,10 +116,25 @@ if rate_limit_config.enabled:
         upload_limit=rate_limit_config.upload_limit,
         upload_window=rate_limit_config.upload_window,
         whitelist_ips=rate_limit_config.get_whitelist_ips(),
-        enable_cleanup=rate_limit_config.enable_cleanup
+        enable_cleanup=rate_limit_config.enable_cleanup,
+        storage_path=rate_limit_config.get_storage_path(),
     )
 
 app.add_middleware(AuthMiddleware)
+
+# 启用只读副本时，记录写请求以保证读己之写
+if db_settings.replica_enabled:
+    app.add_middleware(ReadAfterWriteMiddleware)
+
+# 添加SQL性能分析中间件（开发用，默认关闭）
+if profiler_config.enabled:
+    app.add_middleware(
+        QueryProfilerMiddleware,
+        slow_request_ms=profiler_config.slow_request_ms,
+        repeat_threshold=profiler_config.repeat_threshold,
+        server_timing=profiler_config.server_timing,
+    )
+
 # 获取 __all__ 列表中的所有路由实例
 for router_name in endpoints_module.__all__:
     try:
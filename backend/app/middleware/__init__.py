@@ -2,12 +2,21 @@
 中间件模块
 """
 
-from .rate_limit import RateLimitMiddleware, RateLimiter, AdvancedRateLimiter
+from .rate_limit import (
+    RateLimitMiddleware, RateLimiter, SQLiteRateLimiter, AdvancedRateLimiter)
 from .auth import AuthMiddleware
+from .profiler import QueryProfilerMiddleware, install_query_profiler
+from .replica import ReadAfterWriteMiddleware
+from .compression import CompressionMiddleware
 
 __all__ = [
     "RateLimitMiddleware",
     "RateLimiter",
+    "SQLiteRateLimiter",
     "AdvancedRateLimiter",
     "AuthMiddleware",
+    "QueryProfilerMiddleware",
+    "install_query_profiler",
+    "ReadAfterWriteMiddleware",
+    "CompressionMiddleware",
 ]
@@ -0,0 +1,216 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-11-26 10:03:27
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-11-26 10:03:27
+ # @ Description: 响应压缩中间件
+
+ 按 Accept-Encoding 协商 br(已安装 brotli 时)或 gzip。
+ 小于阈值的响应、图片/图标等已压缩格式、SSE 流以及已带 Content-Encoding
+ 的响应(如预压缩的快照)原样返回。
+ '''
+
+__all__ = [
+    "CompressionMiddleware",
+    "negotiate_encoding",
+    "compress_bytes",
+    "brotli_available",
+]
+
+import gzip
+import zlib
+from typing import Iterable, Optional, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # 未安装时只提供 gzip
+    brotli = None
+
+
+# 本身已压缩或不应缓冲的内容类型
+SKIP_CONTENT_TYPES = (
+    "image/",
+    "font/",
+    "audio/",
+    "video/",
+    "text/event-stream",
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/octet-stream",
+)
+
+
+def brotli_available() -> bool:
+    """是否支持 br 编码"""
+    return brotli is not None
+
+
+def _parse_accept_encoding(value: str) -> dict:
+    """解析 Accept-Encoding，返回 {编码: q值}"""
+    weights = {}
+    for item in value.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, val = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(val)
+                except ValueError:
+                    q = 0.0
+        weights[name.strip()] = q
+    return weights
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """选择响应编码，优先 br，客户端都不接受时返回 None"""
+    weights = _parse_accept_encoding(accept_encoding)
+    wildcard = weights.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_q = None, 0.0
+    for name in candidates:
+        q = weights.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def compress_bytes(data: bytes, encoding: str, level: int) -> bytes:
+    """一次性压缩，level 对 gzip 为压缩级别，对 br 为 quality"""
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+class _StreamCompressor:
+    """流式压缩，每个分块都刷新输出以免客户端等待"""
+
+    def __init__(self, encoding: str, level: int):
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=level)
+            self._gz = None
+        else:
+            self._br = None
+            self._gz = zlib.compressobj(
+                level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def process(self, data: bytes) -> bytes:
+        """压缩一个分块"""
+        if self._br is not None:
+            return self._br.process(data) + self._br.flush()
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        """结束压缩流"""
+        if self._br is not None:
+            return self._br.finish()
+        return self._gz.flush()
+
+
+def _compressible(headers: Headers) -> bool:
+    """响应是否需要压缩"""
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "").lower()
+    return not content_type.startswith(SKIP_CONTENT_TYPES)
+
+
+class CompressionMiddleware:
+    """响应压缩中间件(纯 ASGI 实现，不影响流式响应)"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        exclude_paths: Iterable[str] = ("/api/icons",),
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": gzip_level, "br": brotli_quality}
+        self.exclude_paths: Tuple[str, ...] = tuple(exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"].startswith(
+                self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(
+            Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(
+            send, encoding, self.levels[encoding], self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """包装 send，在第一个响应体分块到达时决定是否压缩"""
+
+    def __init__(self, send: Send, encoding: str, level: int,
+                 minimum_size: int):
+        self._send = send
+        self.encoding = encoding
+        self.level = level
+        self.minimum_size = minimum_size
+        self._start: Optional[Message] = None
+        self._compressor: Optional[_StreamCompressor] = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # 等到响应体才能判断大小，先暂存
+            self._start = message
+            return
+        if self._compressor is not None:
+            if message["type"] == "http.response.body":
+                body = self._compressor.process(message.get("body", b""))
+                more_body = message.get("more_body", False)
+                if not more_body:
+                    body += self._compressor.finish()
+                message = {"type": "http.response.body", "body": body,
+                           "more_body": more_body}
+            await self._send(message)
+            return
+        if self._passthrough or self._start is None:
+            await self._send(message)
+            return
+        await self._first_body(message)
+
+    async def _first_body(self, message: Message) -> None:
+        """处理第一个响应体分块"""
+        start, self._start = self._start, None
+        headers = MutableHeaders(raw=start["headers"])
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if (message["type"] != "http.response.body"
+                or not _compressible(headers)
+                or (not more_body and len(body) < self.minimum_size)):
+            self._passthrough = True
+            await self._send(start)
+            await self._send(message)
+            return
+
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if not more_body:
+            body = compress_bytes(body, self.encoding, self.level)
+            headers["Content-Length"] = str(len(body))
+            await self._send(start)
+            await self._send({"type": "http.response.body", "body": body})
+            return
+
+        # 流式响应：长度未知，逐块压缩
+        del headers["Content-Length"]
+        self._compressor = _StreamCompressor(self.encoding, self.level)
+        await self._send(start)
+        await self._send({"type": "http.response.body",
+                          "body": self._compressor.process(body),
+                          "more_body": True})
@@ -0,0 +1,187 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-11-20 10:12:31
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-11-20 10:12:31
+ # @ Description: 按请求统计SQL执行次数与耗时(开发用)
+ '''
+
+__all__ = [
+    "QueryProfilerMiddleware",
+    "RequestProfile",
+    "install_query_profiler",
+    "current_profile",
+]
+
+import re
+import time
+import functools
+from contextvars import ContextVar
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+from tortoise import connections
+from tortoise.backends.base.client import BaseDBAsyncClient
+from app.logging import setup_logging, INFO
+
+
+logger = setup_logging(logger_name=__name__, level=INFO, backup_count=1)
+
+# 需要统计的执行器方法
+EXECUTE_METHODS = (
+    "execute_insert",
+    "execute_query",
+    "execute_query_dict",
+    "execute_many",
+    "execute_script",
+)
+_PATCHED_FLAG = "__query_profiler__"
+
+# 语句形态归一化：字符串/数字字面量及 IN 列表
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM_RE = re.compile(r"\$\d+")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def statement_shape(query: str) -> str:
+    """将SQL归一化为语句形态，用于识别重复执行的相同查询"""
+    shape = _STRING_RE.sub("?", query)
+    shape = _PARAM_RE.sub("?", shape)
+    shape = _NUMBER_RE.sub("?", shape)
+    shape = _IN_LIST_RE.sub("(?)", shape)
+    return _SPACE_RE.sub(" ", shape).strip()
+
+
+@dataclass
+class RequestProfile:
+    """单个请求的SQL统计"""
+    count: int = 0
+    duration: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+
+    def record(self, query: str, elapsed: float) -> None:
+        """记录一次SQL执行"""
+        self.count += 1
+        self.duration += elapsed
+        self.shapes[statement_shape(query)] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """返回重复次数达到阈值的语句形态(疑似 N+1)"""
+        return [(shape, n) for shape, n in self.shapes.most_common()
+                if n >= threshold]
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar(
+    "query_profile", default=None)
+# 防止执行器方法互相调用时重复计数
+_in_query: ContextVar[bool] = ContextVar("in_query", default=False)
+
+
+def current_profile() -> Optional[RequestProfile]:
+    """获取当前请求的SQL统计"""
+    return _current_profile.get()
+
+
+def _wrap(method):
+    """包装执行器方法，记录SQL与耗时"""
+    @functools.wraps(method)
+    async def wrapper(self, query, *args, **kwargs):
+        profile = _current_profile.get()
+        if profile is None or _in_query.get():
+            return await method(self, query, *args, **kwargs)
+        token = _in_query.set(True)
+        start = time.perf_counter()
+        try:
+            return await method(self, query, *args, **kwargs)
+        finally:
+            profile.record(str(query), time.perf_counter() - start)
+            _in_query.reset(token)
+    setattr(wrapper, _PATCHED_FLAG, True)
+    return wrapper
+
+
+def _patch_class(cls: type) -> None:
+    """为客户端类及其子类上定义的执行器方法打补丁"""
+    for name in EXECUTE_METHODS:
+        method = cls.__dict__.get(name)
+        if method is None or getattr(method, _PATCHED_FLAG, False):
+            continue
+        setattr(cls, name, _wrap(method))
+    for sub in cls.__subclasses__():
+        _patch_class(sub)
+
+
+def install_query_profiler() -> None:
+    """挂载到当前 Tortoise 连接使用的执行器(需在 init_db 之后调用)"""
+    for conn in connections.all():
+        cls = type(conn)
+        # 从继承链上最接近 BaseDBAsyncClient 的具体类开始打补丁，覆盖事务包装类
+        for base in reversed(cls.__mro__):
+            if (isinstance(base, type) and base is not BaseDBAsyncClient
+                    and issubclass(base, BaseDBAsyncClient)
+                    and any(m in base.__dict__ for m in EXECUTE_METHODS)):
+                _patch_class(base)
+                break
+    logger.info("Query profiler installed")
+
+
+class QueryProfilerMiddleware(BaseHTTPMiddleware):
+    """SQL 性能分析中间件"""
+
+    def __init__(
+        self,
+        app,
+        slow_request_ms: int = 500,
+        repeat_threshold: int = 5,
+        server_timing: bool = True,
+    ):
+        super().__init__(app)
+        self.slow_request_ms = slow_request_ms
+        self.repeat_threshold = repeat_threshold
+        self.server_timing = server_timing
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        """处理请求"""
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            _current_profile.reset(token)
+        total_ms = (time.perf_counter() - start) * 1000
+        db_ms = profile.duration * 1000
+
+        if self.server_timing:
+            response.headers["Server-Timing"] = ", ".join([
+                f'db;dur={db_ms:.2f};desc="{profile.count} queries"',
+                f"app;dur={total_ms:.2f}",
+            ])
+            response.headers["X-DB-Query-Count"] = str(profile.count)
+
+        repeated = profile.repeated(self.repeat_threshold)
+        if repeated or total_ms >= self.slow_request_ms:
+            self._log_summary(request, profile, total_ms, repeated)
+        return response
+
+    def _log_summary(
+        self,
+        request: Request,
+        profile: RequestProfile,
+        total_ms: float,
+        repeated: List[Tuple[str, int]],
+    ) -> None:
+        """记录慢请求与疑似 N+1 的汇总"""
+        logger.warning(
+            "%s %s: %.1fms total, %d queries, %.1fms in db",
+            request.method, request.url.path, total_ms,
+            profile.count, profile.duration * 1000
+        )
+        for shape, n in repeated:
+            logger.warning("Possible N+1 (%dx): %s", n, shape[:300])
+
@@ -1,15 +1,20 @@
 """
 API限流中间件
 用于防止DDoS攻击和API滥用
+
+单进程时限流记录保存在内存中；多 worker 部署时改用 SQLiteRateLimiter，
+同机各 worker 共用一个 SQLite 文件，限额对整个服务生效而不是每个 worker 各算一份。
 """
 
+import os
 import time
 import asyncio
+import sqlite3
 from typing import Dict, Optional, Tuple
 from collections import defaultdict, deque
-from fastapi import Request, HTTPException, status
+from fastapi import Request, status
 from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
+from starlette.responses import JSONResponse, Response
 from app.logging import setup_logging, INFO
 
 
@@ -86,6 +91,101 @@ class RateLimiter:
                 await asyncio.sleep(60)
 
 
+class SQLiteRateLimiter:
+    """同机多进程共享的限流器
+
+    按 (键, 固定窗口) 计数，用上一窗口的计数按剩余时间比例加权，近似滑动窗口，
+    每次检查在一个短事务内读写一行。数据库放在内存文件系统(/dev/shm)上时
+    单次检查只需几十微秒，直接在事件循环中执行；等锁时间(busy_timeout_ms)
+    只有几毫秒，避免阻塞同一 worker 的其他请求，数据库繁忙或出错时放行请求。
+    """
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self.cleanup_task = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """打开数据库，fork 出的子进程不复用父进程的连接"""
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(
+                self.path, isolation_level=None, check_same_thread=False)
+            try:
+                conn.execute(f"PRAGMA busy_timeout = {self.busy_timeout_ms}")
+                conn.execute("PRAGMA journal_mode = WAL")
+                # 限流状态丢失无害，不需要落盘
+                conn.execute("PRAGMA synchronous = OFF")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS rate_limits ("
+                    "key TEXT NOT NULL, window_start INTEGER NOT NULL, "
+                    "count INTEGER NOT NULL, expires REAL NOT NULL, "
+                    "PRIMARY KEY (key, window_start)) WITHOUT ROWID")
+            except sqlite3.Error:
+                # 初始化失败时下次重新连接
+                conn.close()
+                raise
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def check(
+        self, key: str, limit: int, window: int
+    ) -> Tuple[bool, Optional[int]]:
+        """检查并记录一次请求，返回 (是否允许, 剩余重试时间)"""
+        now = time.time()
+        start = int(now // window) * window
+        conn = None
+        try:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            counts = dict(conn.execute(
+                "SELECT window_start, count FROM rate_limits "
+                "WHERE key = ? AND window_start IN (?, ?)",
+                (key, start, start - window)))
+            previous = counts.get(start - window, 0)
+            current = counts.get(start, 0)
+            elapsed = now - start
+            if previous * (1 - elapsed / window) + current >= limit:
+                conn.execute("COMMIT")
+                if current >= limit or not previous:
+                    wait = window - elapsed
+                else:
+                    # 上一窗口的权重降到剩余额度以内所需的时间
+                    wait = window * (1 - (limit - current) / previous) - elapsed
+                return False, int(max(wait, 0)) + 1
+            conn.execute(
+                "INSERT INTO rate_limits VALUES (?, ?, 1, ?) "
+                "ON CONFLICT (key, window_start) DO UPDATE "
+                "SET count = count + 1",
+                (key, start, start + 2 * window))
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn is not None and conn.in_transaction:
+                conn.execute("ROLLBACK")
+            logger.warning("Shared rate limiter unavailable: %s", e)
+        return True, None
+
+    async def is_allowed(
+        self,
+        key: str,
+        limit: int,
+        window: int
+    ) -> Tuple[bool, Optional[int]]:
+        """检查是否允许请求(接口与 RateLimiter 相同)"""
+        return self.check(key, limit, window)
+
+    async def cleanup(self):
+        """定期删除过期的窗口计数"""
+        while True:
+            try:
+                self._connect().execute(
+                    "DELETE FROM rate_limits WHERE expires < ?", (time.time(),))
+            except sqlite3.Error as e:
+                logger.error("Rate limiter cleanup error: %s", e)
+            await asyncio.sleep(300)
+
+
 class RateLimitMiddleware(BaseHTTPMiddleware):
     """API限流中间件"""
 
@@ -103,10 +203,13 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         # 白名单IP（不限流）
         whitelist_ips: Optional[list] = None,
         # 启用清理任务
-        enable_cleanup: bool = True
+        enable_cleanup: bool = True,
+        # 共享限流数据库路径，为空时只在本进程内限流
+        storage_path: Optional[str] = None
     ):
         super().__init__(app)
-        self.rate_limiter = RateLimiter()
+        self.rate_limiter = (SQLiteRateLimiter(storage_path) if storage_path
+                             else RateLimiter())
         self.default_limit = default_limit
         self.default_window = default_window
         self.login_limit = login_limit
@@ -155,14 +258,16 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
                 client_ip, path, rate_limit_type, retry_after
             )
 
-            raise HTTPException(
+            # 中间件中抛出 HTTPException 不会被异常处理器转换(会变成 500)，
+            # 直接返回与之相同格式的响应
+            return JSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail={
+                content={"detail": {
                     "error": "请求过于频繁，请稍后再试",
                     "retry_after": retry_after,
                     "limit": limit,
                     "window": window
-                },
+                }},
                 headers={
                     "Retry-After": str(retry_after),
                     "X-RateLimit-Limit": str(limit),
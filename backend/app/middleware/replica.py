@@ -0,0 +1,36 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-11-24 10:06:52
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-11-24 10:06:52
+ # @ Description: 写后读主库中间件
+ '''
+
+__all__ = ["ReadAfterWriteMiddleware"]
+
+from fastapi import Request
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response
+from app.db.routing import STICKY_COOKIE, request_key, write_tracker
+
+
+class ReadAfterWriteMiddleware(BaseHTTPMiddleware):
+    """成功的写请求之后，在粘滞窗口内让该用户的读请求留在主库"""
+
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        """处理请求"""
+        response = await call_next(request)
+        if (request.method in self.SAFE_METHODS
+                or response.status_code >= 400):
+            return response
+        key = request_key(request)
+        if key:
+            until = write_tracker.mark(key)
+            response.set_cookie(
+                STICKY_COOKIE, f"{until:.3f}",
+                max_age=max(1, int(write_tracker.window) + 1),
+                httponly=True, samesite="lax",
+            )
+        return response
@@ -0,0 +1,74 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-11-27 09:36:52
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-11-27 09:36:52
+ # @ Description: 快速 JSON 响应
+
+ 已安装 orjson 时使用 orjson 序列化，否则回退到标准库 json，
+ 可通过 JSON_ENCODER=json 强制使用标准库。pydantic 模型直接在序列化时
+ 转换，热点接口可以跳过 jsonable_encoder 直接返回 FastJSONResponse。
+ '''
+
+__all__ = ["FastJSONResponse", "dumps", "json_encoder_name"]
+
+import json
+from functools import lru_cache
+from typing import Any, List
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+from app.config import system_settings
+
+try:
+    import orjson
+except ImportError:  # 未安装时使用标准库
+    orjson = None
+
+_use_orjson = orjson is not None and system_settings.json_encoder != "json"
+
+
+def json_encoder_name() -> str:
+    """当前使用的 JSON 序列化库"""
+    return "orjson" if _use_orjson else "json"
+
+
+@lru_cache(maxsize=64)
+def _list_adapter(model: type) -> TypeAdapter:
+    """同类模型列表的序列化器"""
+    return TypeAdapter(List[model])
+
+
+def _default(obj: Any) -> Any:
+    """序列化库不支持的类型交给 pydantic/jsonable_encoder 处理"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    return jsonable_encoder(obj)
+
+
+def dumps(content: Any) -> bytes:
+    """序列化为 UTF-8 JSON 字节，输出与 JSONResponse 一致(不转义非 ASCII)"""
+    # 模型及同类模型列表(列表接口)整体交给 pydantic-core 序列化
+    if isinstance(content, BaseModel):
+        return content.model_dump_json().encode("utf-8")
+    if (isinstance(content, list) and content
+            and isinstance(content[0], BaseModel)
+            and all(type(item) is type(content[0]) for item in content)):
+        return _list_adapter(type(content[0])).dump_json(content)
+    if _use_orjson:
+        return orjson.dumps(content, default=_default,
+                            option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        default=_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """使用 dumps 序列化的 JSONResponse，可直接传入 pydantic 模型"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -7,22 +7,36 @@
  '''
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import (
+    APIRouter, Depends, HTTPException, Query, BackgroundTasks, Request)
 from app.db.models import Category, User
-from app.schemas import CategoryCreate, CategoryUpdate, CategoryOut
+from app.schemas import (
+    CategoryCreate, CategoryUpdate, CategoryOut, SortOrderUpdate)
 from app.security import get_current_user
+from app.db.routing import use_replica
+from app.events import publish_change
+from app.cache import snapshot_response
+from app.responses import FastJSONResponse
+from app.tasks.websites import remove_unused_icons
 
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
 
-@router.get("/", response_model=List[CategoryOut])
+@router.get("/", response_model=List[CategoryOut],
+            dependencies=[Depends(use_replica)])
 async def list_categories(
+    request: Request,
     q: Optional[str] = Query(default=None, description="按名称搜索"),
 ) -> List[CategoryOut]:
     """按名称搜索分类"""
-    records = await Category.get_list_categories(q=q)
-    return [CategoryOut.model_validate(r) for r in records]
+    async def build() -> List[CategoryOut]:
+        records = await Category.get_list_categories(q=q)
+        return [CategoryOut.model_validate(r) for r in records]
+
+    if q:
+        return FastJSONResponse(await build())
+    return await snapshot_response(request, ("categories",), build)
 
 
 @router.post("/", response_model=CategoryOut)
@@ -35,9 +49,25 @@ async def create_category(
     if record is False:
         raise HTTPException(
             status_code=400, detail="Category name already exists")
+    publish_change("category", [record.id])
     return CategoryOut.model_validate(record)
 
 
+@router.patch("/order")
+async def reorder_categories(
+    payload: SortOrderUpdate,
+    user: User = Depends(get_current_user)
+) -> dict:
+    """按拖拽后的顺序批量更新分类排序"""
+    res = await Category.reorder(ids=payload.ids)
+    if isinstance(res, list):
+        raise HTTPException(
+            status_code=404, detail=f"Category not found: {res}")
+    if res:
+        publish_change("category", payload.ids)
+    return {"status": "updated", "count": res}
+
+
 @router.get("/{category_id}", response_model=CategoryOut)
 async def get_category(category_id: int) -> CategoryOut:
     """检查分类名称是否已存在"""
@@ -82,6 +112,7 @@ async def update_category(
     for k, v in update_data.items():
         setattr(record, k, v)
     await record.save()
+    publish_change("category", [record.id])
 
     return CategoryOut.model_validate(record)
 
@@ -89,10 +120,15 @@ async def update_category(
 @router.delete("/{category_id}")
 async def delete_category(
     category_id: int,
+    background_tasks: BackgroundTasks,
     user: User = Depends(get_current_user)
 ) -> dict:
     """删除分类"""
     res = await Category.clean(category_id=category_id)
     if res is False:
         raise HTTPException(status_code=404, detail="Category not found")
+    # 分类内的网址同时被删除，客户端同步时一并获取
+    publish_change("category", [category_id], "delete")
+    # 添加后台任务清理不再使用的图标
+    background_tasks.add_task(remove_unused_icons, res)
     return {"status": "deleted"}
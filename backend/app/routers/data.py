@@ -8,42 +8,52 @@
 
 import json
 from datetime import datetime
+from typing import AsyncIterator
 from fastapi import (APIRouter, Depends, HTTPException,
-                     BackgroundTasks, UploadFile, File)
-from fastapi.responses import JSONResponse
+                     BackgroundTasks, UploadFile, File, Request, Response)
 from app.db.models import Website, Category, User
 from app.security import get_current_user
-from app.tasks.websites import restore_data
+from app.db.routing import use_replica
+from app.tasks.websites import restore_data, download_favicons
+from app.tasks.bookmarks import CHUNK_SIZE, import_bookmarks
+from app.tasks.importer import BatchImporter
+from app.cache import snapshot_response
 
 
 router = APIRouter(prefix="/data", tags=["data"])
 
 
-@router.post("/dump")
+@router.post("/dump", dependencies=[Depends(use_replica)])
 async def dump_user_data(
+    request: Request,
     user: User = Depends(get_current_user)
-) -> JSONResponse:
-    """导出当前用户的所有网站和分类数据"""
-    # 获取用户的所有分类
-    categories_data = await Category.dumpdata(user=user)
-    # 获取用户的所有网站
-    websites_data = await Website.dumpdata(user=user)
+) -> Response:
+    """导出当前用户的所有网站和分类数据
+
+    数据未变化时直接返回缓存的快照，export_time 为快照生成时间
+    """
+    async def build() -> dict:
+        # 获取用户的所有分类
+        categories_data = await Category.dumpdata(user=user)
+        # 获取用户的所有网站
+        websites_data = await Website.dumpdata(user=user)
+
+        # 构建导出数据
+        export_info = {
+            "user_id": user.id,
+            "username": user.username,
+            "export_time": datetime.now().isoformat(),
+            "version": "1.0"
+        }
+        return {
+            "export_info": export_info,
+            "categories": categories_data,
+            "websites": websites_data
+        }
 
-    # 构建导出数据
-    export_info = {
-        "user_id": user.id,
-        "username": user.username,
-        "export_time": datetime.now().isoformat(),
-        "version": "1.0"
-    }
-    export_data = {
-        "export_info": export_info,
-        "categories": categories_data,
-        "websites": websites_data
-    }
     filename = "mynavi_backup_{user.username}_{export_info.export_time}.json"
-    return JSONResponse(
-        content=export_data,
+    return await snapshot_response(
+        request, ("dump", user.id, user.username), build,
         headers={
             "Content-Disposition": f"attachment; filename={filename}"
         }
@@ -77,3 +87,27 @@ async def load_user_data(
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Import failed: {str(e)}") from e
+
+
+@router.post("/bookmarks")
+async def load_bookmarks(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    user: User = Depends(get_current_user)
+) -> dict:
+    """导入浏览器导出的书签文件(Netscape HTML)
+
+    分块解析并分批写入，返回导入统计；没有内嵌图标的网址在后台下载图标
+    """
+    async def chunks() -> AsyncIterator[bytes]:
+        while chunk := await file.read(CHUNK_SIZE):
+            yield chunk
+
+    importer = BatchImporter(user, collect_icons=True)
+    stats = await import_bookmarks(chunks(), importer)
+    if not stats["websites"] and not stats["duplicates"] \
+            and not stats["categories"] and not stats["reused_categories"]:
+        raise HTTPException(
+            status_code=400, detail="Invalid bookmarks file format")
+    background_tasks.add_task(download_favicons, importer.icon_pending)
+    return {"status": "success", **stats}
@@ -0,0 +1,51 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-11-25 10:03:17
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-11-25 10:03:17
+ # @ Description: SSE 事件推送 API 路由
+ '''
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from app.config import events_config
+from app.events import broker, format_sse
+
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+
+@router.get("")
+async def stream_events(request: Request) -> StreamingResponse:
+    """订阅数据变更事件(text/event-stream)"""
+    if not events_config.enabled:
+        raise HTTPException(status_code=404, detail="Events are disabled")
+    subscriber = broker.subscribe()
+    if subscriber is None:
+        raise HTTPException(status_code=503, detail="Too many subscribers")
+
+    async def stream():
+        try:
+            yield f"retry: {events_config.retry_ms}\n\n"
+            while True:
+                event = await subscriber.get(events_config.heartbeat)
+                if event is None:
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"
+                    continue
+                if event["event"] == "close":
+                    break
+                yield format_sse(event)
+        finally:
+            broker.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # 关闭 nginx 缓冲，事件立即送达
+            "X-Accel-Buffering": "no",
+        },
+    )
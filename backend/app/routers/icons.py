@@ -45,5 +45,8 @@ async def show_icons(icons: str, request: Request) -> Response:
         "Cache-Control": system_settings.cache_header,
         "ETag": etag,
         "Last-Modified": last_modified,
+        # 图标来自外部网站或导入文件，禁止按内容猜测类型并禁用脚本
+        "X-Content-Type-Options": "nosniff",
+        "Content-Security-Policy": "default-src 'none'; sandbox",
     }
     return FileResponse(icon_file, headers=headers)
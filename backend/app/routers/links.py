@@ -0,0 +1,52 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-12-01 11:02:15
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-12-01 11:02:15
+ # @ Description: 网址可用性检测 API 路由
+ '''
+
+from fastapi import APIRouter, Depends, HTTPException
+from app.config import link_check_config
+from app.db.models import LinkCheck, Website
+from app.db.routing import use_replica
+from app.security import get_current_user
+from app.tasks.links import link_checker
+
+
+router = APIRouter(prefix="/links", tags=["links"])
+
+
+@router.get("", dependencies=[Depends(use_replica)])
+async def list_link_status():
+    """全部网址的最近一次检测结果，前端据此选择主链接或备用链接"""
+    return {
+        "running": link_checker.running,
+        "progress": link_checker.progress,
+        "last_run": link_checker.last_run,
+        "dead_after": link_check_config.dead_after,
+        "links": await LinkCheck.statuses(),
+    }
+
+
+@router.get("/dead", dependencies=[Depends(use_replica)])
+async def list_dead_links():
+    """连续多次检测失败的网址"""
+    rows = await LinkCheck.statuses(
+        dead_only=True, min_failures=link_check_config.dead_after)
+    websites = {
+        w["id"]: w for w in await Website.filter(
+            id__in=[r["website_id"] for r in rows]).values(
+            "id", "name", "url", "back_url", "category_id")
+    }
+    return [dict(websites[r["website_id"]], **r) for r in rows
+            if r["website_id"] in websites]
+
+
+@router.post("/check", status_code=202,
+             dependencies=[Depends(get_current_user)])
+async def start_link_check():
+    """立即开始一轮检测(后台运行)，需要登录"""
+    if not link_checker.start(link_check_config.batch_size):
+        raise HTTPException(status_code=409, detail="Link check is running")
+    return {"running": True}
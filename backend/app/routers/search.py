@@ -0,0 +1,128 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-11-30 15:42:08
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-11-30 15:42:08
+ # @ Description: 统一搜索 API 路由(本地书签 + SearXNG)
+
+ 先返回本地网址/分类的匹配结果，再在截止时间内逐条返回 SearXNG 网页结果，
+ 已收藏的网址不重复返回。输出为 NDJSON(默认)或 SSE，每条消息含 type 字段：
+   local   本地匹配 {"websites": [...], "categories": [...]}
+   web     一条 SearXNG 结果
+   error   外部搜索不可用/超时 {"source": "searxng", "error": "..."}
+   done    结束 {"local": n, "web": m, "elapsed_ms": t}
+ '''
+
+import time
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Set, Union
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from app.config import searxng_config
+from app.db.models import Category, Website
+from app.db.routing import use_replica
+from app.events import format_sse
+from app.responses import dumps
+from app.schemas import CategoryOut, WebsiteOut
+from app.searxng import CircuitOpenError, searxng
+from app.urls import url_hash
+
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+# 外部结果只保留前端展示需要的字段
+WEB_FIELDS = ("url", "title", "content", "engine", "engines", "score")
+
+
+async def _bookmarked(urls: List[str]) -> Set[str]:
+    """已收藏网址的规范化摘要(按 url_hash 单列索引一次查询)
+
+    本地结果不区分用户，已收藏的判断同样不区分用户
+    """
+    hashes = {url_hash(url) for url in urls if url}
+    if not hashes:
+        return set()
+    saved = await Website.filter(
+        url_hash__in=list(hashes)).values_list("url_hash", flat=True)
+    return set(saved)
+
+
+def _message(kind: str, data: Dict, sse: bool) -> Union[str, bytes]:
+    """按输出格式编码一条消息"""
+    if sse:
+        return format_sse({"event": kind, "data": data})
+    return dumps(dict(data, type=kind)) + b"\n"
+
+
+@router.get("", dependencies=[Depends(use_replica)])
+async def federated_search(
+    q: str = Query(..., min_length=1,
+                   max_length=searxng_config.max_query_length),
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$"),
+    web: bool = Query(True, description="是否包含 SearXNG 结果"),
+    engines: Optional[str] = Query(None, description="逗号分隔的引擎名"),
+    page: int = Query(1, ge=1, le=20),
+    deadline: Optional[float] = Query(
+        None, gt=0, le=30, description="等待外部结果的秒数"),
+) -> StreamingResponse:
+    """统一搜索：先流式返回本地书签，再返回 SearXNG 结果"""
+    started = time.perf_counter()
+    q = q.strip()
+    # 先发出外部请求，与本地查询并行
+    external: Optional[asyncio.Task] = None
+    if web and q:
+        external = asyncio.create_task(searxng.search(
+            q, engines.split(",") if engines else (), page))
+        # 截止后仍在后台完成并写入缓存，这里只取走异常避免告警
+        external.add_done_callback(
+            lambda t: t.cancelled() or t.exception())
+    websites = await Website.list_websites(q=q) if q else []
+    categories = await Category.get_list_categories(q=q) if q else []
+    local = {
+        "websites": [WebsiteOut.model_validate(w).model_dump(mode="json")
+                     for w in websites],
+        "categories": [CategoryOut.model_validate(c).model_dump(mode="json")
+                       for c in categories],
+    }
+    sse = format == "sse"
+    wait = deadline or searxng_config.federated_deadline
+
+    async def stream() -> AsyncIterator[Union[str, bytes]]:
+        yield _message("local", local, sse)
+        sent = 0
+        if external is not None:
+            remaining = wait - (time.perf_counter() - started)
+            done, _ = await asyncio.wait({external}, timeout=max(0, remaining))
+            if not done:
+                yield _message("error", {"source": "searxng",
+                                         "error": "timeout"}, sse)
+            elif external.exception() is not None:
+                error = ("unavailable"
+                         if isinstance(external.exception(), CircuitOpenError)
+                         else "error")
+                yield _message("error", {"source": "searxng",
+                                         "error": error}, sse)
+            else:
+                results = external.result()["results"]
+                seen = await _bookmarked([r.get("url", "") for r in results])
+                seen.update(url_hash(w["url"]) for w in local["websites"])
+                for result in results:
+                    url = result.get("url", "")
+                    key = url_hash(url) if url else None
+                    if not key or key in seen:
+                        continue
+                    seen.add(key)
+                    sent += 1
+                    yield _message("web", {k: result[k] for k in WEB_FIELDS
+                                           if k in result}, sse)
+        yield _message("done", {
+            "local": len(websites) + len(categories),
+            "web": sent,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }, sse)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,63 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-11-24 14:20:08
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-11-24 14:20:08
+ # @ Description: 增量同步 API 路由
+ '''
+
+from typing import Dict, Optional, Set
+from fastapi import APIRouter, Query
+from app.config import sync_config
+from app.db.models import Category, ChangeLog, Website
+from app.schemas import CategoryOut, SyncOut, WebsiteOut
+from app.responses import FastJSONResponse
+
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+
+@router.get("", response_model=SyncOut)
+async def sync_changes(
+    since: Optional[int] = Query(default=None, ge=0, description="上次同步返回的游标"),
+    limit: int = Query(default=sync_config.page_size, ge=1, le=10000),
+) -> FastJSONResponse:
+    """返回游标之后的网址与分类变更
+
+    未传 since 或游标已失效时返回 reset，客户端需全量加载后继续同步；
+    直接返回响应以跳过 response_model 的二次校验
+    """
+    latest_cursor = await ChangeLog.latest_cursor()
+    # 游标超前说明数据库已被替换(如从备份恢复)
+    if (since is None or since > latest_cursor
+            or since < await ChangeLog.reset_cursor()):
+        return FastJSONResponse(SyncOut(cursor=latest_cursor, reset=True))
+
+    rows, has_more = await ChangeLog.changes_since(since, limit)
+    # 同一对象只取最后一次变更
+    latest: Dict[str, Dict[int, str]] = {"website": {}, "category": {}}
+    for row in rows:
+        latest.setdefault(row.model, {})[row.object_id] = row.action
+    upserts: Dict[str, Set[int]] = {
+        name: {i for i, a in actions.items() if a == ChangeLog.UPSERT}
+        for name, actions in latest.items()
+    }
+
+    websites = await Website.filter(
+        id__in=upserts["website"]) if upserts["website"] else []
+    categories = await Category.filter(
+        id__in=upserts["category"]) if upserts["category"] else []
+    # 已不存在的对象同样按删除处理
+    found = {"website": {w.id for w in websites},
+             "category": {c.id for c in categories}}
+    deleted = {name: sorted(set(latest[name]) - found[name])
+               for name in ("website", "category")}
+
+    return FastJSONResponse(SyncOut(
+        cursor=rows[-1].id if rows else since,
+        has_more=has_more,
+        websites=[WebsiteOut.model_validate(w) for w in websites],
+        categories=[CategoryOut.model_validate(c) for c in categories],
+        deleted={"websites": deleted["website"],
+                 "categories": deleted["category"]},
+    ))
@@ -5,9 +5,18 @@
  # @ Modified time: 2025-10-10 16:20:10
  # @ Description:系统相关的 API 路由
  '''
-from os import getenv
-import httpx
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.config import db_settings, searxng_config
+from app.db.routing import REPLICA_CONNECTION
+from app.cache import snapshot_cache
+from app.lazy import lazy_import
+from app.searxng import CircuitOpenError, searxng
+from app.security import get_current_user
+
+httpx = lazy_import("httpx")
+# 连接池统计依赖 asyncpg，首次请求时再导入
+pool = lazy_import("app.db.pool")
 
 
 router = APIRouter(prefix="/system", tags=["system"])
@@ -15,59 +24,63 @@ router = APIRouter(prefix="/system", tags=["system"])
 
 @router.get("/searxng/health")
 async def check_searxng_health():
-    """检查 SearXNG 服务健康状态"""
-    try:
-        # 从环境变量获取 SearXNG 地址
-        searxng_host = getenv("SEARXNG_HOST", "searxng")
-        searxng_port = getenv("SEARXNG_PORT", "8080")
-        searxng_url = f"http://{searxng_host}:{searxng_port}"
-
-        # 尝试访问 SearXNG 健康检查端点
-        async with httpx.AsyncClient(timeout=2.0) as client:
-            response = await client.get(f"{searxng_url}/healthz")
-
-            if response.status_code == 200:
-                return {
-                    "status": "healthy",
-                    "available": True,
-                    "url": searxng_url
-                }
-            else:
-                return {
-                    "status": "unhealthy",
-                    "available": False,
-                    "error": f"Status code: {response.status_code}"
-                }
-    except httpx.ConnectTimeout:
-        return {
-            "status": "timeout",
-            "available": False,
-            "error": "Connection timeout"
-        }
-    except httpx.ConnectError:
-        return {
-            "status": "unavailable",
-            "available": False,
-            "error": "Connection refused - service may not be running"
-        }
-    except Exception as e:
-        return {
-            "status": "error",
-            "available": False,
-            "error": str(e)
-        }
+    """SearXNG 健康状态(后台定期探测，直接返回最近一次结果)"""
+    return await searxng.health()
 
 
 @router.get("/searxng/config")
 async def get_searxng_config():
     """获取 SearXNG 配置信息"""
-    searxng_host = getenv("SEARXNG_HOST", "searxng")
-    searxng_port = getenv("SEARXNG_PORT", "8080")
-    searxng_bind_host = getenv("SEARXNG_BIND_HOST", "localhost")
-    searxng_bind_port = getenv("SEARXNG_BIND_PORT", "8080")
+    return {
+        "internal_url": searxng_config.internal_url,
+        "external_url": searxng_config.external_url,
+        "search_path": "/search",
+        "proxy_path": "/api/system/searxng/search",
+    }
+
 
+@router.get("/searxng/search")
+async def searxng_search(
+    q: str = Query(..., min_length=1,
+                   max_length=searxng_config.max_query_length),
+    engines: Optional[str] = Query(None, description="逗号分隔的引擎名"),
+    page: int = Query(1, ge=1, le=20),
+):
+    """通过后端代理搜索 SearXNG(结果缓存，相同查询合并)"""
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Empty query")
+    try:
+        return await searxng.search(
+            q, engines.split(",") if engines else (), page)
+    except CircuitOpenError:
+        raise HTTPException(status_code=503, detail="SearXNG unavailable")
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=504, detail="SearXNG timeout")
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=502,
+            detail=f"SearXNG status code: {e.response.status_code}")
+    except (httpx.HTTPError, ValueError):
+        raise HTTPException(status_code=502, detail="SearXNG unavailable")
+
+
+@router.get("/searxng/stats")
+async def get_searxng_stats():
+    """获取 SearXNG 搜索缓存统计"""
+    return searxng.stats()
+
+
+@router.get("/db/pool", dependencies=[Depends(get_current_user)])
+async def get_db_pool_stats():
+    """获取数据库连接池统计(仅 PostgreSQL)，需要登录"""
     return {
-        "internal_url": f"http://{searxng_host}:{searxng_port}",
-        "external_url": f"http://{searxng_bind_host}:{searxng_bind_port}",
-        "search_path": "/search"
+        "pool": pool.pool_stats(),
+        "replica": pool.pool_stats(REPLICA_CONNECTION)
+        if db_settings.replica_enabled else None,
     }
+
+
+@router.get("/cache")
+async def get_snapshot_cache_stats():
+    """获取列表/导出快照缓存统计"""
+    return snapshot_cache.stats()
@@ -6,26 +6,77 @@
  # @ Description:
  '''
 
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+from fastapi import (
+    APIRouter, Depends, HTTPException, Query, BackgroundTasks, Request,
+    Response)
 from fastapi.responses import JSONResponse
+from tortoise.exceptions import IntegrityError
 from app.db.models import Website, Category, User
-from app.schemas import WebsiteCreate, WebsiteUpdate, WebsiteOut
+from app.schemas import (
+    WebsiteCreate, WebsiteUpdate, WebsiteOut, WebsiteUsageOut,
+    WebsiteBulkDelete,
+    SortOrderUpdate, WebsiteBatchCreate, WebsiteBatchUpdate, WebsiteMove)
 from app.security import get_current_user
-from app.tasks.websites import download_favicon
+from app.db.routing import use_replica
+from app.events import publish_change
+from app.cache import snapshot_response
+from app.responses import FastJSONResponse
+from app.tasks.websites import (
+    download_favicon, download_favicons, remove_unused_icons)
+from app.tasks.visits import visit_counter
+from app.config import visit_config
+from app.urls import url_hash
 
 
 router = APIRouter(prefix="/websites", tags=["websites"])
 
 
-@router.get("/", response_model=List[WebsiteOut])
+async def check_duplicates(
+    urls: Dict[int, str], user: User, exclude: Iterable[int] = ()
+) -> None:
+    """按规范化网址查重(一次 IN 查询)，重复时返回 409
+
+    Args:
+        urls: {请求中的序号或网址id: 网址}
+        exclude: 本次修改的网址 id，不与自身比较
+    """
+    hashes: Dict[str, int] = {}
+    for key, url in urls.items():
+        digest = url_hash(url)
+        if digest in hashes:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Duplicate URL in request: {[hashes[digest], key]}")
+        hashes[digest] = key
+    skip = set(exclude)
+    existing = {
+        digest: website_id for digest, website_id in (
+            await Website.existing_hashes(hashes, user)).items()
+        if website_id not in skip}
+    if existing:
+        raise HTTPException(
+            status_code=409,
+            detail=f"URL already exists: {sorted(existing.values())}")
+
+
+@router.get("/", response_model=List[WebsiteOut],
+            dependencies=[Depends(use_replica)])
 async def list_websites(
+    request: Request,
     q: Optional[str] = Query(default=None, description="按名称搜索"),
     category_id: Optional[int] = Query(default=None, description="按分类筛选"),
 ):
     """查询webiste列表"""
-    records = await Website.list_websites(q=q, cid=category_id)
-    return [WebsiteOut.model_validate(r) for r in records]
+    async def build() -> List[WebsiteOut]:
+        records = await Website.list_websites(q=q, cid=category_id)
+        return [WebsiteOut.model_validate(r) for r in records]
+
+    # 搜索结果组合太多，不缓存
+    if q:
+        return FastJSONResponse(await build())
+    return await snapshot_response(request, ("websites", category_id), build)
 
 
 @router.post("/", response_model=WebsiteOut)
@@ -35,15 +86,164 @@ async def create_website(
     user: User = Depends(get_current_user)
 ) -> WebsiteOut:
     """新建website"""
-    record = await Website.new_data(payload=payload, user=user)
+    await check_duplicates({0: str(payload.url)}, user)
+    try:
+        record = await Website.new_data(payload=payload, user=user)
+    except IntegrityError:
+        # 并发创建同一网址时由唯一索引兜底
+        raise HTTPException(status_code=409, detail="URL already exists")
     if record is False:
         raise HTTPException(status_code=404, detail="未发现分类")
+    publish_change("website", [record.id])
     # 添加后台任务下载favicon
     background_tasks.add_task(download_favicon, record.id)
 
     return WebsiteOut.model_validate(record)
 
 
+@router.delete("/")
+async def bulk_delete_websites(
+    payload: WebsiteBulkDelete,
+    background_tasks: BackgroundTasks,
+    user: User = Depends(get_current_user)
+) -> JSONResponse:
+    """批量删除website"""
+    count, icons = await Website.bulk_delete(ids=payload.ids, user=user)
+    if count:
+        publish_change("website", payload.ids, "delete")
+    # 添加后台任务清理不再使用的图标
+    background_tasks.add_task(remove_unused_icons, icons)
+    return JSONResponse(
+        content={"status": "deleted", "count": count}, status_code=200)
+
+
+@router.patch("/order")
+async def reorder_websites(
+    payload: SortOrderUpdate,
+    user: User = Depends(get_current_user)
+) -> JSONResponse:
+    """按拖拽后的顺序批量更新website排序"""
+    res = await Website.reorder(ids=payload.ids, user=user)
+    if isinstance(res, list):
+        raise HTTPException(
+            status_code=404, detail=f"Website not found: {res}")
+    if res:
+        publish_change("website", payload.ids)
+    return JSONResponse(
+        content={"status": "updated", "count": res}, status_code=200)
+
+
+@router.post("/batch", response_model=List[WebsiteOut])
+async def batch_create_websites(
+    payload: WebsiteBatchCreate,
+    background_tasks: BackgroundTasks,
+    user: User = Depends(get_current_user)
+) -> List[WebsiteOut]:
+    """批量新建website"""
+    missing = await Category.missing_ids(i.category_id for i in payload.items)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"未发现分类: {missing}")
+    await check_duplicates(
+        {i: str(item.url) for i, item in enumerate(payload.items)}, user)
+    try:
+        records = await Website.batch_create(payloads=payload.items, user=user)
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="URL already exists")
+    publish_change("website", [r.id for r in records])
+    # 添加一个后台任务批量下载favicon
+    background_tasks.add_task(download_favicons, [r.id for r in records])
+    return [WebsiteOut.model_validate(r) for r in records]
+
+
+@router.put("/batch", response_model=List[WebsiteOut])
+async def batch_update_websites(
+    payload: WebsiteBatchUpdate,
+    background_tasks: BackgroundTasks,
+    user: User = Depends(get_current_user)
+) -> List[WebsiteOut]:
+    """批量更新website"""
+    missing = await Website.missing_ids((i.id for i in payload.items), user)
+    if missing:
+        raise HTTPException(
+            status_code=404, detail=f"Website not found: {missing}")
+    missing = await Category.missing_ids(
+        i.category_id for i in payload.items
+        if "category_id" in i.model_fields_set)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"未发现分类: {missing}")
+    # 修改了网址的记录不与自身旧网址比较，互换网址等情况由唯一索引兜底
+    await check_duplicates(
+        {i.id: str(i.url) for i in payload.items if i.url is not None},
+        user, exclude=(i.id for i in payload.items if i.url is not None))
+    try:
+        records = await Website.batch_update(items=payload.items, user=user)
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="URL already exists")
+    publish_change("website", [r.id for r in records])
+    # 仅为修改了链接的网站重新下载favicon
+    changed = [
+        i.id for i in payload.items
+        if {"url", "back_url"} & i.model_fields_set]
+    if changed:
+        background_tasks.add_task(download_favicons, changed)
+    return [WebsiteOut.model_validate(r) for r in records]
+
+
+@router.patch("/move")
+async def move_websites(
+    payload: WebsiteMove,
+    user: User = Depends(get_current_user)
+) -> JSONResponse:
+    """批量移动website到指定分类"""
+    if await Category.missing_ids([payload.category_id]):
+        raise HTTPException(status_code=404, detail="未发现分类")
+    count = await Website.move(
+        ids=payload.ids, category_id=payload.category_id, user=user)
+    if count:
+        publish_change("website", payload.ids)
+    return JSONResponse(
+        content={"status": "moved", "count": count}, status_code=200)
+
+
+@router.get("/duplicates")
+async def list_duplicate_websites(
+    user: User = Depends(get_current_user)
+) -> List[List[Dict]]:
+    """规范化网址相同的网址分组，每组按 id 排序(第一条为最早添加的)"""
+    return await Website.duplicate_clusters(user)
+
+
+@router.get("/usage", response_model=List[WebsiteUsageOut])
+async def list_usage(
+    order: str = Query("most", pattern="^(most|recent)$",
+                       description="most 常用 / recent 最近访问"),
+    limit: int = Query(20, ge=1, le=visit_config.top_k),
+) -> List[WebsiteUsageOut]:
+    """常用或最近访问的网址(来自内存中的前 K 项，不扫描访问表)"""
+    counts = visit_counter.counts()
+    if order == "most":
+        ranked = [(i, None) for i, _ in visit_counter.most_used(limit)]
+    else:
+        ranked = [(i, datetime.fromtimestamp(ts, timezone.utc))
+                  for i, ts in visit_counter.recently_used(limit)]
+    records = {w.id: w for w in await Website.filter(
+        id__in=[i for i, _ in ranked])}
+    return [
+        WebsiteUsageOut.model_validate(records[i]).model_copy(
+            update={"visits": counts.get(i, 0), "last_visited_at": at})
+        for i, at in ranked if i in records
+    ]
+
+
+@router.post("/{website_id}/visit", status_code=204)
+async def record_visit(website_id: int) -> Response:
+    """访问上报：只在内存中计数，由后台任务批量写入"""
+    if not visit_config.enabled:
+        raise HTTPException(status_code=404, detail="Visits are disabled")
+    visit_counter.hit(website_id)
+    return Response(status_code=204)
+
+
 @router.get("/{website_id}", response_model=WebsiteOut)
 async def get_website(website_id: int) -> WebsiteOut:
     """查询website"""
@@ -67,6 +267,9 @@ async def update_website(
     new_data = payload.model_dump(exclude_unset=True)
     if "url" in new_data and new_data["url"] is not None:
         new_data["url"] = str(new_data["url"])  # AnyUrl -> str
+        await check_duplicates(
+            {website_id: new_data["url"]}, user, exclude=[website_id])
+        new_data["url_hash"] = url_hash(new_data["url"])
     if "back_url" in new_data and new_data["back_url"] is not None:
         new_data["back_url"] = str(new_data["back_url"])  # AnyUrl -> str
 
@@ -81,7 +284,11 @@ async def update_website(
 
     for k, v in new_data.items():
         setattr(record, k, v)
-    await record.save()
+    try:
+        await record.save()
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="URL already exists")
+    publish_change("website", [record.id])
     # 添加后台任务下载favicon
     background_tasks.add_task(download_favicon, record.id)
     return WebsiteOut.model_validate(record)
@@ -97,4 +304,5 @@ async def delete_website(
     if record is None:
         raise HTTPException(status_code=404, detail="Website not found")
     await record.delete()
+    publish_change("website", [website_id], "delete")
     return JSONResponse(content={"status": "deleted"}, status_code=200)
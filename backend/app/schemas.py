@@ -14,10 +14,20 @@ __all__ = [
     "CategoryUpdate",
     "WebsiteCreate",
     "WebsiteUpdate",
-    "WebsiteOut"
+    "WebsiteOut",
+    "WebsiteUsageOut",
+    "WebsiteBulkDelete",
+    "SortOrderUpdate",
+    "WebsiteBatchCreate",
+    "WebsiteBatchUpdateItem",
+    "WebsiteBatchUpdate",
+    "WebsiteMove",
+    "SyncDeleted",
+    "SyncOut",
 ]
 
-from typing import Optional
+from datetime import datetime
+from typing import List, Optional
 from pydantic import BaseModel, AnyUrl, Field, field_validator
 
 
@@ -128,3 +138,83 @@ class WebsiteOut(BaseModel):
     class Config:
         """WebsiteOut 配置"""
         from_attributes = True
+
+
+class WebsiteUsageOut(WebsiteOut):
+    """常用/最近访问网址"""
+    visits: int = 0
+    last_visited_at: Optional[datetime] = None
+
+
+class WebsiteBulkDelete(BaseModel):
+    """网站批量删除模型"""
+    ids: List[int] = Field(min_length=1, max_length=1000)
+
+
+class SortOrderUpdate(BaseModel):
+    """批量排序模型，ids 按显示顺序排列(靠前的排在前面)"""
+    ids: List[int] = Field(min_length=1, max_length=1000)
+
+    @field_validator('ids')
+    @classmethod
+    def validate_ids(cls, v):
+        """不允许重复的 id"""
+        if len(set(v)) != len(v):
+            raise ValueError("ids must be unique")
+        return v
+
+
+class WebsiteBatchCreate(BaseModel):
+    """网站批量创建模型"""
+    items: List[WebsiteCreate] = Field(min_length=1, max_length=1000)
+
+
+class WebsiteBatchUpdateItem(WebsiteUpdate):
+    """网站批量更新条目"""
+    id: int
+
+    @field_validator('name', 'url', 'sort_order', 'icon')
+    @classmethod
+    def validate_not_null(cls, v):
+        """对应的列不允许为空，不能显式传 null"""
+        if v is None:
+            raise ValueError("must not be null")
+        return v
+
+
+class WebsiteBatchUpdate(BaseModel):
+    """网站批量更新模型"""
+    items: List[WebsiteBatchUpdateItem] = Field(min_length=1, max_length=1000)
+
+    @field_validator('items')
+    @classmethod
+    def validate_items(cls, v):
+        """不允许重复的 id"""
+        if len({i.id for i in v}) != len(v):
+            raise ValueError("item ids must be unique")
+        return v
+
+
+class WebsiteMove(BaseModel):
+    """网站批量移动模型，category_id 为空表示移出分类"""
+    ids: List[int] = Field(min_length=1, max_length=1000)
+    category_id: Optional[int] = None
+
+
+class SyncDeleted(BaseModel):
+    """增量同步中被删除的对象 id"""
+    websites: List[int] = []
+    categories: List[int] = []
+
+
+class SyncOut(BaseModel):
+    """增量同步结果
+
+    reset 为 True 时游标已失效，客户端需重新全量加载后使用新的 cursor
+    """
+    cursor: int
+    reset: bool = False
+    has_more: bool = False
+    websites: List[WebsiteOut] = []
+    categories: List[CategoryOut] = []
+    deleted: SyncDeleted = SyncDeleted()
@@ -0,0 +1,334 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-11-30 10:05:21
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-11-30 10:05:21
+ # @ Description: SearXNG 搜索代理
+
+ 后端通过一个长期复用的 httpx 连接池访问 SearXNG 内部地址，
+ 结果按 (规范化查询, 引擎, 页码) 缓存，带过期时间并按 LRU 淘汰；
+ 相同查询同时到达时只向 SearXNG 发出一次请求，其余请求等待同一结果。
+
+ 健康状态由应用启动时开启的后台任务定期探测，接口直接返回最近一次结果；
+ 探测或搜索连续失败时熔断，熔断期间搜索立即返回不可用，
+ 经过冷却时间后放行一次试探请求，成功即恢复。
+ '''
+
+from __future__ import annotations
+
+__all__ = [
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "SearxngClient",
+    "searxng",
+    "normalize_query",
+]
+
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+from app.config import searxng_config
+from app.lazy import lazy_import
+from app.logging import setup_logging, INFO
+
+
+httpx = lazy_import("httpx")
+
+logger = setup_logging(logger_name=__name__, level=INFO, backup_count=1)
+
+
+def normalize_query(q: str) -> str:
+    """规范化查询串：合并空白并转为小写"""
+    return " ".join(q.split()).lower()
+
+
+class CircuitOpenError(Exception):
+    """熔断期间拒绝请求"""
+
+
+class CircuitBreaker:
+    """连续失败计数熔断器：closed -> open -> half_open -> closed"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        """当前状态"""
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """是否放行请求；半开状态下只放行一个试探请求"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial:
+            self._trial = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        """请求成功，恢复闭合"""
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def end_trial(self) -> None:
+        """试探请求结束(包括被取消或非服务故障的异常)，允许下一次试探"""
+        self._trial = False
+
+    def record_failure(self) -> None:
+        """请求失败，达到阈值或试探失败时(重新)熔断"""
+        self.failures += 1
+        self._trial = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def trip(self) -> None:
+        """立即熔断(健康探测失败时)"""
+        self.failures = max(self.failures, self.failure_threshold)
+        self.opened_at = time.monotonic()
+        self._trial = False
+
+
+def _is_upstream_failure(error: Exception) -> bool:
+    """网络错误或 5xx 视为服务故障，4xx 不计入熔断"""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, httpx.HTTPError)
+
+
+class SearxngClient:
+    """带结果缓存、请求合并与熔断的 SearXNG 客户端"""
+
+    def __init__(self, base_url: str, timeout: float, max_connections: int,
+                 max_keepalive: int, cache_ttl: int, cache_entries: int,
+                 health_timeout: float = 2.0, breaker_failures: int = 3,
+                 breaker_reset: float = 30.0):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.cache_ttl = cache_ttl
+        self.cache_entries = cache_entries
+        self._client: Optional[httpx.AsyncClient] = None
+        self._cache: "OrderedDict[Hashable, Tuple[float, Dict]]" = OrderedDict()
+        self._pending: Dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.health_timeout = health_timeout
+        self.breaker = CircuitBreaker(breaker_failures, breaker_reset)
+        self._status: Optional[Dict[str, Any]] = None
+        self._checked = asyncio.Event()
+        self._prober: Optional[asyncio.Task] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """共享的连接池，首次使用时创建"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url, timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive))
+        return self._client
+
+    async def close(self) -> None:
+        """停止后台探测并关闭连接池"""
+        self.stop()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _get(self, key: Hashable) -> Optional[Dict]:
+        """取未过期的缓存结果"""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires, data = entry
+        if expires < time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return data
+
+    def _put(self, key: Hashable, data: Dict) -> None:
+        """保存结果并淘汰最久未使用的条目"""
+        if self.cache_entries <= 0 or self.cache_ttl <= 0:
+            return
+        self._cache[key] = (time.monotonic() + self.cache_ttl, data)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_entries:
+            self._cache.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空结果缓存"""
+        self._cache.clear()
+
+    async def _fetch(self, q: str, engines: Sequence[str], page: int) -> Dict:
+        """向 SearXNG 发出一次搜索请求"""
+        params = {"q": q, "format": "json", "pageno": page}
+        if engines:
+            params["engines"] = ",".join(engines)
+        response = await self.client.get("/search", params=params)
+        response.raise_for_status()
+        data = response.json()
+        return {
+            "query": q,
+            "page": page,
+            "results": data.get("results", []),
+            "suggestions": data.get("suggestions", []),
+            "answers": data.get("answers", []),
+            "unresponsive_engines": data.get("unresponsive_engines", []),
+        }
+
+    async def search(self, q: str, engines: Sequence[str] = (),
+                     page: int = 1) -> Dict:
+        """搜索；命中缓存直接返回，相同查询并发时共用一次请求"""
+        q = normalize_query(q)
+        engines: List[str] = sorted({e.strip().lower() for e in engines
+                                     if e.strip()})
+        key = (q, tuple(engines), page)
+        data = self._get(key)
+        if data is not None:
+            self.hits += 1
+            return data
+        task = self._pending.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            if not self.breaker.allow():
+                self.rejected += 1
+                raise CircuitOpenError("SearXNG circuit is open")
+            self.misses += 1
+            trial = self.breaker.state == "half_open"
+            # 请求放在独立任务中，发起者被取消(客户端断开)时
+            # 合并等待的其他请求仍能拿到结果
+            task = asyncio.ensure_future(
+                self._search(key, q, engines, page, trial))
+            self._pending[key] = task
+        return await asyncio.shield(task)
+
+    async def _search(self, key: Hashable, q: str, engines: Sequence[str],
+                      page: int, trial: bool = False) -> Dict:
+        """请求 SearXNG，缓存结果并更新熔断器；trial 表示半开状态的试探请求"""
+        try:
+            data = await self._fetch(q, engines, page)
+            self.breaker.record_success()
+            self._put(key, data)
+            return data
+        except Exception as e:
+            logger.warning("SearXNG 搜索失败 %r: %s", q, e)
+            if _is_upstream_failure(e):
+                self.breaker.record_failure()
+            raise
+        finally:
+            self._pending.pop(key, None)
+            if trial:
+                self.breaker.end_trial()
+
+    async def probe(self) -> Dict[str, Any]:
+        """实时探测 /healthz，更新健康状态与熔断器"""
+        try:
+            response = await self.client.get(
+                "/healthz", timeout=self.health_timeout)
+            if response.status_code == 200:
+                status = {"status": "healthy", "available": True,
+                          "url": self.base_url}
+            else:
+                status = {"status": "unhealthy", "available": False,
+                          "error": f"Status code: {response.status_code}"}
+        except httpx.ConnectTimeout:
+            status = {"status": "timeout", "available": False,
+                      "error": "Connection timeout"}
+        except httpx.ConnectError:
+            status = {"status": "unavailable", "available": False,
+                      "error": "Connection refused - service may not be running"}
+        except Exception as e:
+            status = {"status": "error", "available": False, "error": str(e)}
+
+        previous = self._status
+        if status["available"]:
+            self.breaker.record_success()
+        else:
+            self.breaker.trip()
+        # 只在状态变化时记录日志，服务未部署时不刷屏
+        if previous is None or previous["status"] != status["status"]:
+            logger.info("SearXNG 健康状态: %s", status["status"])
+        status["checked_at"] = time.time()
+        self._status = status
+        self._checked.set()
+        return status
+
+    async def health(self, wait: float = 0.5) -> Dict[str, Any]:
+        """最近一次健康状态
+
+        后台探测运行时直接返回缓存结果；启动后首次探测尚未完成时
+        最多等待 wait 秒，仍未完成则返回 unknown。未启动后台探测时实时检查。
+        """
+        if self._prober is None or self._prober.done():
+            status = await self.probe()
+        else:
+            if self._status is None:
+                try:
+                    await asyncio.wait_for(self._checked.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+            status = self._status or {
+                "status": "unknown", "available": False,
+                "error": "Health check pending"}
+        return dict(status, circuit=self.breaker.state)
+
+    async def _probe_loop(self, interval: float) -> None:
+        """定期探测"""
+        while True:
+            await self.probe()
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float) -> None:
+        """开始后台健康探测，interval 不大于 0 时不启动"""
+        if interval > 0 and self._prober is None:
+            self._prober = asyncio.create_task(self._probe_loop(interval))
+
+    def stop(self) -> None:
+        """停止后台健康探测"""
+        if self._prober is not None:
+            self._prober.cancel()
+            self._prober = None
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存与熔断统计"""
+        return {
+            "entries": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._pending),
+            "rejected": self.rejected,
+            "circuit": self.breaker.state,
+            "failures": self.breaker.failures,
+        }
+
+
+searxng = SearxngClient(
+    base_url=searxng_config.internal_url,
+    timeout=searxng_config.timeout,
+    max_connections=searxng_config.max_connections,
+    max_keepalive=searxng_config.max_keepalive,
+    cache_ttl=searxng_config.cache_ttl,
+    cache_entries=searxng_config.cache_entries,
+    health_timeout=searxng_config.health_timeout,
+    breaker_failures=searxng_config.breaker_failures,
+    breaker_reset=searxng_config.breaker_reset,
+)
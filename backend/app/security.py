@@ -15,17 +15,27 @@ __all__ = [
 ]
 
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Optional, Any
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from jose import JWTError
 from tortoise.exceptions import DoesNotExist
 from app.db.models import User
 from .config import jwt_config
+from .lazy import lazy_import
+
+# jose.jwt(cryptography) 与 passlib 导入较慢，首次签发/校验时再加载
+jwt = lazy_import("jose.jwt")
+passlib_context = lazy_import("passlib.context")
+
+
+@lru_cache(maxsize=1)
+def password_context() -> Any:
+    """bcrypt 密码哈希上下文，首次使用时创建"""
+    return passlib_context.CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
@@ -56,7 +66,7 @@ def verify_password(plain_password: str, password_hash: str) -> bool:
     Returns:
         bool: _description_
     """
-    return pwd_context.verify(plain_password, password_hash)
+    return password_context().verify(plain_password, password_hash)
 
 
 def get_password_hash(password: str) -> str:
@@ -68,7 +78,7 @@ def get_password_hash(password: str) -> str:
     Returns:
         str: _description_
     """
-    return pwd_context.hash(password)
+    return password_context().hash(password)
 
 
 def create_access_token(subject: str,
@@ -0,0 +1,249 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-12-03 16:12:08
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-12-03 16:12:08
+ # @ Description: 导入浏览器书签(Netscape HTML 格式)
+
+ Chrome/Edge/Firefox/Safari 导出的书签文件分块送入 HTMLParser，
+ 每块解析出的文件夹与链接立即交给 BatchImporter 分批写入，内存只保留当前块。
+ 文件夹(H3)对应分类(使用最内层文件夹名，同名文件夹合并)，链接(A)对应网址，
+ 不在任何文件夹中的链接不归入分类；javascript:/place: 等非网址条目跳过。
+ 链接自带的 ICON="data:image/...;base64,..." 图标按内容摘要保存到 icons 目录
+ (相同图标只存一份)，这些网址不再需要联网下载 favicon。
+
+ 用法(backend 目录下):
+    python -m app.tasks.bookmarks bookmarks.html --user admin
+ '''
+
+__all__ = ["BookmarkParser", "save_data_icon", "import_bookmarks",
+           "read_file"]
+
+import base64
+import codecs
+import asyncio
+import hashlib
+import argparse
+import binascii
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from app.config import db_settings
+from app.db.init import init_db, close_db
+from app.db.models import User
+from .importer import BatchImporter
+from .websites import ICONS_DIR, download_favicons
+
+
+# 内嵌图标的大小上限(解码后)
+MAX_ICON_BYTES = 64 * 1024
+# 只接受位图格式：SVG 可以内嵌脚本，经 /api/icons 同源返回会造成存储型 XSS
+ICON_TYPES = {
+    "image/png": "png",
+    "image/x-icon": "ico",
+    "image/vnd.microsoft.icon": "ico",
+    "image/gif": "gif",
+    "image/jpeg": "jpg",
+    "image/webp": "webp",
+}
+# 每次读取的字节数
+CHUNK_SIZE = 256 * 1024
+
+Event = Tuple[str, Dict[str, Any]]
+
+
+class BookmarkParser(HTMLParser):
+    """增量解析 Netscape 书签文件
+
+    每次 feed 后从 events 中取出 ("folder", {...}) 与 ("link", {...})，
+    文件夹事件总在其中的链接之前
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.events: List[Event] = []
+        self.folders = 0
+        # 每层 DL 对应的文件夹 id(根目录为 None)
+        self._stack: List[Optional[int]] = []
+        # H3 之后的第一个 DL 属于该文件夹
+        self._next_folder: Optional[int] = None
+        # 正在读取文本的标签(h3/a/dd)
+        self._tag: Optional[str] = None
+        self._attrs: Dict[str, Optional[str]] = {}
+        self._text: List[str] = []
+        # 链接等到下一个标签再发出，以便带上紧随其后的 DD 描述
+        self._link: Optional[Dict[str, Any]] = None
+
+    def _folder(self) -> Optional[int]:
+        """当前所在的最内层文件夹"""
+        for folder in reversed(self._stack):
+            if folder is not None:
+                return folder
+        return None
+
+    def _emit_link(self) -> None:
+        if self._link is not None:
+            self.events.append(("link", self._link))
+            self._link = None
+
+    def _end_text(self) -> None:
+        """结束当前标签的文本"""
+        tag, self._tag = self._tag, None
+        text = " ".join("".join(self._text).split())
+        self._text = []
+        if tag == "h3":
+            self.folders += 1
+            self._next_folder = self.folders
+            self.events.append(("folder", {
+                "id": self.folders, "name": text,
+                "position": self.folders}))
+        elif tag == "a":
+            self._link = {
+                "name": text,
+                "url": self._attrs.get("href") or "",
+                "icon": self._attrs.get("icon"),
+                "folder": self._folder(),
+                "description": None,
+            }
+        elif tag == "dd" and self._link is not None:
+            self._link["description"] = text or None
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if self._tag is not None:
+            self._end_text()
+        if tag != "dd":
+            self._emit_link()
+        if tag in ("h3", "a", "dd"):
+            self._tag = tag
+            self._attrs = dict(attrs)
+        elif tag == "dl":
+            self._stack.append(self._next_folder)
+            self._next_folder = None
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == self._tag:
+            self._end_text()
+        elif tag == "dl":
+            if self._tag is not None:
+                self._end_text()
+            self._emit_link()
+            if self._stack:
+                self._stack.pop()
+
+    def handle_data(self, data: str) -> None:
+        if self._tag is not None:
+            self._text.append(data)
+
+    def close(self) -> None:
+        super().close()
+        if self._tag is not None:
+            self._end_text()
+        self._emit_link()
+
+    def drain(self) -> List[Event]:
+        """取出已解析的事件"""
+        events, self.events = self.events, []
+        return events
+
+
+def save_data_icon(uri: str, saved: Set[str]) -> Optional[str]:
+    """保存 data URI 图标，返回文件名；saved 为本次已保存的文件名"""
+    header, sep, payload = uri.partition(",")
+    if not sep or not header.startswith("data:") \
+            or not header.endswith(";base64"):
+        return None
+    ext = ICON_TYPES.get(header[5:-7].lower())
+    if ext is None:
+        return None
+    try:
+        data = base64.b64decode(payload, validate=False)
+    except (binascii.Error, ValueError):
+        return None
+    if not data or len(data) > MAX_ICON_BYTES:
+        return None
+    filename = f"{hashlib.blake2b(data, digest_size=16).hexdigest()}.{ext}"
+    if filename not in saved:
+        path = ICONS_DIR / filename
+        if not path.exists():
+            ICONS_DIR.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+        saved.add(filename)
+    return filename
+
+
+def _save_icons(links: List[Dict[str, Any]], saved: Set[str]) -> None:
+    """把一块中链接的内嵌图标替换为文件名(在线程中执行)"""
+    for link in links:
+        if link["icon"]:
+            link["icon"] = save_data_icon(link["icon"], saved)
+
+
+async def import_bookmarks(
+    chunks: AsyncIterator[bytes], importer: BatchImporter
+) -> Dict[str, int]:
+    """逐块解析书签文件并导入，返回统计"""
+    parser = BookmarkParser()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    saved: Set[str] = set()
+    position = 0
+
+    async def apply(events: List[Event]) -> None:
+        nonlocal position
+        links = [data for kind, data in events if kind == "link"]
+        if any(link["icon"] for link in links):
+            await asyncio.to_thread(_save_icons, links, saved)
+        for kind, data in events:
+            if kind == "folder":
+                await importer.add_category(
+                    data["id"], data["name"], sort_order=-data["position"])
+                continue
+            # 列表按 sort_order 降序，保持书签原有顺序
+            position += 1
+            await importer.add_website(
+                data["name"], data["url"], category_key=data["folder"],
+                description=data["description"], sort_order=-position,
+                icon=data["icon"])
+
+    async for chunk in chunks:
+        parser.feed(decoder.decode(chunk))
+        await apply(parser.drain())
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+    await apply(parser.drain())
+    return await importer.finish()
+
+
+async def read_file(path: Path) -> AsyncIterator[bytes]:
+    """分块读取本地文件"""
+    with open(path, "rb") as f:
+        while True:
+            chunk = await asyncio.to_thread(f.read, CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+async def main(args: argparse.Namespace) -> Dict[str, int]:
+    """命令行入口：初始化数据库后导入"""
+    await init_db(config=db_settings.db_config)
+    try:
+        user = await User.get_or_none(username=args.user)
+        if user is None:
+            raise SystemExit(f"用户不存在: {args.user}")
+        importer = BatchImporter(
+            user, args.batch_size, collect_icons=args.icons)
+        stats = await import_bookmarks(read_file(Path(args.file)), importer)
+        await download_favicons(importer.icon_pending)
+        return stats
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("file", help="浏览器导出的书签文件(.html)")
+    parser.add_argument("--user", required=True, help="导入到的用户名")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--icons", action="store_true",
+                        help="导入后为没有内嵌图标的网址下载图标")
+    print(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,29 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-11-24 14:52:31
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-11-24 14:52:31
+ # @ Description: 变更日志维护任务
+ '''
+
+__all__ = ["compact_change_log"]
+
+import asyncio
+from app.config import sync_config
+from app.db.models import ChangeLog
+from app.logging import setup_logging, INFO
+
+
+logger = setup_logging(logger_name=__name__, level=INFO, backup_count=1)
+
+
+async def compact_change_log() -> None:
+    """定期压缩变更日志，随应用生命周期运行直到被取消"""
+    while True:
+        try:
+            result = await ChangeLog.compact(sync_config.tombstone_days)
+            if result["superseded"] or result["purged"]:
+                logger.info("Change log compacted: %s", result)
+        except Exception as e:
+            logger.error("Change log compaction failed: %s", e)
+        await asyncio.sleep(sync_config.compact_interval)
@@ -1,22 +1,225 @@
-"""备份数据"""
+"""备份数据
+
+使用 SQLite 在线备份 API 分步复制(每步 pages 页，步间休眠 sleep 秒)，
+复制过程中写入方只在单步内被阻塞。数据库未变化时跳过备份：
+进程内通过 PRAGMA data_version 判断，跨重启时比较备份内容的 sha256。
+备份文件以 mynavi_backup_ 开头，保留策略只清理这类文件，
+旧版本生成的 backup_*.sqlite3 与手动放入的文件不会被删除。
+"""
+
+__all__ = ["safe_backup", "BackupService", "prune_backups", "backup_service"]
+
+import gzip
+import json
+import shutil
+import sqlite3
+import hashlib
+import threading
 from pathlib import Path
 from datetime import datetime
-import sqlite3
-from app.config import db_settings
+from typing import Dict, List, Optional, Tuple
+from app.config import db_settings, backup_config
+from app.logging import setup_logging, INFO
+
+
+logger = setup_logging(logger_name=__name__, level=INFO, backup_count=1)
+
+BACKUP_PREFIX = "mynavi_backup_"
+TIME_FORMAT = "%Y%m%d_%H%M%S"
+# 记录最近一次备份的校验值
+STATE_FILE = ".last_backup.json"
+
+
+def backup_dir() -> Path:
+    """备份目录"""
+    if backup_config.directory:
+        return Path(backup_config.directory)
+    return Path(db_settings.sqlite_db_path).parent / "backup"
+
+
+def _sha256(path: Path) -> str:
+    """计算文件校验值"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _backup_time(path: Path) -> Optional[datetime]:
+    """从文件名解析备份时间"""
+    stem = path.name[len(BACKUP_PREFIX):].split(".", 1)[0]
+    try:
+        return datetime.strptime(stem, TIME_FORMAT)
+    except ValueError:
+        return None
+
+
+def list_backups(directory: Path) -> List[Tuple[datetime, Path]]:
+    """按时间倒序列出本服务生成的备份文件"""
+    backups = []
+    for path in directory.glob(f"{BACKUP_PREFIX}*.sqlite3*"):
+        created = _backup_time(path)
+        if created is not None:
+            backups.append((created, path))
+    return sorted(backups, reverse=True)
+
+
+def prune_backups(
+    directory: Path, keep_daily: int, keep_weekly: int
+) -> List[Path]:
+    """按保留策略删除旧备份，返回被删除的文件
+
+    保留最近 keep_daily 个自然日中每天最新的一份，以及最近 keep_weekly 个
+    自然周中每周最新的一份，最新的一份始终保留。
+    """
+    backups = list_backups(directory)
+    keep = {backups[0][1]} if backups else set()
+    days, weeks = set(), set()
+    for created, path in backups:
+        day = created.date()
+        week = created.isocalendar()[:2]
+        if day not in days and len(days) < keep_daily:
+            days.add(day)
+            keep.add(path)
+        if week not in weeks and len(weeks) < keep_weekly:
+            weeks.add(week)
+            keep.add(path)
+    removed = []
+    for _, path in backups:
+        if path not in keep:
+            path.unlink(missing_ok=True)
+            removed.append(path)
+    return removed
+
+
+def _copy_database(source: sqlite3.Connection, target: Path) -> None:
+    """分步在线备份"""
+    dest = sqlite3.connect(target)
+    try:
+        with dest:
+            source.backup(dest, pages=backup_config.pages,
+                          sleep=backup_config.sleep)
+    finally:
+        dest.close()
+
+
+def _compress(path: Path) -> Path:
+    """gzip 压缩并删除原文件"""
+    gz_path = path.with_name(path.name + ".gz")
+    with open(path, "rb") as src, gzip.open(gz_path, "wb", 6) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    path.unlink()
+    return gz_path
+
+
+class BackupService:
+    """定时备份服务，在独立的守护线程中运行"""
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._source: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """保持一个长连接，data_version 只在同一连接上可比较"""
+        if self._source is None:
+            self._source = sqlite3.connect(
+                db_settings.sqlite_db_path, check_same_thread=False)
+        return self._source
+
+    def _read_state(self, directory: Path) -> Dict:
+        """读取上次备份记录"""
+        try:
+            return json.loads((directory / STATE_FILE).read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _write_state(self, directory: Path, state: Dict) -> None:
+        """写入备份记录"""
+        (directory / STATE_FILE).write_text(json.dumps(state))
+
+    def backup_once(self, force: bool = False) -> Optional[Path]:
+        """执行一次备份，未变化时返回 None"""
+        if not Path(db_settings.sqlite_db_path).exists():
+            return None
+        source = self._connect()
+        version = source.execute("PRAGMA data_version").fetchone()[0]
+        if not force and version == self._data_version:
+            logger.debug("Database unchanged, skip backup")
+            return None
+
+        directory = backup_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        now = datetime.now().strftime(TIME_FORMAT)
+        target = directory / f"{BACKUP_PREFIX}{now}.sqlite3"
+        tmp = target.with_name(target.name + ".tmp")
+        _copy_database(source, tmp)
+
+        checksum = _sha256(tmp)
+        state = self._read_state(directory)
+        if not force and checksum == state.get("sha256"):
+            tmp.unlink()
+            self._data_version = version
+            logger.info("Database unchanged since %s, skip backup",
+                        state.get("file"))
+            return None
+
+        tmp.replace(target)
+        if backup_config.compress:
+            target = _compress(target)
+        self._write_state(directory, {"file": target.name, "sha256": checksum})
+        self._data_version = version
+        removed = prune_backups(
+            directory, backup_config.keep_daily, backup_config.keep_weekly)
+        logger.info("Backup created: %s (pruned %d)", target.name, len(removed))
+        return target
+
+    def run(self) -> None:
+        """循环备份直到 stop，启动后先等待 startup_delay 秒"""
+        try:
+            self._stop.wait(backup_config.startup_delay)
+            while not self._stop.is_set():
+                try:
+                    self.backup_once()
+                except (sqlite3.Error, OSError) as e:
+                    logger.error("Backup failed: %s", e)
+                self._stop.wait(backup_config.interval)
+        finally:
+            self.close()
+
+    def start(self) -> None:
+        """启动备份线程，不占用共享线程池"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self.run, name="db-backup", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """停止循环"""
+        self._stop.set()
+
+    def close(self) -> None:
+        """关闭源数据库连接"""
+        if self._source is not None:
+            self._source.close()
+            self._source = None
+
+
+backup_service = BackupService()
 
 
-def safe_backup() -> None:
-    """热备份sqlite"""
-    backup_path = Path(db_settings.sqlite_db_path).parent / "backup"
-    backup_path.mkdir(parents=True, exist_ok=True)
-    now = datetime.now().strftime("%Y%m%d_%H%M%S")
-    source = sqlite3.connect(db_settings.sqlite_db_path)
-    backup = sqlite3.connect(f"{backup_path}/backup_{now}.sqlite3")
-    with backup:
-        source.backup(backup)
-    backup.close()
-    source.close()
+def safe_backup() -> Optional[Path]:
+    """热备份sqlite(单次)"""
+    service = BackupService()
+    try:
+        return service.backup_once(force=True)
+    finally:
+        service.close()
 
 
 if __name__ == "__main__":
-    safe_backup()
\ No newline at end of file
+    safe_backup()
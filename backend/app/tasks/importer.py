@@ -0,0 +1,169 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-12-03 09:36:14
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-12-03 09:36:14
+ # @ Description: 分批导入分类与网址
+
+ 各种来源(OneNav 数据库、浏览器书签等)逐条交给 BatchImporter，
+ 累积到 batch_size 条后在一个事务内 bulk_create 并记录变更日志，
+ 内存中只保留当前批次与源分类到新分类 id 的映射。
+ 分类按名称复用已有分类(名称全局唯一)；网址按规范化摘要去重，
+ 每批只做一次 IN 查询，与库中已有或本次已导入的网址重复时跳过。
+ '''
+
+__all__ = ["BatchImporter"]
+
+from collections import Counter
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from tortoise.transactions import in_transaction
+from app.db.models import Category, ChangeLog, User, Website, DEFAULT_ICON
+from app.events import publish_change
+from app.logging import setup_logging, INFO
+from app.urls import url_hash, validate_url
+
+
+logger = setup_logging(logger_name=__name__, level=INFO, backup_count=1)
+
+NAME_LENGTH = 128
+URL_LENGTH = 255
+CATEGORY_NAME_LENGTH = 64
+
+
+class BatchImporter:
+    """分批写入分类与网址"""
+
+    def __init__(self, user: User, batch_size: int = 500,
+                 collect_icons: bool = False):
+        self.user = user
+        self.batch_size = batch_size
+        # 记录没有图标的新网址 id(icon_pending)，由调用方下载 favicon
+        self.collect_icons = collect_icons
+        # 源分类键 -> 分类 id
+        self.category_ids: Dict[Hashable, int] = {}
+        self._categories: List[Tuple[Hashable, Dict[str, Any]]] = []
+        self._websites: List[Tuple[Optional[Hashable], Dict[str, Any]]] = []
+        self.icon_pending: List[int] = []
+        self.stats: Counter = Counter(
+            categories=0, reused_categories=0, websites=0,
+            duplicates=0, skipped=0)
+
+    async def add_category(
+        self, key: Hashable, name: str, description: Optional[str] = None,
+        icon: str = "bookmark", sort_order: int = 0
+    ) -> None:
+        """加入一个分类，key 为来源中的分类标识，供网址引用"""
+        name = (name or "").strip()[:CATEGORY_NAME_LENGTH]
+        if not name:
+            self.stats["skipped"] += 1
+            return
+        self._categories.append((key, {
+            "name": name,
+            "description": description or None,
+            "icon": icon or "bookmark",
+            "sort_order": sort_order or 0,
+        }))
+        if len(self._categories) >= self.batch_size:
+            await self.flush_categories()
+
+    async def add_website(
+        self, name: str, url: str, category_key: Optional[Hashable] = None,
+        back_url: Optional[str] = None, description: Optional[str] = None,
+        sort_order: int = 0, icon: Optional[str] = None
+    ) -> None:
+        """加入一个网址，category_key 为 add_category 时的 key"""
+        url = (url or "").strip()
+        back_url = (back_url or "").strip() or None
+        # 与接口相同的校验，非法网址写入后会让检测、图标下载等任务出错
+        url = validate_url(url) if "://" in url else None
+        if not url or len(url) > URL_LENGTH:
+            self.stats["skipped"] += 1
+            return
+        if back_url:
+            back_url = validate_url(back_url)
+        if back_url and len(back_url) > URL_LENGTH:
+            back_url = None
+        if category_key is not None and category_key not in self.category_ids \
+                and self._categories:
+            # 引用的分类还在缓冲区，先写入分类以取得 id
+            await self.flush_categories()
+        self._websites.append((category_key, {
+            "name": ((name or "").strip() or url)[:NAME_LENGTH],
+            "url": url,
+            "back_url": back_url,
+            "description": description or None,
+            "sort_order": sort_order or 0,
+            "icon": icon or DEFAULT_ICON,
+        }))
+        if len(self._websites) >= self.batch_size:
+            await self.flush_websites()
+
+    async def flush_categories(self) -> None:
+        """写入缓冲区中的分类，同名分类复用已有记录"""
+        pending, self._categories = self._categories, []
+        if not pending:
+            return
+        names = {data["name"] for _, data in pending}
+        async with in_transaction("default"):
+            existing = dict(await Category.filter(
+                name__in=names).values_list("name", "id"))
+            new: Dict[str, Dict[str, Any]] = {}
+            for _, data in pending:
+                if data["name"] not in existing:
+                    new.setdefault(data["name"], data)
+            if new:
+                await Category.bulk_create([
+                    Category(created_user=self.user, **data)
+                    for data in new.values()])
+                # bulk_create 不回填主键，按唯一的名称取回
+                created = dict(await Category.filter(
+                    name__in=list(new)).values_list("name", "id"))
+                await ChangeLog.record(Category, created.values())
+                existing.update(created)
+        for key, data in pending:
+            self.category_ids[key] = existing[data["name"]]
+        self.stats["categories"] += len(new)
+        self.stats["reused_categories"] += len(pending) - len(new)
+        publish_change("category", [existing[name] for name in new])
+
+    async def flush_websites(self) -> None:
+        """写入缓冲区中的网址，跳过重复网址"""
+        pending, self._websites = self._websites, []
+        if not pending:
+            return
+        hashes = [url_hash(data["url"]) for _, data in pending]
+        # 库中已有的网址(包括之前批次导入的)
+        seen = set(await Website.existing_hashes(hashes, self.user))
+        records = []
+        for (category_key, data), digest in zip(pending, hashes):
+            if digest in seen:
+                self.stats["duplicates"] += 1
+                continue
+            seen.add(digest)
+            records.append(Website(
+                owner=self.user, url_hash=digest,
+                category_id=self.category_ids.get(category_key), **data))
+        if not records:
+            return
+        async with in_transaction("default"):
+            await Website.bulk_create(records)
+            # bulk_create 不回填主键；摘要在同一用户下唯一，按摘要取回新记录
+            rows = await Website.filter(
+                owner_id=self.user.id,
+                url_hash__in=[r.url_hash for r in records]
+            ).order_by("id").values_list("id", "icon")
+            ids = [website_id for website_id, _ in rows]
+            await ChangeLog.record(Website, ids)
+        self.stats["websites"] += len(ids)
+        if self.collect_icons:
+            self.icon_pending.extend(
+                website_id for website_id, icon in rows
+                if icon == DEFAULT_ICON)
+        publish_change("website", ids)
+
+    async def finish(self) -> Dict[str, int]:
+        """写入剩余数据，返回统计"""
+        await self.flush_categories()
+        await self.flush_websites()
+        logger.info("导入完成: %s", dict(self.stats))
+        return dict(self.stats)
@@ -0,0 +1,280 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-12-01 09:26:40
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-12-01 09:26:40
+ # @ Description: 网址可用性检测任务
+
+ 网址按 id 分页读取后放入有界队列，由固定数量的协程取出检测，慢主机只占住
+ 自己的协程；共用一个 httpx 连接池，总并发与单主机并发分别限制，
+ 同一主机的每个请求(包括 HEAD 之后的 GET)按预约的时间依次发出，
+ 相邻两次之间保持最小间隔。先发 HEAD，服务端不支持或返回错误时
+ 再用 GET(只读响应头)确认；主链接失效时同时检测备用链接，
+ 前端据此直接跳转备用链接。结果写入 link_checks 表，不影响网址的变更日志。
+ '''
+
+from __future__ import annotations
+
+__all__ = ["LinkChecker", "link_checker", "run_link_checker"]
+
+import time
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from app.config import link_check_config
+from app.db.models import LinkCheck, Website
+from app.lazy import lazy_import
+from app.logging import setup_logging, INFO
+
+
+httpx = lazy_import("httpx")
+
+logger = setup_logging(logger_name=__name__, level=INFO, backup_count=1)
+
+# 服务端可达但拒绝匿名/爬虫访问，不视为失效
+ALIVE_STATUSES = {401, 403, 429}
+# HEAD 明确返回不存在时不再用 GET 重试
+GONE_STATUSES = {404, 410}
+
+
+class _Host:
+    """单个主机的并发与间隔控制"""
+
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        # 下一个请求最早可以发出的时间
+        self.next_at = 0.0
+
+    def reserve(self, delay: float) -> float:
+        """预约下一次请求，返回需要等待的秒数
+
+        预约在同一个事件循环步骤内完成，同一主机的并发请求依次排开
+        """
+        now = time.monotonic()
+        start = max(now, self.next_at)
+        self.next_at = start + delay
+        return start - now
+
+
+class LinkChecker:
+    """批量检测网址可用性"""
+
+    def __init__(self, concurrency: int, per_host: int, host_delay: float,
+                 timeout: float, user_agent: str,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.host_delay = host_delay
+        self.timeout = timeout
+        self.user_agent = user_agent
+        # 测试时可传入模拟源站的传输层
+        self.transport = transport
+        self._hosts: Dict[str, _Host] = {}
+        self._slots = asyncio.Semaphore(concurrency)
+        self._task: Optional[asyncio.Task] = None
+        self.progress: Dict[str, int] = {"checked": 0, "dead": 0}
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    @property
+    def running(self) -> bool:
+        """是否正在检测"""
+        return self._task is not None and not self._task.done()
+
+    def _client(self) -> httpx.AsyncClient:
+        """本轮检测共用的连接池"""
+        limits = httpx.Limits(max_connections=self.concurrency,
+                              max_keepalive_connections=self.concurrency)
+        return httpx.AsyncClient(
+            timeout=self.timeout, limits=limits, follow_redirects=True,
+            headers={"User-Agent": self.user_agent},
+            transport=self.transport)
+
+    async def _request(self, client: httpx.AsyncClient, method: str,
+                       url: str, host: _Host) -> Tuple[int, float]:
+        """按主机预约的时间发出请求，返回 (状态码, 耗时)，GET 只读取响应头"""
+        wait = host.reserve(self.host_delay)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        # 先等主机间隔再占用总并发，同一主机的等待不占用连接
+        async with self._slots:
+            start = time.perf_counter()
+            async with client.stream(method, url) as response:
+                return response.status_code, time.perf_counter() - start
+
+    async def check_url(self, client: httpx.AsyncClient,
+                        url: str) -> Dict[str, Any]:
+        """检测单个链接，遵守单主机并发与请求间隔"""
+        name = (urlsplit(url).hostname or "").lower()
+        host = self._hosts.setdefault(name, _Host(self.per_host))
+        async with host.semaphore:
+            status, error, latency = await self._probe(client, url, host)
+        ok = status is not None and (status < 400 or status in ALIVE_STATUSES)
+        return {
+            "ok": ok,
+            "status_code": status,
+            "latency_ms": round(latency * 1000),
+            "error": error,
+        }
+
+    async def _probe(
+        self, client: httpx.AsyncClient, url: str, host: _Host
+    ) -> Tuple[Optional[int], Optional[str], float]:
+        """HEAD 失败时回退到 GET，返回 (状态码, 错误, 最后一次请求耗时)"""
+        status, error, latency = None, None, 0.0
+        try:
+            try:
+                status, latency = await self._request(
+                    client, "HEAD", url, host)
+            except httpx.RemoteProtocolError:
+                status = None
+            if status is None or (status >= 400
+                                  and status not in GONE_STATUSES):
+                status, latency = await self._request(
+                    client, "GET", url, host)
+        except httpx.HTTPError as e:
+            error = type(e).__name__ + (f": {e}" if str(e) else "")
+        except (httpx.InvalidURL, ValueError) as e:
+            # 非法网址(httpx.InvalidURL 不是 HTTPError 的子类)
+            error = type(e).__name__ + (f": {e}" if str(e) else "")
+        return status, error, latency
+
+    async def check_website(self, client: httpx.AsyncClient,
+                            website: Dict[str, Any]) -> Dict[str, Any]:
+        """检测网址，主链接失效时检测备用链接
+
+        单个网址的任何异常(如无法解析的网址)都记为检测失败，不中断整轮检测
+        """
+        try:
+            result = await self.check_url(client, website["url"])
+            if not result["ok"] and website.get("back_url"):
+                back = await self.check_url(client, website["back_url"])
+                result["back_ok"] = back["ok"]
+        except Exception as e:
+            logger.warning("网址 %s 检测出错: %r", website["id"], e)
+            result = {
+                "ok": False,
+                "status_code": None,
+                "latency_ms": None,
+                "error": type(e).__name__ + (f": {e}" if str(e) else ""),
+            }
+        return dict(result, website_id=website["id"])
+
+    async def _produce(self, queue: asyncio.Queue, batch_size: int) -> None:
+        """按 id 分页读取网址放入队列"""
+        last_id = 0
+        while True:
+            batch: List[Dict[str, Any]] = await Website.filter(
+                id__gt=last_id).order_by("id").limit(batch_size).values(
+                "id", "url", "back_url")
+            if not batch:
+                return
+            last_id = batch[-1]["id"]
+            for website in batch:
+                await queue.put(website)
+
+    async def _consume(self, client: httpx.AsyncClient, queue: asyncio.Queue,
+                       results: List[Dict[str, Any]],
+                       batch_size: int) -> None:
+        """从队列取网址检测，结果攒够一批后保存"""
+        while True:
+            website = await queue.get()
+            try:
+                if website is None:
+                    return
+                result = await self.check_website(client, website)
+                results.append(result)
+                self.progress["checked"] += 1
+                self.progress["dead"] += not result["ok"]
+                if len(results) >= batch_size:
+                    batch = results[:]
+                    results.clear()
+                    await LinkCheck.save_results(batch)
+            finally:
+                queue.task_done()
+
+    async def check_all(self, batch_size: int = 500) -> Dict[str, Any]:
+        """检测全部网址并分批保存结果"""
+        started = time.perf_counter()
+        self.progress = {"checked": 0, "dead": 0}
+        self._hosts.clear()
+        # 协程数多于总并发，部分协程等待主机间隔时连接仍能用满
+        workers = self.concurrency * 4
+        queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+        results: List[Dict[str, Any]] = []
+        async with self._client() as client:
+            consumers = [
+                asyncio.create_task(
+                    self._consume(client, queue, results, batch_size))
+                for _ in range(workers)]
+            try:
+                await self._produce(queue, batch_size)
+                for _ in consumers:
+                    await queue.put(None)
+                await asyncio.gather(*consumers)
+            finally:
+                for consumer in consumers:
+                    consumer.cancel()
+        if results:
+            await LinkCheck.save_results(results)
+        seconds = time.perf_counter() - started
+        self.last_run = dict(
+            self.progress, seconds=round(seconds, 2),
+            links_per_sec=round(self.progress["checked"] / seconds, 1)
+            if seconds else None,
+            finished_at=time.time())
+        logger.info("网址检测完成: %s", self.last_run)
+        return self.last_run
+
+    def start(self, batch_size: int = 500) -> bool:
+        """在后台开始一轮检测，已在运行时返回 False"""
+        if self.running:
+            return False
+        self._task = asyncio.create_task(self.check_all(batch_size))
+        self._task.add_done_callback(self._finished)
+        return True
+
+    @staticmethod
+    def _finished(task: asyncio.Task) -> None:
+        """记录后台检测异常"""
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("网址检测失败: %s", task.exception())
+
+    async def wait(self) -> None:
+        """等待当前检测结束(异常已由回调记录)"""
+        if self._task is None:
+            return
+        try:
+            await asyncio.shield(self._task)
+        except asyncio.CancelledError:
+            if not self._task.cancelled():
+                raise
+        except Exception:
+            pass
+
+    def stop(self) -> None:
+        """取消正在进行的检测"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+link_checker = LinkChecker(
+    concurrency=link_check_config.concurrency,
+    per_host=link_check_config.per_host,
+    host_delay=link_check_config.host_delay,
+    timeout=link_check_config.timeout,
+    user_agent=link_check_config.user_agent,
+)
+
+
+async def run_link_checker() -> None:
+    """定期检测全部网址，随应用生命周期运行直到被取消"""
+    await asyncio.sleep(link_check_config.startup_delay)
+    while True:
+        link_checker.start(link_check_config.batch_size)
+        try:
+            await link_checker.wait()
+        except asyncio.CancelledError:
+            link_checker.stop()
+            raise
+        await asyncio.sleep(link_check_config.interval)
@@ -0,0 +1,55 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-12-05 10:12:36
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-12-05 10:12:36
+ # @ Description: 多 worker 之间的定时任务锁
+
+ 定时备份、网址检测、变更日志压缩在同一台机器上只需要一个 worker 执行。
+ 各 worker 启动时对运行时目录下的锁文件加非阻塞排他锁，拿到锁的 worker 运行任务；
+ 进程退出(包括被杀死)时锁由系统释放，gunicorn 拉起的新 worker 启动时重新获取。
+ 单 worker 运行或系统不支持 fcntl 时总是获得锁。
+ '''
+
+__all__ = ["acquire_task_lock", "release_task_locks"]
+
+import os
+from typing import Dict
+from app.config import system_settings
+from app.logging import setup_logging, INFO
+
+try:
+    import fcntl
+except ImportError:  # Windows 下没有 fcntl
+    fcntl = None
+
+
+logger = setup_logging(logger_name=__name__, level=INFO, backup_count=1)
+
+# 任务名 -> 持有锁的文件描述符
+_held: Dict[str, int] = {}
+
+
+def acquire_task_lock(name: str) -> bool:
+    """尝试获取任务锁，本进程应运行该任务时返回 True"""
+    if fcntl is None or not system_settings.multi_worker:
+        return True
+    if name in _held:
+        return True
+    fd = os.open(system_settings.runtime_path(f"{name}.lock"),
+                 os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return False
+    _held[name] = fd
+    logger.info("Worker %s runs task %s", os.getpid(), name)
+    return True
+
+
+def release_task_locks() -> None:
+    """释放本进程持有的全部任务锁"""
+    for fd in _held.values():
+        os.close(fd)
+    _held.clear()
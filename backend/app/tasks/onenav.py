@@ -0,0 +1,114 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-12-03 10:24:51
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-12-03 10:24:51
+ # @ Description: 从 OneNav 数据库直接导入
+
+ 只读打开 OneNav 的 .db3，用游标按 fetchmany 分批读取 on_categorys 与
+ on_links(在线程中执行，不阻塞事件循环)，逐条交给 BatchImporter 分批写入，
+ 不生成中间 JSON 文件，内存占用与数据量无关。
+
+ 用法(backend 目录下):
+    python -m app.tasks.onenav onenav.db3 --user admin
+    python -m app.tasks.onenav onenav.db3 --user admin --batch-size 1000 --icons
+ '''
+
+__all__ = ["iter_onenav_rows", "import_onenav"]
+
+import asyncio
+import sqlite3
+import argparse
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict
+from app.config import db_settings
+from app.db.init import init_db, close_db
+from app.db.models import User
+from .importer import BatchImporter
+from .websites import download_favicons
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    """只读打开 OneNav 数据库"""
+    if not Path(db_path).exists():
+        raise FileNotFoundError(f"数据库文件不存在: {db_path}")
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True,
+                           check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.text_factory = lambda b: b.decode("utf-8", errors="ignore")
+    return conn
+
+
+async def iter_onenav_rows(
+    conn: sqlite3.Connection, table: str, batch_size: int = 500
+) -> AsyncIterator[Dict[str, Any]]:
+    """按 id 顺序逐行读取 OneNav 表"""
+    cursor = conn.execute(f'SELECT * FROM "{table}" ORDER BY id')
+    try:
+        while True:
+            rows = await asyncio.to_thread(cursor.fetchmany, batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(row)
+    finally:
+        cursor.close()
+
+
+def _weight(value: Any) -> int:
+    """OneNav 的权重(越大越靠前)即排序值"""
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+async def import_onenav(
+    db_path: str, user: User, batch_size: int = 500,
+    fetch_icons: bool = False
+) -> Dict[str, int]:
+    """把 OneNav 的分类和链接导入到指定用户"""
+    conn = _connect(db_path)
+    importer = BatchImporter(user, batch_size, collect_icons=fetch_icons)
+    try:
+        async for cat in iter_onenav_rows(conn, "on_categorys", batch_size):
+            await importer.add_category(
+                cat["id"], cat.get("name", ""),
+                description=cat.get("description"),
+                sort_order=_weight(cat.get("weight")))
+        await importer.flush_categories()
+        async for link in iter_onenav_rows(conn, "on_links", batch_size):
+            await importer.add_website(
+                link.get("title", ""), link.get("url", ""),
+                category_key=link.get("fid"),
+                back_url=link.get("url_standby"),
+                description=link.get("description"),
+                sort_order=_weight(link.get("weight")))
+        stats = await importer.finish()
+    finally:
+        conn.close()
+    await download_favicons(importer.icon_pending)
+    return stats
+
+
+async def main(args: argparse.Namespace) -> Dict[str, int]:
+    """命令行入口：初始化数据库后导入"""
+    await init_db(config=db_settings.db_config)
+    try:
+        user = await User.get_or_none(username=args.user)
+        if user is None:
+            raise SystemExit(f"用户不存在: {args.user}")
+        return await import_onenav(
+            args.db, user, args.batch_size, fetch_icons=args.icons)
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("db", help="OneNav 数据库文件(onenav.db3)")
+    parser.add_argument("--user", required=True, help="导入到的用户名")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--icons", action="store_true",
+                        help="导入后下载网址图标")
+    print(asyncio.run(main(parser.parse_args())))
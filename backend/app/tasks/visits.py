@@ -0,0 +1,162 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-12-02 10:12:37
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-12-02 10:12:37
+ # @ Description: 访问计数(内存累加，定期批量写入)
+
+ 访问上报只在内存中累加，后台任务每隔 flush_interval 秒把累积的次数
+ 合并写入数据库(按增量分组的少量 UPDATE)，点击不会逐条产生写入。
+ 常用/最近访问列表由内存中的前 K 项维护：每次写入后从数据库刷新
+ (包含其他 worker 写入的次数)，查询时再叠加本进程尚未写入的增量。
+ '''
+
+__all__ = ["VisitCounter", "visit_counter", "run_visit_flusher",
+           "stop_visit_flusher"]
+
+import time
+import heapq
+import asyncio
+import contextlib
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from tortoise import timezone
+from app.config import visit_config
+from app.db.models import WebsiteVisit
+from app.logging import setup_logging, INFO
+
+
+logger = setup_logging(logger_name=__name__, level=INFO, backup_count=1)
+
+
+class VisitCounter:
+    """进程内访问计数与前 K 项视图"""
+
+    def __init__(self, top_k: int, max_pending: int):
+        self.top_k = top_k
+        self.max_pending = max_pending
+        # 尚未写入数据库的增量
+        self.pending: Counter = Counter()
+        self.last_visit: Optional[datetime] = None
+        # 最近一次从数据库刷新的访问次数前 K 项
+        self.most: Dict[int, int] = {}
+        # 最近访问 {网址id: 时间戳}，按时间升序
+        self.recent: "OrderedDict[int, float]" = OrderedDict()
+        self.flushed = 0
+        self.dropped = 0
+        self._wakeup = asyncio.Event()
+
+    def hit(self, website_id: int) -> None:
+        """记录一次访问(只操作内存)"""
+        if website_id not in self.pending and \
+                len(self.pending) >= self.max_pending:
+            # 累积过多时丢弃新网址的计数并提前写入
+            self.dropped += 1
+            self._wakeup.set()
+            return
+        self.pending[website_id] += 1
+        self.last_visit = timezone.now()
+        self.recent[website_id] = time.time()
+        self.recent.move_to_end(website_id)
+        while len(self.recent) > self.top_k:
+            self.recent.popitem(last=False)
+        if len(self.pending) >= self.max_pending:
+            self._wakeup.set()
+
+    def counts(self) -> Dict[int, int]:
+        """前 K 项访问次数叠加本进程未写入的增量"""
+        merged = dict(self.most)
+        for website_id, n in self.pending.items():
+            merged[website_id] = merged.get(website_id, 0) + n
+        return merged
+
+    def most_used(self, limit: int) -> List[Tuple[int, int]]:
+        """访问次数最多的 (网址id, 次数)"""
+        return heapq.nlargest(limit, self.counts().items(),
+                              key=lambda item: (item[1], -item[0]))
+
+    def recently_used(self, limit: int) -> List[Tuple[int, float]]:
+        """最近访问的 (网址id, 时间戳)，最新的在前"""
+        return list(reversed(self.recent.items()))[:limit]
+
+    async def flush(self) -> int:
+        """把累积的增量写入数据库，失败时放回等待下次写入"""
+        if not self.pending:
+            return 0
+        counts, self.pending = self.pending, Counter()
+        visited_at = self.last_visit or timezone.now()
+        try:
+            written = await WebsiteVisit.add_counts(dict(counts), visited_at)
+        except BaseException:
+            # 包括关闭时被取消的情况
+            self.pending.update(counts)
+            raise
+        self.flushed += written
+        return written
+
+    async def refresh(self) -> None:
+        """从数据库刷新前 K 项"""
+        rows = await WebsiteVisit.top("most", self.top_k)
+        self.most = {website_id: count for website_id, count, _ in rows}
+        recent = dict(self.recent)
+        for website_id, _, at in await WebsiteVisit.top("recent", self.top_k):
+            if at is not None:
+                recent[website_id] = max(recent.get(website_id, 0),
+                                         at.timestamp())
+        latest = heapq.nlargest(self.top_k, recent.items(),
+                                key=lambda item: item[1])
+        self.recent = OrderedDict(reversed(latest))
+
+    async def run(self, interval: float) -> None:
+        """定期写入并刷新，随应用生命周期运行直到被取消"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+                await self.refresh()
+            except Exception as e:
+                logger.error("访问计数写入失败: %s", e)
+
+    def stats(self) -> Dict[str, int]:
+        """计数统计"""
+        return {
+            "pending": len(self.pending),
+            "pending_visits": sum(self.pending.values()),
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+        }
+
+
+visit_counter = VisitCounter(
+    top_k=visit_config.top_k,
+    max_pending=visit_config.max_pending,
+)
+
+
+async def run_visit_flusher() -> None:
+    """启动时加载前 K 项，然后定期写入"""
+    try:
+        await visit_counter.refresh()
+    except Exception as e:
+        logger.error("加载访问统计失败: %s", e)
+    await visit_counter.run(visit_config.flush_interval)
+
+
+async def stop_visit_flusher(task: asyncio.Task) -> None:
+    """停止后台写入并写入剩余计数
+
+    先等被取消的任务结束：进行中的写入回滚后会把计数放回 pending，
+    之后的最后一次写入才能包含这些计数
+    """
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+    try:
+        await visit_counter.flush()
+    except Exception as e:
+        logger.error("访问计数写入失败: %s", e)
@@ -6,30 +6,58 @@
  # @ Description:
  '''
 
-__all__ = ["download_favicon", "restore_data"]
+from __future__ import annotations
 
+__all__ = ["download_favicon", "download_favicons",
+           "restore_data", "remove_unused_icons"]
+
+import asyncio
+from contextlib import asynccontextmanager
 from os import chmod
 from pathlib import Path
-from typing import Dict
+from typing import AsyncIterator, Dict, List, Optional
 from uuid import uuid4
 from urllib.parse import urljoin
-import aiofiles
 from fastapi import HTTPException
-import httpx
-from app.db.models import Website, Category, User
+from app.db.models import Website, Category, User, DEFAULT_ICON
+from app.events import publish_change
+from app.lazy import lazy_import
 from app.logging import setup_logging, INFO
+from app.urls import url_hash
+
+aiofiles = lazy_import("aiofiles")
+httpx = lazy_import("httpx")
 
 logger = setup_logging(logger_name=__name__, level=INFO, backup_count=1)
 
+ICONS_DIR = Path("icons")
+
+
+# 批量下载图标时的并发数
+FAVICON_CONCURRENCY = 8
+
+
+@asynccontextmanager
+async def _http_client(
+    client: Optional[httpx.AsyncClient] = None
+) -> AsyncIterator[httpx.AsyncClient]:
+    """复用传入的客户端，未传入时临时创建"""
+    if client is not None:
+        yield client
+        return
+    async with httpx.AsyncClient(timeout=10.0) as new_client:
+        yield new_client
+
 
 async def get_favicon(
     favicon_url: str,
     filename: str,
     file_path: str,
-    website: Website
+    website: Website,
+    client: Optional[httpx.AsyncClient] = None
 ) -> None:
     """下载图标"""
-    async with httpx.AsyncClient(timeout=10.0) as client:
+    async with _http_client(client) as client:
         try:
             response = await client.get(favicon_url)
             if response.status_code == 200:
@@ -45,7 +73,7 @@ async def get_favicon(
 
                 # 更新数据库中的icon字段
                 website.icon = filename
-                await website.save()
+                await website.save(update_fields=["icon"])
                 logger.info("网站 %s 的图标已保存: %s", website.id, website.icon)
             else:
                 raise HTTPException(status_code=response.status_code, detail="下载网站图标失败")
@@ -53,6 +81,36 @@ async def get_favicon(
             logger.error("下载网站 %s 的图标时出错: %s", website.id, e)
 
 
+async def fetch_favicon(
+    w: Website, client: Optional[httpx.AsyncClient] = None
+) -> None:
+    """为单个网站获取并保存favicon"""
+    # 确保icons文件夹存在
+    ICONS_DIR.mkdir(parents=True, exist_ok=True)
+
+    # 生成唯一的文件名
+    filename = f"{uuid4().hex}.ico"
+    file_path = ICONS_DIR / filename
+
+    # 尝试获取favicon，先尝试主URL，如果失败则尝试back_url
+    favicon_url = await get_favicon_url(str(w.url), client=client)
+
+    # 如果主URL获取favicon失败，且存在back_url，则尝试back_url
+    if not favicon_url and w.back_url:
+        logger.info(
+            "尝试使用备用链接获取网站 %s 的图标: %s", w.id, w.back_url)
+        favicon_url = await get_favicon_url(str(w.back_url), client=client)
+    if favicon_url:
+        # 下载favicon
+        await get_favicon(
+            favicon_url=favicon_url, filename=filename,
+            file_path=file_path, website=w, client=client)
+    else:
+        w.icon = DEFAULT_ICON
+        await w.save(update_fields=["icon"])
+        logger.info("未找到网站 %s 的图标", w.id)
+
+
 async def download_favicon(website_id: int):
     """
     后台任务：下载网站的favicon并保存到本地
@@ -63,42 +121,46 @@ async def download_favicon(website_id: int):
         if not w:
             logger.error("未找到网站 %s", website_id)
             return
+        await fetch_favicon(w)
+        publish_change("website", [w.id])
 
-        # 确保icons文件夹存在
-        icons_dir = Path("icons")
-        icons_dir.mkdir(parents=True, exist_ok=True)
-
-        # 生成唯一的文件名
-        filename = f"{uuid4().hex}.ico"
-        file_path = icons_dir / filename
-
-        # 尝试获取favicon，先尝试主URL，如果失败则尝试back_url
-        favicon_url = await get_favicon_url(str(w.url))
-
-        # 如果主URL获取favicon失败，且存在back_url，则尝试back_url
-        if not favicon_url and w.back_url:
-            logger.info(
-                "尝试使用备用链接获取网站 %s 的图标: %s", website_id, w.back_url)
-            favicon_url = await get_favicon_url(str(w.back_url))
-        if favicon_url:
-            # 下载favicon
-            await get_favicon(
-                favicon_url=favicon_url, filename=filename,
-                file_path=file_path, website=w)
-        else:
-            w.icon = "default.webp"
-            await w.save()
-            logger.info("未找到网站 %s 的图标", website_id)
-
-    except HTTPException as e:
+    except (HTTPException, httpx.HTTPError) as e:
         logger.error("下载网站 %s 图标任务出错: %s", website_id, e)
 
 
-async def get_favicon_url(base_url: str) -> str | None:
+async def download_favicons(
+    website_ids: List[int], concurrency: int = FAVICON_CONCURRENCY
+) -> None:
+    """
+    后台任务：批量下载网站的favicon，共用一个连接池并限制并发
+    """
+    if not website_ids:
+        return
+    websites = await Website.filter(id__in=website_ids)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _one(w: Website, client: httpx.AsyncClient) -> None:
+        async with semaphore:
+            try:
+                await fetch_favicon(w, client=client)
+            except (HTTPException, httpx.HTTPError) as e:
+                logger.error("下载网站 %s 图标任务出错: %s", w.id, e)
+
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=10.0, limits=limits) as client:
+        await asyncio.gather(*(_one(w, client) for w in websites))
+    publish_change("website", [w.id for w in websites])
+    logger.info("批量下载图标完成: %d 个网站", len(websites))
+
+
+async def get_favicon_url(
+    base_url: str, client: Optional[httpx.AsyncClient] = None
+) -> str | None:
     """
     获取网站的favicon URL
     """
-    async with httpx.AsyncClient(timeout=10.0) as client:
+    async with _http_client(client) as client:
         # 首先尝试常见的favicon路径
         common_paths = [
             '/favicon.ico',
@@ -120,6 +182,19 @@ async def get_favicon_url(base_url: str) -> str | None:
     return None
 
 
+async def remove_unused_icons(icons: List[Optional[str]]) -> None:
+    """
+    后台任务：删除已无网址引用的图标文件
+    """
+    for icon in await Website.unused_icons(icons):
+        # 仅按文件名处理，避免越出icons目录
+        icon_file = ICONS_DIR / Path(icon).name
+        try:
+            icon_file.unlink(missing_ok=True)
+        except OSError as e:
+            logger.error("删除图标文件失败 %s: %s", icon_file, e)
+
+
 async def restore_data(data: Dict, user: User) -> None:
     """恢复数据的后台任务"""
     imported_categories = 0
@@ -147,32 +222,34 @@ async def restore_data(data: Dict, user: User) -> None:
 
         # 导入网站数据
     imported_website_ids = []  # 记录导入的网站ID，用于后台下载图标
-    for w in data.get("websites", []):
-        # 检查是否已存在同名网站
-        existing_website = await Website.filter(
+    websites = [w for w in data.get("websites", []) if w.get("url")]
+    hashes = [url_hash(w["url"]) for w in websites]
+    # 一次查询取回已存在的网址，与文件内重复的网址一起跳过
+    seen = set(await Website.existing_hashes(hashes, user))
+    for w, digest in zip(websites, hashes):
+        if digest in seen:
+            continue
+        seen.add(digest)
+        # 映射分类ID
+        category_id = None
+        if w.get("category_id") and w["category_id"] in cid_mapping:
+            category_id = cid_mapping[w["category_id"]]
+
+        new_website = await Website.create(
             name=w["name"],
-            owner_id=user.id
-        ).first()
-
-        if not existing_website:
-            # 映射分类ID
-            category_id = None
-            if w.get("category_id") and w["category_id"] in cid_mapping:
-                category_id = cid_mapping[w["category_id"]]
-
-            new_website = await Website.create(
-                name=w["name"],
-                url=w["url"],
-                back_url=w.get("back_url"),
-                description=w.get("description"),
-                sort_order=w.get("sort_order", 0),
-                is_public=w.get("is_public", True),
-                icon=w.get("icon"),
-                category_id=category_id,
-                owner=user
-            )
-            imported_website_ids.append(new_website.id)
-
-        # 为导入的网站添加后台任务下载图标
-    for website_id in imported_website_ids:
-        await download_favicon(website_id=website_id)
+            url=w["url"],
+            url_hash=digest,
+            back_url=w.get("back_url"),
+            description=w.get("description"),
+            sort_order=w.get("sort_order", 0),
+            is_public=w.get("is_public", True),
+            icon=w.get("icon"),
+            category_id=category_id,
+            owner=user
+        )
+        imported_website_ids.append(new_website.id)
+
+    publish_change("category", cid_mapping.values())
+    publish_change("website", imported_website_ids)
+    # 为导入的网站批量下载图标
+    await download_favicons(imported_website_ids)
@@ -0,0 +1,105 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-12-02 15:20:11
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-12-02 15:20:11
+ # @ Description: 网址规范化与去重键
+
+ normalize_url 生成规范形式：协议/主机小写、去掉默认端口与主机末尾的点、
+ 非根路径去掉末尾斜杠、删除常见跟踪参数并对其余参数排序、去掉锚点
+ (#/ 或 #! 开头的前端路由保留)。
+ url_key 在此基础上再忽略协议与 www. 前缀，作为同一网站的判定依据，
+ url_hash 为其定长摘要，存入 websites.url_hash 并建立(用户, 摘要)唯一索引。
+ validate_url 按接口模型相同的 AnyUrl 规则校验导入的网址。
+ '''
+
+__all__ = [
+    "TRACKING_PARAMS",
+    "normalize_url",
+    "url_key",
+    "url_hash",
+    "validate_url",
+]
+
+import hashlib
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from pydantic import AnyUrl, TypeAdapter, ValidationError
+
+
+# 不影响页面内容的跟踪参数
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "twclid", "igshid",
+    "mc_cid", "mc_eid", "_hsenc", "_hsmi", "spm", "from_source",
+})
+TRACKING_PREFIXES = ("utm_",)
+DEFAULT_PORTS = {"http": 80, "https": 443}
+_ANY_URL = TypeAdapter(AnyUrl)
+
+
+def _is_tracking(name: str) -> bool:
+    """是否为跟踪参数"""
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def normalize_url(url: str) -> str:
+    """网址规范形式，无法解析时返回去掉首尾空白的原值"""
+    url = url.strip()
+    if "://" not in url:
+        url = f"http://{url}"
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url.strip()
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    if not host.isascii():
+        try:
+            # 国际化域名统一为 punycode(idna 编码较慢，只处理非 ASCII 主机)
+            host = host.encode("idna").decode("ascii")
+        except UnicodeError:
+            pass
+    host = host.lower()
+    if ":" in host:
+        host = f"[{host}]"
+    if port and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    if parts.username:
+        auth = parts.username
+        if parts.password:
+            auth = f"{auth}:{parts.password}"
+        host = f"{auth}@{host}"
+    path = parts.path or "/"
+    if path != "/":
+        path = path.rstrip("/") or "/"
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking(k)))
+    fragment = parts.fragment if parts.fragment.startswith(("/", "!")) \
+        else ""
+    return urlunsplit((scheme, host, path, query, fragment))
+
+
+def url_key(url: str) -> str:
+    """去重键：规范形式去掉协议与 www. 前缀"""
+    canonical = normalize_url(url)
+    key = canonical.split("://", 1)[-1]
+    if key.startswith("www."):
+        key = key[4:]
+    return key
+
+
+def url_hash(url: str) -> str:
+    """去重键的摘要(32 位十六进制)"""
+    return hashlib.blake2b(
+        url_key(url).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def validate_url(url: str) -> Optional[str]:
+    """按 AnyUrl 校验网址，返回与接口保存形式一致的字符串，非法时返回 None"""
+    try:
+        return str(_ANY_URL.validate_python(url))
+    except ValidationError:
+        return None
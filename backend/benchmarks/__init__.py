@@ -0,0 +1,17 @@
+"""
+性能检查与基准测试脚本
+
+在 backend 目录下以模块方式运行，例如:
+    python -m benchmarks.query_plans
+
+    python -m benchmarks.datagen          # 生成导入用数据(含 OneNav 转换)
+    python -m benchmarks.micro -o bench_results/micro.json
+    python -m benchmarks.load -o bench_results/load.json
+    python -m benchmarks.favicons --sites 100 1000 10000
+    python -m benchmarks.links --sites 1000 10000
+    python -m benchmarks.onenav --links 10000 100000
+    python -m benchmarks.bookmarks --links 10000 50000
+    python -m benchmarks.startup --rounds 5
+    python -m benchmarks.workers --workers 1 2 4
+    python -m benchmarks.compare bench_results/base.json bench_results/micro.json
+"""
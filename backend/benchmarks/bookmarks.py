@@ -0,0 +1,105 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-12-03 17:40:26
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-12-03 17:40:26
+ # @ Description: 浏览器书签导入基准
+
+ 按规模生成 Netscape 书签文件(部分链接带内嵌图标)，运行 import_bookmarks，统计:
+   - 总耗时与每秒导入链接数
+   - 导入/重复/跳过数量、保存的图标文件数与仍需联网下载图标的网址数
+   - Python 内存分配峰值(tracemalloc，单独一轮)，规模增大时应基本不变
+ 图标写入临时目录，不访问网络。
+
+ 用法:
+    python -m benchmarks.bookmarks --links 10000 50000 -o bench_results/bookmarks.json
+    python -m benchmarks.bookmarks --links 10000 --icon-ratio 1
+ '''
+
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Dict, Tuple
+from tortoise import Tortoise
+import app.tasks.bookmarks as bookmark_tasks
+from app.db.models import User
+from app.tasks.importer import BatchImporter
+from benchmarks.common import db_config, open_db, peak_rss_mb, save_results
+from benchmarks.datagen import bookmarks_html
+from benchmarks.onenav import traced
+
+
+async def run_import(source: Path, target: Path,
+                     batch_size: int) -> Tuple[Dict, int]:
+    """导入到新建的数据库，返回 (统计, 需下载图标的网址数)"""
+    await open_db(db_config("sqlite", str(target)))
+    try:
+        user = await User.create(username="bookmarks", password_hash="-")
+        importer = BatchImporter(user, batch_size, collect_icons=True)
+        summary = await bookmark_tasks.import_bookmarks(
+            bookmark_tasks.read_file(source), importer)
+    finally:
+        await Tortoise.close_connections()
+    target.unlink(missing_ok=True)
+    return summary, len(importer.icon_pending)
+
+
+async def run_size(links: int, args: argparse.Namespace,
+                   workdir: Path) -> Dict:
+    """单个规模：生成书签文件后导入"""
+    per_folder = max(1, links // args.folders)
+    source = bookmarks_html(workdir / f"bookmarks_{links}.html",
+                            args.folders, per_folder, args.icon_ratio)
+    target = workdir / f"mynavi_{links}.sqlite3"
+    icons = workdir / "icons"
+    bookmark_tasks.ICONS_DIR = icons
+
+    start = time.perf_counter()
+    summary, need_fetch = await run_import(source, target, args.batch_size)
+    seconds = time.perf_counter() - start
+    icon_files = len(list(icons.iterdir())) if icons.exists() else 0
+    _, peak = await traced(
+        lambda: run_import(source, target, args.batch_size))
+    shutil.rmtree(icons, ignore_errors=True)
+    total = args.folders * per_folder
+    return {
+        "links": total,
+        "file_mb": round(source.stat().st_size / 1024 / 1024, 2),
+        "seconds": round(seconds, 2),
+        "links_per_sec": round(total / seconds, 1),
+        "peak_alloc_mb": peak,
+        "icon_files": icon_files,
+        "need_favicon_fetch": need_fetch,
+        "summary": summary,
+    }
+
+
+async def main(args: argparse.Namespace) -> Dict:
+    """运行各规模"""
+    workdir = Path(tempfile.mkdtemp(prefix="bookmarks_bench_"))
+    original = bookmark_tasks.ICONS_DIR
+    try:
+        results = {"icon_ratio": args.icon_ratio, "runs": []}
+        for links in args.links:
+            results["runs"].append(await run_size(links, args, workdir))
+        results["peak_rss_mb"] = peak_rss_mb()
+    finally:
+        bookmark_tasks.ICONS_DIR = original
+        shutil.rmtree(workdir, ignore_errors=True)
+    return save_results("bookmarks", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--links", type=int, nargs="*",
+                        default=[10000, 50000])
+    parser.add_argument("--folders", type=int, default=100)
+    parser.add_argument("--icon-ratio", type=float, default=0.5)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("-o", "--output", default=None)
+    report = asyncio.run(main(parser.parse_args()))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
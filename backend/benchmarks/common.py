@@ -0,0 +1,141 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-11-22 15:20:44
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-11-22 15:20:44
+ # @ Description: 基准测试公共方法：数据库初始化、造数与结果统计
+ '''
+
+__all__ = ["db_config", "open_db", "seed", "summarize", "rss_mb",
+           "peak_rss_mb", "save_results"]
+
+import json
+import platform
+import resource
+import statistics
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from tortoise import Tortoise
+from app.config import DatabaseSettings
+from app.db.migrations import run_migrations
+from app.db.models import User, Category, Website
+from app.urls import url_hash
+
+
+def db_config(backend: str = "sqlite", sqlite_path: Optional[str] = None) -> Dict:
+    """获取基准测试使用的数据库配置
+
+    sqlite 使用独立的数据库文件；postgres 读取 POSTGRES_* 环境变量
+    """
+    if backend == "sqlite":
+        path = Path(sqlite_path or "./bench_data/bench.sqlite3")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        settings = DatabaseSettings(db_type="sqlite", sqlite_db_path=str(path))
+    else:
+        settings = DatabaseSettings(db_type="postgres")
+    return settings.db_config
+
+
+async def open_db(config: Dict, reset: bool = True) -> None:
+    """初始化数据库连接并建表"""
+    await Tortoise.init(config=config)
+    if reset:
+        conn = Tortoise.get_connection("default")
+        for table in ("websites", "categories", "users", "change_log",
+                      "schema_version"):
+            await conn.execute_script(f'DROP TABLE IF EXISTS "{table}"')
+    await Tortoise.generate_schemas(safe=True)
+    await run_migrations()
+
+
+async def seed(
+    categories: int, websites_per_category: int, owners: int = 1
+) -> None:
+    """按 分类数 × 每类网址数 × 用户数 批量造数"""
+    for o in range(owners):
+        user = await User.create(username=f"bench{o}", password_hash="-")
+        await Category.bulk_create([
+            Category(name=f"u{o}-c{i}", sort_order=i, created_user=user)
+            for i in range(categories)
+        ])
+        cats = await Category.filter(
+            created_user_id=user.id).values_list("id", flat=True)
+        await Website.bulk_create([
+            Website(
+                name=f"site {o}-{cid}-{j}",
+                url=f"https://s{o}-{cid}-{j}.example.com/",
+                url_hash=url_hash(f"https://s{o}-{cid}-{j}.example.com/"),
+                sort_order=j,
+                category_id=cid,
+                owner=user,
+            )
+            for cid in cats for j in range(websites_per_category)
+        ], batch_size=1000)
+
+
+def summarize(latencies: List[float]) -> Dict:
+    """延迟统计(输入为秒，输出为毫秒)"""
+    if not latencies:
+        return {"count": 0}
+    values = sorted(latencies)
+
+    def pick(p: float) -> float:
+        index = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+        return round(values[index] * 1000, 3)
+    return {
+        "count": len(values),
+        "mean_ms": round(statistics.fmean(values) * 1000, 3),
+        "p50_ms": pick(50),
+        "p95_ms": pick(95),
+        "p99_ms": pick(99),
+        "max_ms": round(values[-1] * 1000, 3),
+    }
+
+
+def rss_mb(pid: str = "self") -> float:
+    """进程当前常驻内存(MB，仅 Linux)"""
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return 0.0
+
+
+def peak_rss_mb() -> float:
+    """本进程峰值常驻内存(MB)"""
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _git_commit() -> Optional[str]:
+    """当前提交，便于对比不同版本的结果"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+            text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(
+    suite: str, results: Dict, output: Optional[str] = None
+) -> Dict:
+    """附加运行环境信息，写入 JSON 文件(未指定时只返回)"""
+    report = {
+        "suite": suite,
+        "commit": _git_commit(),
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if output:
+        path = Path(output)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2, ensure_ascii=False),
+                        encoding="utf-8")
+    return report
@@ -0,0 +1,77 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-11-28 16:05:33
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-11-28 16:05:33
+ # @ Description: 对比两次基准结果(micro/load 输出的 JSON)
+
+ 比较所有 p50/p95/p99 延迟与内存指标，p95/p99 或内存增长超过阈值时
+ 以非零状态退出，可用于在提交之间检查性能回退。
+
+ 用法:
+    python -m benchmarks.compare bench_results/base.json bench_results/new.json
+    python -m benchmarks.compare base.json new.json --threshold 0.2
+ '''
+
+import sys
+import json
+import argparse
+from typing import Dict, Iterator, Tuple
+
+
+# 参与对比的指标；值越小越好
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "rss_mb", "peak_rss_mb", "end",
+           "peak")
+# 超过阈值视为回退的指标
+GATED = ("p95_ms", "p99_ms", "peak_rss_mb", "peak")
+
+
+def flatten(node: Dict, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    """展开嵌套结果为 (路径, 数值)"""
+    for key, value in node.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from flatten(value, path)
+        elif key in METRICS and isinstance(value, (int, float)):
+            yield path, float(value)
+
+
+def compare(base: Dict, new: Dict, threshold: float) -> int:
+    """打印对比表，返回回退项数量"""
+    if base.get("suite") != new.get("suite"):
+        print(f"warning: comparing {base.get('suite')} with {new.get('suite')}")
+    old_values = dict(flatten(base["results"]))
+    regressions = 0
+    print(f"{'metric':<48}{base.get('commit') or 'base':>12}"
+          f"{new.get('commit') or 'new':>12}{'change':>10}")
+    for path, value in flatten(new["results"]):
+        old = old_values.get(path)
+        if old is None:
+            continue
+        change = (value - old) / old if old else 0.0
+        regressed = path.rsplit(".", 1)[-1] in GATED and change > threshold
+        regressions += regressed
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{path:<48}{old:>12.3f}{value:>12.3f}{change:>+10.1%}{flag}")
+    return regressions
+
+
+def main() -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="允许的相对增长，默认 10%%")
+    args = parser.parse_args()
+    with open(args.base, encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.new, encoding="utf-8") as f:
+        new = json.load(f)
+    regressions = compare(base, new, args.threshold)
+    print(f"\n{regressions} regression(s) above {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
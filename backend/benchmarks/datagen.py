@@ -0,0 +1,236 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-11-28 09:48:21
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-11-28 09:48:21
+ # @ Description: 基准测试造数：生成导出格式(/api/data/load 可导入)的数据
+
+ synthetic_dataset: N 个分类 × 每类 M 个网址
+ onenav_dataset:    先生成 OneNav 导出格式，再经 depends/utils 中的
+                    convert_onenav_to_websites 转换，与实际迁移数据形态一致
+ onenav_db3:        生成 OneNav 数据库文件，供 app.tasks.onenav 直接导入
+ bookmarks_html:    生成浏览器书签文件，供 app.tasks.bookmarks 导入
+
+ 用法:
+    python -m benchmarks.datagen --categories 50 --websites 100 -o data.json
+    python -m benchmarks.datagen --onenav --categories 50 --websites 100
+ '''
+
+__all__ = ["synthetic_dataset", "iter_onenav", "onenav_export",
+           "onenav_db3", "onenav_dataset", "bookmarks_html"]
+
+import sys
+import json
+import base64
+import random
+import sqlite3
+import argparse
+import tempfile
+import contextlib
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+# 仓库根目录下的 depends/utils
+UTILS_DIR = Path(__file__).resolve().parents[2] / "depends" / "utils"
+# OneNav 数据库中导入用到的两张表
+ONENAV_SCHEMA = """
+CREATE TABLE on_categorys (
+    id INTEGER PRIMARY KEY, name TEXT, add_time TEXT, up_time TEXT,
+    weight INTEGER, property INTEGER, description TEXT, font_icon TEXT,
+    fid INTEGER DEFAULT 0);
+CREATE TABLE on_links (
+    id INTEGER PRIMARY KEY, fid INTEGER, title TEXT, url TEXT,
+    url_standby TEXT, description TEXT, add_time TEXT, up_time TEXT,
+    weight INTEGER, property INTEGER, click INTEGER, topping INTEGER);
+"""
+# 内嵌图标使用的 PNG 文件头
+PNG_HEADER = b"\x89PNG\r\n\x1a\n"
+WORDS = ("docs", "blog", "news", "tools", "cloud", "dev", "mail", "music",
+         "video", "shop", "wiki", "code", "导航", "工具", "文档", "资讯")
+
+
+def _site(rng: random.Random, cid: int, j: int) -> Dict:
+    """生成一个网址"""
+    word = rng.choice(WORDS)
+    host = f"{word}{cid}-{j}.example.com"
+    return {
+        "name": f"{word} {cid}-{j}",
+        "url": f"https://{host}/",
+        "back_url": f"https://m.{host}/" if rng.random() < 0.1 else None,
+        "description": f"{word} site #{j}" if rng.random() < 0.5 else None,
+        "sort_order": j,
+        "icon": "default.webp",
+        "category_id": cid,
+    }
+
+
+def synthetic_dataset(
+    categories: int, websites_per_category: int, seed: int = 42
+) -> Dict:
+    """生成导出格式的数据，固定随机种子保证可复现"""
+    rng = random.Random(seed)
+    data = {
+        "export_info": {"user_id": 1, "username": "bench",
+                        "export_time": datetime.now().isoformat(),
+                        "version": "1.0"},
+        "categories": [],
+        "websites": [],
+    }
+    for cid in range(1, categories + 1):
+        data["categories"].append({
+            "id": cid,
+            "name": f"{rng.choice(WORDS)}-{cid}",
+            "description": None,
+            "icon": "bookmark",
+            "sort_order": cid,
+        })
+        for j in range(websites_per_category):
+            site = _site(rng, cid, j)
+            site["id"] = len(data["websites"]) + 1
+            data["websites"].append(site)
+    return data
+
+
+def iter_onenav(
+    categories: int, links_per_category: int, seed: int = 42
+) -> Iterator[Tuple[str, Dict]]:
+    """逐行生成 OneNav 数据 (表名, 行)，每个分类后跟它的链接"""
+    rng = random.Random(seed)
+    now = int(datetime.now().timestamp())
+    link_id = 0
+    for cid in range(1, categories + 1):
+        yield "on_categorys", {
+            "id": cid,
+            "name": f"{rng.choice(WORDS)}-{cid}",
+            "add_time": str(now - rng.randint(0, 86400 * 365)),
+            "weight": rng.randint(0, 100),
+            "property": 0,
+            "description": "",
+        }
+        for j in range(links_per_category):
+            site = _site(rng, cid, j)
+            link_id += 1
+            yield "on_links", {
+                "id": link_id,
+                "fid": cid,
+                "title": site["name"],
+                "url": site["url"],
+                "url_standby": site["back_url"] or "",
+                "description": site["description"] or "",
+                "add_time": str(now - rng.randint(0, 86400 * 365)),
+                "weight": rng.randint(0, 100),
+                "property": 0,
+                "click": rng.randint(0, 1000),
+            }
+
+
+def onenav_export(
+    categories: int, links_per_category: int, seed: int = 42
+) -> Dict:
+    """生成 OneNav 数据库导出(export_db3_simple)格式"""
+    export = {"on_categorys": [], "on_links": []}
+    for table, row in iter_onenav(categories, links_per_category, seed):
+        export[table].append(row)
+    return export
+
+
+def onenav_db3(
+    path: Path, categories: int, links_per_category: int, seed: int = 42
+) -> Path:
+    """生成 OneNav 数据库文件(.db3)，逐行写入，内存占用与规模无关"""
+    path.unlink(missing_ok=True)
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(ONENAV_SCHEMA)
+        for table, row in iter_onenav(categories, links_per_category, seed):
+            columns = ", ".join(row)
+            marks = ", ".join("?" * len(row))
+            conn.execute(f"INSERT INTO {table} ({columns}) VALUES ({marks})",
+                         tuple(row.values()))
+        conn.commit()
+    finally:
+        conn.close()
+    return path
+
+
+def bookmarks_html(
+    path: Path, folders: int, links_per_folder: int,
+    icon_ratio: float = 0.5, seed: int = 42
+) -> Path:
+    """生成浏览器书签文件(Netscape HTML)，书签栏下每 5 个文件夹有一个子文件夹
+
+    icon_ratio 比例的链接带内嵌 PNG 图标(同一文件夹内相同)
+    """
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<!DOCTYPE NETSCAPE-Bookmark-file-1>\n"
+                '<META HTTP-EQUIV="Content-Type" '
+                'CONTENT="text/html; charset=UTF-8">\n'
+                "<TITLE>Bookmarks</TITLE>\n<H1>Bookmarks</H1>\n<DL><p>\n"
+                '<DT><H3 PERSONAL_TOOLBAR_FOLDER="true">书签栏</H3>\n'
+                "<DL><p>\n")
+        for cid in range(1, folders + 1):
+            icon = base64.b64encode(
+                PNG_HEADER + cid.to_bytes(4, "big") * 64).decode()
+            nested = cid % 5 == 0
+            f.write(f"<DT><H3>{rng.choice(WORDS)} &amp; {cid}</H3>\n<DL><p>\n")
+            if nested:
+                f.write(f"<DT><H3>sub-{cid}</H3>\n<DL><p>\n")
+            for j in range(links_per_folder):
+                site = _site(rng, cid, j)
+                attrs = f'HREF="{site["url"]}" ADD_DATE="1700000000"'
+                if rng.random() < icon_ratio:
+                    attrs += f' ICON="data:image/png;base64,{icon}"'
+                f.write(f"<DT><A {attrs}>{site['name']}</A>\n")
+                if site["description"]:
+                    f.write(f"<DD>{site['description']}\n")
+            if nested:
+                f.write("</DL><p>\n")
+            f.write("</DL><p>\n")
+        f.write('<DT><A HREF="javascript:void(0)">bookmarklet</A>\n'
+                "</DL><p>\n</DL><p>\n")
+    return path
+
+
+def onenav_dataset(
+    categories: int, links_per_category: int, seed: int = 42
+) -> Dict:
+    """生成 OneNav 数据并经 convert_onenav_to_websites 转换为导出格式"""
+    if str(UTILS_DIR) not in sys.path:
+        sys.path.append(str(UTILS_DIR))
+    from website_data_convert import convert_onenav_to_websites
+
+    with tempfile.TemporaryDirectory(prefix="onenav_") as workdir:
+        source = Path(workdir) / "onenav.json"
+        target = Path(workdir) / "websites.json"
+        source.write_text(json.dumps(
+            onenav_export(categories, links_per_category, seed),
+            ensure_ascii=False), encoding="utf-8")
+        # 转换脚本会打印统计信息，避免混入 JSON 输出
+        with contextlib.redirect_stdout(sys.stderr):
+            convert_onenav_to_websites(str(source), str(target))
+        return json.loads(target.read_text(encoding="utf-8"))
+
+
+def main(argv: Optional[list] = None) -> None:
+    """生成数据文件"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--websites", type=int, default=100,
+                        help="每个分类的网址数")
+    parser.add_argument("--onenav", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("-o", "--output", default="bench_data/dataset.json")
+    args = parser.parse_args(argv)
+    build = onenav_dataset if args.onenav else synthetic_dataset
+    data = build(args.categories, args.websites, args.seed)
+    path = Path(args.output)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    print(f"{path}: {len(data['categories'])} categories, "
+          f"{len(data['websites'])} websites")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-11-29 10:14:52
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-11-29 10:14:52
+ # @ Description: 模拟网站源站(ASGI)，用于离线测试图标下载与网址检测流程
+
+ 每个站点使用不同的回环地址(127.x.y.z)，源站按 Host 的哈希为站点分配固定的
+ 行为：正常 ico、仅 png、重定向、404、500、慢响应、超时(挂起)、慢速分块传输、
+ 不支持 HEAD(405)。除 404/500 站点外，首页 / 均返回 200。
+ 同一配置下结果可复现。/__stats 返回请求与连接统计，/__reset 清零。
+ 也可以通过 MockOrigin().transport() 在进程内直接交给 httpx 客户端使用。
+
+ Linux 上整个 127.0.0.0/8 都指向本机，源站需监听 0.0.0.0 才能接收发往
+ 其他回环地址的连接。
+
+ 用法:
+    python -m benchmarks.favicon_origin --port 18090
+    python -m benchmarks.favicon_origin --mix ico=50,png=20,missing=30
+ '''
+
+__all__ = ["MockOrigin", "DEFAULT_MIX", "site_url", "parse_mix"]
+
+import json
+import zlib
+import asyncio
+import argparse
+from collections import Counter
+from typing import Dict, Set, Tuple
+
+
+# 各行为的占比(千分比)
+DEFAULT_MIX: Dict[str, int] = {
+    "ico": 570,       # /favicon.ico 直接返回
+    "png": 100,       # 只有 /favicon.png
+    "redirect": 50,   # /favicon.ico 301 到 /static/favicon.ico
+    "missing": 150,   # 全部 404
+    "error": 20,      # 全部 500
+    "slow": 50,       # 额外延迟 slow_ms
+    "drip": 20,       # 图标内容分块慢速返回
+    "timeout": 10,    # 挂起 hang 秒，超过客户端超时
+    "nohead": 30,     # HEAD 一律 405，只能用 GET
+}
+# 最小的 ico 文件头 + 填充，模拟真实图标大小
+ICON = b"\x00\x00\x01\x00\x01\x00\x10\x10" + b"\x00" * 1142
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 1400
+HOME = b"<!doctype html><html><head><title>mock</title></head></html>"
+
+
+def site_url(index: int, port: int) -> str:
+    """第 index 个站点的地址，每个站点一个独立的回环地址"""
+    n = index + 1
+    return f"http://127.{1 + n // 65536}.{n // 256 % 256}.{n % 256}:{port}/"
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """解析 ico=600,png=100 形式的行为占比"""
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name.strip() not in DEFAULT_MIX:
+            raise ValueError(f"Unknown behaviour: {name}")
+        mix[name.strip()] = int(weight)
+    return mix
+
+
+class MockOrigin:
+    """按 Host 分配行为的图标源站"""
+
+    def __init__(self, mix: Dict[str, int] = None, latency_ms: float = 5,
+                 slow_ms: float = 500, hang: float = 15,
+                 drip_chunks: int = 10, drip_ms: float = 100):
+        self.mix = dict(mix or DEFAULT_MIX)
+        self.latency = latency_ms / 1000
+        self.slow = slow_ms / 1000
+        self.hang = hang
+        self.drip_chunks = drip_chunks
+        self.drip = drip_ms / 1000
+        self.reset()
+
+    def transport(self):
+        """进程内使用的 httpx 传输层(不经过网络，连接统计无意义)"""
+        import httpx
+        return httpx.ASGITransport(app=self)
+
+    def reset(self) -> None:
+        """清零统计"""
+        self.requests: Counter = Counter()
+        self.statuses: Counter = Counter()
+        self.behaviours: Counter = Counter()
+        self.connections: Set[Tuple[str, int]] = set()
+        self.bytes_sent = 0
+
+    def behaviour(self, host: str) -> str:
+        """按 Host 哈希确定站点行为"""
+        total = sum(self.mix.values())
+        point = zlib.crc32(host.encode()) % total
+        for name, weight in self.mix.items():
+            if point < weight:
+                return name
+            point -= weight
+        return "missing"
+
+    def stats(self) -> Dict:
+        """请求与连接统计"""
+        total = sum(self.requests.values())
+        return {
+            "requests": total,
+            "connections": len(self.connections),
+            "requests_per_connection": round(
+                total / len(self.connections), 2) if self.connections else 0,
+            "by_method": dict(self.requests),
+            "by_status": {str(k): v for k, v in self.statuses.items()},
+            "sites_by_behaviour": dict(self.behaviours),
+            "bytes_sent": self.bytes_sent,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                await send({"type": message["type"] + ".complete"})
+                if message["type"] == "lifespan.shutdown":
+                    return
+        if scope["type"] != "http":
+            return
+        path = scope["path"]
+        if path == "/__stats":
+            await self._send(send, 200, json.dumps(self.stats()).encode(),
+                             "application/json")
+            return
+        if path == "/__reset":
+            await self._send(send, 204, b"")
+            self.reset()
+            return
+
+        headers = dict(scope["headers"])
+        host = headers.get(b"host", b"").decode()
+        method = scope["method"]
+        if scope.get("client"):
+            self.connections.add(tuple(scope["client"]))
+        self.requests[method] += 1
+        behaviour = self.behaviour(host)
+        if path in ("/favicon.ico", "/") and method == "HEAD":
+            # 每个站点第一次探测时计数
+            self.behaviours[behaviour] += 1
+
+        await asyncio.sleep(self.latency)
+        if behaviour == "nohead" and method == "HEAD":
+            status, body, content_type = 405, b"", "text/plain"
+        else:
+            status, body, content_type = self._route(behaviour, path)
+        if behaviour == "slow":
+            await asyncio.sleep(self.slow)
+        elif behaviour == "timeout":
+            await asyncio.sleep(self.hang)
+        head = method == "HEAD"
+        if behaviour == "drip" and status == 200 and not head:
+            await self._drip(send, body, content_type)
+            return
+        await self._send(send, status, body, content_type, head=head,
+                         location="/static/favicon.ico"
+                         if status == 301 else None)
+
+    def _route(self, behaviour: str, path: str) -> Tuple[int, bytes, str]:
+        """按行为和路径返回 (状态码, 内容, 类型)"""
+        if behaviour == "error":
+            return 500, b"error", "text/plain"
+        if behaviour == "missing":
+            return 404, b"not found", "text/plain"
+        if path == "/":
+            return 200, HOME, "text/html"
+        if behaviour == "png":
+            if path == "/favicon.png":
+                return 200, PNG, "image/png"
+            return 404, b"not found", "text/plain"
+        if behaviour == "redirect":
+            if path == "/favicon.ico":
+                return 301, b"", "text/plain"
+            if path == "/static/favicon.ico":
+                return 200, ICON, "image/x-icon"
+            return 404, b"not found", "text/plain"
+        if path == "/favicon.ico":
+            return 200, ICON, "image/x-icon"
+        return 404, b"not found", "text/plain"
+
+    async def _send(self, send, status: int, body: bytes,
+                    content_type: str = "text/plain", head: bool = False,
+                    location: str = None) -> None:
+        """发送完整响应"""
+        headers = [(b"content-type", content_type.encode()),
+                   (b"content-length", str(len(body)).encode())]
+        if location:
+            headers.append((b"location", location.encode()))
+        self.statuses[status] += 1
+        await send({"type": "http.response.start", "status": status,
+                    "headers": headers})
+        payload = b"" if head else body
+        self.bytes_sent += len(payload)
+        await send({"type": "http.response.body", "body": payload})
+
+    async def _drip(self, send, body: bytes, content_type: str) -> None:
+        """分块慢速发送"""
+        self.statuses[200] += 1
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", content_type.encode()),
+                                (b"content-length",
+                                 str(len(body)).encode())]})
+        size = max(1, len(body) // self.drip_chunks)
+        for start in range(0, len(body), size):
+            await asyncio.sleep(self.drip)
+            chunk = body[start:start + size]
+            self.bytes_sent += len(chunk)
+            await send({"type": "http.response.body", "body": chunk,
+                        "more_body": start + size < len(body)})
+
+
+def main() -> None:
+    """启动源站"""
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=18090)
+    parser.add_argument("--mix", type=parse_mix, default=None,
+                        help="行为占比，如 ico=600,missing=400")
+    parser.add_argument("--latency-ms", type=float, default=5)
+    parser.add_argument("--slow-ms", type=float, default=500)
+    parser.add_argument("--hang", type=float, default=15)
+    args = parser.parse_args()
+    origin = MockOrigin(args.mix, latency_ms=args.latency_ms,
+                        slow_ms=args.slow_ms, hang=args.hang)
+    uvicorn.run(origin, host=args.host, port=args.port, log_level="warning",
+                backlog=4096)
+
+
+if __name__ == "__main__":
+    main()
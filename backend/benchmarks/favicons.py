@@ -0,0 +1,161 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-11-29 14:30:17
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-11-29 14:30:17
+ # @ Description: 图标下载流程基准(使用本地模拟源站)
+
+ 启动 favicon_origin 子进程，按规模生成指向各回环地址的网址，通过
+ restore_data 导入(与实际导入相同，会批量下载图标)，统计:
+   - 导入总耗时、图标阶段耗时与每秒处理站点数
+   - 单站点图标获取的 p50/p95/p99 延迟
+   - 源站收到的请求数、TCP 连接数及每连接请求数(连接复用)
+   - 图标保存成功/回退默认图标的数量
+
+ 用法:
+    python -m benchmarks.favicons --sites 100 1000 10000 -o bench_results/favicons.json
+    python -m benchmarks.favicons --sites 1000 --mix ico=900,missing=100
+ '''
+
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Dict, List
+import httpx
+from tortoise import Tortoise
+import app.tasks.websites as website_tasks
+from app.db.models import DEFAULT_ICON, User, Website
+from benchmarks.common import (
+    db_config, open_db, peak_rss_mb, save_results, summarize)
+from benchmarks.favicon_origin import site_url
+
+
+def start_origin(port: int, args: argparse.Namespace) -> subprocess.Popen:
+    """在子进程中启动模拟源站，避免与被测流程争用事件循环"""
+    command = [sys.executable, "-m", "benchmarks.favicon_origin",
+               "--port", str(port), "--latency-ms", str(args.latency_ms),
+               "--slow-ms", str(args.slow_ms), "--hang", str(args.hang)]
+    if args.mix:
+        command += ["--mix", args.mix]
+    return subprocess.Popen(command, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.DEVNULL)
+
+
+async def origin_call(port: int, path: str) -> Dict:
+    """读取或清零源站统计"""
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as c:
+        for _ in range(100):
+            try:
+                r = await c.get(path)
+                return r.json() if r.content else {}
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError("Mock origin did not start")
+
+
+def dataset(sites: int, port: int) -> Dict:
+    """导入数据：每个网址指向一个回环地址"""
+    return {
+        "categories": [{"id": 1, "name": f"favicons-{sites}"}],
+        "websites": [
+            {"id": i, "name": f"site {i}", "url": site_url(i, port),
+             "category_id": 1, "sort_order": i, "icon": DEFAULT_ICON}
+            for i in range(sites)
+        ],
+    }
+
+
+async def run_size(sites: int, port: int, concurrency: int,
+                   workdir: Path) -> Dict:
+    """单个规模：导入并下载图标"""
+    await open_db(db_config("sqlite", str(workdir / f"{sites}.sqlite3")))
+    per_site: List[float] = []
+    phase: Dict[str, float] = {}
+    fetch_favicon = website_tasks.fetch_favicon
+    download_favicons = website_tasks.download_favicons
+    icons_dir = website_tasks.ICONS_DIR
+
+    async def timed_fetch(w, client=None):
+        start = time.perf_counter()
+        try:
+            await fetch_favicon(w, client=client)
+        finally:
+            per_site.append(time.perf_counter() - start)
+
+    async def timed_download(ids):
+        start = time.perf_counter()
+        await download_favicons(ids, concurrency=concurrency)
+        phase["favicons"] = time.perf_counter() - start
+
+    website_tasks.fetch_favicon = timed_fetch
+    website_tasks.download_favicons = timed_download
+    # 图标写入临时目录，不影响 backend/icons
+    website_tasks.ICONS_DIR = workdir / f"icons_{sites}"
+    try:
+        await origin_call(port, "/__reset")
+        user = await User.create(username="favicons", password_hash="-")
+        start = time.perf_counter()
+        await website_tasks.restore_data(dataset(sites, port), user)
+        total = time.perf_counter() - start
+        icons = await Website.filter(owner_id=user.id).values_list(
+            "icon", flat=True)
+        origin = await origin_call(port, "/__stats")
+    finally:
+        website_tasks.fetch_favicon = fetch_favicon
+        website_tasks.download_favicons = download_favicons
+        website_tasks.ICONS_DIR = icons_dir
+        await Tortoise.close_connections()
+
+    favicons = phase.get("favicons", 0.0)
+    saved = sum(1 for icon in icons if icon and icon != DEFAULT_ICON)
+    return {
+        "sites": sites,
+        "concurrency": concurrency,
+        "import_seconds": round(total, 2),
+        "favicon_seconds": round(favicons, 2),
+        "sites_per_sec": round(sites / favicons, 1) if favicons else None,
+        "per_site": summarize(per_site),
+        "icons_saved": saved,
+        "icons_default": len(icons) - saved,
+        "origin": origin,
+    }
+
+
+async def main(args: argparse.Namespace) -> Dict:
+    """运行各规模"""
+    workdir = Path(tempfile.mkdtemp(prefix="favicon_bench_"))
+    origin = start_origin(args.port, args)
+    try:
+        results = {"mix": args.mix or "default", "runs": []}
+        for sites in args.sites:
+            results["runs"].append(await run_size(
+                sites, args.port, args.concurrency, workdir))
+        results["peak_rss_mb"] = peak_rss_mb()
+    finally:
+        origin.terminate()
+        origin.wait(timeout=30)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return save_results("favicons", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sites", type=int, nargs="*",
+                        default=[100, 1000, 10000])
+    parser.add_argument("--port", type=int, default=18090)
+    parser.add_argument("--concurrency", type=int,
+                        default=website_tasks.FAVICON_CONCURRENCY)
+    parser.add_argument("--mix", default=None,
+                        help="源站行为占比，如 ico=600,missing=400")
+    parser.add_argument("--latency-ms", type=float, default=5)
+    parser.add_argument("--slow-ms", type=float, default=500)
+    parser.add_argument("--hang", type=float, default=15)
+    parser.add_argument("-o", "--output", default=None)
+    report = asyncio.run(main(parser.parse_args()))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
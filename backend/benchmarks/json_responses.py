@@ -0,0 +1,134 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-11-27 10:25:18
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-11-27 10:25:18
+ # @ Description: 对比列表/导出接口的 JSON 序列化耗时
+
+ stdlib: 原有路径，response_model 校验 + 序列化后由 JSONResponse(json.dumps) 输出
+ fast:   FastJSONResponse 路径，模型直接序列化为字节，跳过二次校验与 jsonable_encoder
+ 数据库查询只执行一次，只统计序列化部分，查询耗时单独列出。
+
+ 用法:
+    python -m benchmarks.json_responses --rows 1000 10000 50000
+ '''
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Callable, Dict, List
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from tortoise import Tortoise
+from app.db.models import Category, User, Website
+from app.responses import FastJSONResponse, json_encoder_name
+from app.schemas import CategoryOut, WebsiteOut
+from benchmarks.common import db_config, open_db, seed
+
+
+# 每个分类下的网址数
+PER_CATEGORY = 20
+
+
+def measure(func: Callable[[], bytes], repeat: int) -> Dict:
+    """重复执行，返回耗时中位数(毫秒)与输出大小"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = func()
+        timings.append(time.perf_counter() - start)
+    return {"ms": round(statistics.median(timings) * 1000, 3),
+            "bytes": len(body)}
+
+
+def stdlib_models(adapter: TypeAdapter, models: List) -> bytes:
+    """原路径：response_model 再校验一次并转为 JSON 兼容对象，再 json.dumps"""
+    content = adapter.dump_python(adapter.validate_python(models), mode="json")
+    return JSONResponse(content).body
+
+
+async def timed(coro) -> tuple:
+    """执行查询并计时"""
+    start = time.perf_counter()
+    result = await coro
+    return result, round((time.perf_counter() - start) * 1000, 3)
+
+
+async def run_size(rows: int, repeat: int, sqlite_path: str) -> Dict:
+    """单个数据规模"""
+    await open_db(db_config("sqlite", sqlite_path))
+    try:
+        return await _run_size(rows, repeat)
+    finally:
+        # 未关闭时 aiosqlite 线程会阻止进程退出
+        await Tortoise.close_connections()
+
+
+async def _run_size(rows: int, repeat: int) -> Dict:
+    """造数并对比各接口"""
+    await seed(max(1, rows // PER_CATEGORY), PER_CATEGORY)
+    user = await User.get(username="bench0")
+
+    websites, websites_query = await timed(Website.list_websites())
+    categories, categories_query = await timed(
+        Category.get_list_categories(q=""))
+    website_models = [WebsiteOut.model_validate(w) for w in websites]
+    category_models = [CategoryOut.model_validate(c) for c in categories]
+    dump = {
+        "export_info": {"user_id": user.id, "username": user.username,
+                        "export_time": "2025-01-01T00:00:00",
+                        "version": "1.0"},
+        "categories": await Category.dumpdata(user=user),
+        "websites": await Website.dumpdata(user=user),
+    }
+
+    website_adapter = TypeAdapter(List[WebsiteOut])
+    category_adapter = TypeAdapter(List[CategoryOut])
+    cases = {
+        "list_websites": (
+            websites_query,
+            lambda: stdlib_models(website_adapter, website_models),
+            lambda: FastJSONResponse(website_models).body),
+        "list_categories": (
+            categories_query,
+            lambda: stdlib_models(category_adapter, category_models),
+            lambda: FastJSONResponse(category_models).body),
+        "dump": (
+            None,
+            lambda: JSONResponse(dump).body,
+            lambda: FastJSONResponse(dump).body),
+    }
+    result = {"rows": rows, "categories": len(categories), "endpoints": {}}
+    for name, (query_ms, stdlib, fast) in cases.items():
+        # 两条路径输出必须一致
+        assert json.loads(stdlib()) == json.loads(fast()), name
+        slow_result = measure(stdlib, repeat)
+        fast_result = measure(fast, repeat)
+        result["endpoints"][name] = {
+            "query_ms": query_ms,
+            "stdlib": slow_result,
+            "fast": fast_result,
+            "speedup": round(slow_result["ms"] / fast_result["ms"], 2)
+            if fast_result["ms"] else None,
+        }
+    return result
+
+
+async def main() -> None:
+    """运行各数据规模并输出 JSON"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="*",
+                        default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--sqlite-path", default="./bench_data/json.sqlite3")
+    args = parser.parse_args()
+    results = [await run_size(rows, args.repeat, args.sqlite_path)
+               for rows in args.rows]
+    print(json.dumps({"encoder": json_encoder_name(), "results": results},
+                     indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,137 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-12-01 14:18:52
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-12-01 14:18:52
+ # @ Description: 网址可用性检测基准(使用本地模拟源站)
+
+ 启动 favicon_origin 子进程，按规模生成指向各回环地址的网址(部分带备用链接)，
+ 运行一轮 LinkChecker.check_all，统计:
+   - 总耗时与每秒检测网址数
+   - 单链接检测的 p50/p95/p99 延迟
+   - 失效/备用可用数量，与源站行为(404/500/超时)是否一致
+   - 源站收到的请求数、连接数及每连接请求数
+
+ 用法:
+    python -m benchmarks.links --sites 1000 10000 -o bench_results/links.json
+    python -m benchmarks.links --sites 10000 --concurrency 128 --timeout 3
+ '''
+
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+from tortoise import Tortoise
+from app.config import link_check_config
+from app.db.models import LinkCheck, User, Website
+from app.tasks.links import LinkChecker
+from benchmarks.common import (
+    db_config, open_db, peak_rss_mb, save_results, summarize)
+from benchmarks.favicon_origin import MockOrigin, parse_mix, site_url
+from benchmarks.favicons import origin_call, start_origin
+
+
+async def seed_websites(sites: int, port: int, back_every: int) -> None:
+    """每个网址一个回环地址，每 back_every 个带一个备用链接"""
+    user = await User.create(username="links", password_hash="-")
+    await Website.bulk_create([
+        Website(name=f"site {i}", url=site_url(i, port), owner=user,
+                sort_order=i,
+                back_url=site_url(sites + i, port)
+                if back_every and i % back_every == 0 else None)
+        for i in range(sites)
+    ], batch_size=1000)
+
+
+async def run_size(sites: int, args: argparse.Namespace,
+                   workdir: Path) -> Dict:
+    """单个规模：造数并检测一轮"""
+    await open_db(db_config("sqlite", str(workdir / f"{sites}.sqlite3")))
+    checker = LinkChecker(
+        concurrency=args.concurrency, per_host=args.per_host,
+        host_delay=args.host_delay, timeout=args.timeout,
+        user_agent=link_check_config.user_agent)
+    latencies: List[float] = []
+    check_url = checker.check_url
+
+    async def timed_check(client, url):
+        result = await check_url(client, url)
+        latencies.append(result["latency_ms"] / 1000)
+        return result
+
+    checker.check_url = timed_check
+    try:
+        await seed_websites(sites, args.port, args.back_every)
+        await origin_call(args.port, "/__reset")
+        start = time.perf_counter()
+        summary = await checker.check_all(args.batch_size)
+        elapsed = time.perf_counter() - start
+        rows = await LinkCheck.statuses()
+        origin = await origin_call(args.port, "/__stats")
+    finally:
+        await Tortoise.close_connections()
+
+    # 与源站行为对照：404/500/超时站点应判定为失效
+    expected = MockOrigin(parse_mix(args.mix) if args.mix else None)
+    mismatched = 0
+    for row in rows:
+        host = site_url(row["website_id"] - 1, args.port).split("/")[2]
+        dead = expected.behaviour(host) in ("missing", "error", "timeout")
+        mismatched += dead == row["ok"]
+    return {
+        "sites": sites,
+        "concurrency": args.concurrency,
+        "seconds": round(elapsed, 2),
+        "links_per_sec": round(sites / elapsed, 1),
+        "per_link": summarize(latencies),
+        "dead": sum(not r["ok"] for r in rows),
+        "back_available": sum(bool(r["back_ok"]) for r in rows),
+        "mismatched": mismatched,
+        "summary": summary,
+        "origin": origin,
+    }
+
+
+async def main(args: argparse.Namespace) -> Dict:
+    """运行各规模"""
+    workdir = Path(tempfile.mkdtemp(prefix="links_bench_"))
+    origin = start_origin(args.port, args)
+    try:
+        results = {"mix": args.mix or "default", "runs": []}
+        for sites in args.sites:
+            results["runs"].append(await run_size(sites, args, workdir))
+        results["peak_rss_mb"] = peak_rss_mb()
+    finally:
+        origin.terminate()
+        origin.wait(timeout=30)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return save_results("links", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sites", type=int, nargs="*", default=[1000, 10000])
+    parser.add_argument("--port", type=int, default=18090)
+    parser.add_argument("--concurrency", type=int,
+                        default=link_check_config.concurrency)
+    parser.add_argument("--per-host", type=int,
+                        default=link_check_config.per_host)
+    parser.add_argument("--host-delay", type=float,
+                        default=link_check_config.host_delay)
+    parser.add_argument("--timeout", type=float, default=5)
+    parser.add_argument("--batch-size", type=int,
+                        default=link_check_config.batch_size)
+    parser.add_argument("--back-every", type=int, default=10,
+                        help="每隔多少个网址带一个备用链接，0 为不带")
+    parser.add_argument("--mix", default=None,
+                        help="源站行为占比，如 ico=600,missing=400")
+    parser.add_argument("--latency-ms", type=float, default=5)
+    parser.add_argument("--slow-ms", type=float, default=500)
+    parser.add_argument("--hang", type=float, default=15)
+    parser.add_argument("-o", "--output", default=None)
+    report = asyncio.run(main(parser.parse_args()))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
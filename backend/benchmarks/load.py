@@ -0,0 +1,271 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-11-28 14:12:40
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-11-28 14:12:40
+ # @ Description: HTTP 压测：首页加载、搜索、编辑、导入混合场景
+
+ 默认在独立数据库上启动一个 uvicorn 服务(SQLite，--postgres 时使用
+ POSTGRES_* 环境变量指向的本地库)，造数后并发请求，统计各操作的
+ p50/p95/p99 延迟、吞吐与服务进程内存。网址均指向本机关闭的端口，
+ 编辑/导入触发的图标下载会立即失败，不访问外部网络。
+ 注意 --postgres 会清空该库中的数据表，请使用专用的本地库。
+ 也可以用 --url 压测已运行的服务(需提供 --username/--password)。
+
+ 用法:
+    python -m benchmarks.load --seconds 30 --concurrency 20 -o bench_results/load.json
+    python -m benchmarks.load --url http://127.0.0.1:8000 --username admin --password xxx
+ '''
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+import httpx
+from tortoise import Tortoise
+from app.db.models import Category, User, Website
+from app.security import get_password_hash
+from benchmarks.common import (
+    db_config, open_db, peak_rss_mb, rss_mb, save_results, summarize)
+from benchmarks.datagen import WORDS, synthetic_dataset
+
+
+# 操作权重：首页加载为主，少量编辑与导入
+MIX = {"home": 60, "search": 25, "edit": 10, "import": 5}
+# 本机未监听的端口，图标下载立即失败
+DEAD_ORIGIN = "http://127.0.0.1:9"
+USERNAME = "bench"
+PASSWORD = "bench-password"
+
+
+async def prepare_database(
+    config: Dict, categories: int, websites_per_category: int
+) -> None:
+    """建表并造数，网址所有者为压测账号"""
+    await open_db(config)
+    try:
+        user = await User.create(
+            username=USERNAME, password_hash=get_password_hash(PASSWORD))
+        data = synthetic_dataset(categories, websites_per_category)
+        await Category.bulk_create([
+            Category(name=c["name"], sort_order=c["sort_order"],
+                     created_user=user)
+            for c in data["categories"]
+        ])
+        ids = dict(zip(
+            [c["name"] for c in data["categories"]],
+            await Category.filter(created_user_id=user.id).order_by(
+                "id").values_list("id", flat=True)))
+        names = {c["id"]: c["name"] for c in data["categories"]}
+        await Website.bulk_create([
+            Website(name=w["name"], url=f"{DEAD_ORIGIN}/{w['id']}",
+                    description=w["description"], sort_order=w["sort_order"],
+                    category_id=ids[names[w["category_id"]]], owner=user)
+            for w in data["websites"]
+        ], batch_size=1000)
+    finally:
+        await Tortoise.close_connections()
+
+
+def start_server(port: int, env: Dict[str, str]) -> subprocess.Popen:
+    """启动 uvicorn 子进程"""
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def wait_ready(base_url: str, timeout: float = 30) -> None:
+    """等待服务可用"""
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start")
+
+
+class LoadRunner:
+    """并发执行混合场景"""
+
+    def __init__(self, client: httpx.AsyncClient, website_ids: List[int],
+                 seed: int = 42):
+        self.client = client
+        self.website_ids = website_ids
+        self.rng = random.Random(seed)
+        self.latencies: Dict[str, List[float]] = {op: [] for op in MIX}
+        self.errors: Dict[str, int] = {op: 0 for op in MIX}
+        self._imports = 0
+
+    async def home(self) -> None:
+        """首页：并行加载分类与网址列表"""
+        responses = await asyncio.gather(
+            self.client.get("/api/categories/"),
+            self.client.get("/api/websites/"))
+        for r in responses:
+            r.raise_for_status()
+
+    async def search(self) -> None:
+        """按名称搜索"""
+        r = await self.client.get(
+            "/api/websites/", params={"q": self.rng.choice(WORDS)})
+        r.raise_for_status()
+
+    async def edit(self) -> None:
+        """修改网址描述"""
+        website_id = self.rng.choice(self.website_ids)
+        r = await self.client.put(
+            f"/api/websites/{website_id}",
+            json={"description": f"edited {time.time()}"})
+        r.raise_for_status()
+
+    async def import_(self) -> None:
+        """上传一个小的备份文件"""
+        self._imports += 1
+        data = synthetic_dataset(1, 5, seed=self._imports)
+        for c in data["categories"]:
+            c["name"] = f"import-{os.getpid()}-{self._imports}"
+        for w in data["websites"]:
+            w["name"] = f"import {self._imports}-{w['id']}"
+            w["url"] = f"{DEAD_ORIGIN}/import/{self._imports}/{w['id']}"
+            w["back_url"] = None
+        r = await self.client.post(
+            "/api/data/load",
+            files={"file": ("import.json", json.dumps(data),
+                            "application/json")})
+        r.raise_for_status()
+
+    async def worker(self, deadline: float) -> None:
+        """按权重随机执行操作直到截止时间"""
+        ops = list(MIX)
+        weights = [MIX[op] for op in ops]
+        while time.monotonic() < deadline:
+            op = self.rng.choices(ops, weights)[0]
+            func = self.import_ if op == "import" else getattr(self, op)
+            start = time.perf_counter()
+            try:
+                await func()
+                self.latencies[op].append(time.perf_counter() - start)
+            except httpx.HTTPError:
+                self.errors[op] += 1
+
+    async def run(self, seconds: float, concurrency: int,
+                  server_pid: Optional[int] = None) -> Dict:
+        """运行压测，期间采样服务进程内存"""
+        deadline = time.monotonic() + seconds
+        samples: List[float] = []
+
+        async def sample_rss() -> None:
+            while time.monotonic() < deadline:
+                samples.append(rss_mb(str(server_pid)))
+                await asyncio.sleep(0.5)
+
+        tasks = [self.worker(deadline) for _ in range(concurrency)]
+        if server_pid:
+            tasks.append(sample_rss())
+        start = time.perf_counter()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+        total = sum(len(v) for v in self.latencies.values())
+        result = {
+            "seconds": round(elapsed, 2),
+            "concurrency": concurrency,
+            "operations_per_sec": round(total / elapsed, 1),
+            "operations": {
+                op: dict(summarize(values), errors=self.errors[op])
+                for op, values in self.latencies.items()
+            },
+            "client_peak_rss_mb": peak_rss_mb(),
+        }
+        if samples:
+            result["server_rss_mb"] = {"end": samples[-1],
+                                       "peak": max(samples)}
+        return result
+
+
+async def login(client: httpx.AsyncClient, username: str,
+                password: str) -> None:
+    """登录并设置认证头"""
+    r = await client.post("/api/auth/login",
+                          json={"username": username, "password": password})
+    r.raise_for_status()
+    client.headers["Authorization"] = f"Bearer {r.json()['access_token']}"
+
+
+async def main(args: argparse.Namespace) -> Dict:
+    """准备服务并运行压测"""
+    server = None
+    workdir = None
+    base_url = args.url
+    username, password = args.username, args.password
+    if base_url is None:
+        backend = "postgres" if args.postgres else "sqlite"
+        workdir = tempfile.mkdtemp(prefix="mynavi_load_")
+        sqlite_path = str(Path(workdir) / "load.sqlite3")
+        await prepare_database(db_config(backend, sqlite_path),
+                               args.categories, args.websites)
+        env = {
+            "POSTGRES_DB_TYPE": backend,
+            "POSTGRES_SQLITE_DB_PATH": sqlite_path,
+            "RATE_LIMIT_ENABLED": "false",
+            "BACKUP_ENABLED": "false",
+            "PROFILER_ENABLED": "false",
+            "EVENTS_ENABLED": "false",
+        }
+        server = start_server(args.port, env)
+        base_url = f"http://127.0.0.1:{args.port}"
+        username, password = USERNAME, PASSWORD
+    try:
+        await wait_ready(base_url)
+        limits = httpx.Limits(max_connections=args.concurrency * 2)
+        async with httpx.AsyncClient(base_url=base_url, timeout=60,
+                                     limits=limits) as client:
+            await login(client, username, password)
+            r = await client.get("/api/websites/")
+            r.raise_for_status()
+            website_ids = [w["id"] for w in r.json()][:1000]
+            runner = LoadRunner(client, website_ids)
+            result = await runner.run(
+                args.seconds, args.concurrency,
+                server.pid if server else None)
+            result["websites"] = len(r.json())
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return save_results("load", result, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default=None, help="压测已运行的服务")
+    parser.add_argument("--username", default=USERNAME)
+    parser.add_argument("--password", default=PASSWORD)
+    parser.add_argument("--postgres", action="store_true")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--websites", type=int, default=100,
+                        help="每个分类的网址数")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("-o", "--output", default=None)
+    report = asyncio.run(main(parser.parse_args()))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
@@ -0,0 +1,147 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-11-28 10:36:05
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-11-28 10:36:05
+ # @ Description: 热点函数微基准
+
+ list_websites / get_current_user / RateLimiter.is_allowed / restore_data，
+ 输出各项 p50/p95/p99 延迟与进程内存，结果可保存为 JSON 供 compare 对比。
+
+ 用法:
+    python -m benchmarks.micro -o bench_results/micro.json
+    python -m benchmarks.micro --postgres       # 使用 POSTGRES_* 环境变量
+    python -m benchmarks.micro --onenav         # restore_data 使用 OneNav 转换数据
+ '''
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Awaitable, Callable, Dict, List
+from tortoise import Tortoise
+import app.tasks.websites as website_tasks
+from app.db.models import User, Website
+from app.middleware.rate_limit import RateLimiter
+from app.security import create_access_token, get_current_user
+from benchmarks.common import (
+    db_config, open_db, peak_rss_mb, rss_mb, save_results, seed, summarize)
+from benchmarks.datagen import onenav_dataset, synthetic_dataset
+
+
+async def run_timed(
+    func: Callable[[], Awaitable], repeat: int, warmup: int = 3
+) -> Dict:
+    """重复执行协程函数并统计延迟"""
+    for _ in range(min(warmup, repeat)):
+        await func()
+    latencies: List[float] = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        t = time.perf_counter()
+        await func()
+        latencies.append(time.perf_counter() - t)
+    elapsed = time.perf_counter() - start
+    result = summarize(latencies)
+    result["ops_per_sec"] = round(repeat / elapsed, 1) if elapsed else None
+    return result
+
+
+async def bench_list_websites(repeat: int) -> Dict:
+    """首页全量列表、按分类、按名称搜索"""
+    cid = (await Website.first()).category_id
+    return {
+        "all": await run_timed(Website.list_websites, repeat),
+        "by_category": await run_timed(
+            lambda: Website.list_websites(cid=cid), repeat),
+        "search": await run_timed(
+            lambda: Website.list_websites(q="site 0-"), repeat),
+    }
+
+
+async def bench_get_current_user(repeat: int) -> Dict:
+    """令牌解码 + 用户查询(每个受保护请求都会执行)"""
+    token = create_access_token("bench0")
+    return await run_timed(lambda: get_current_user(token), repeat)
+
+
+async def bench_rate_limiter(calls: int, keys: int) -> Dict:
+    """限流检查，keys 个客户端交替请求"""
+    limiter = RateLimiter()
+    latencies: List[float] = []
+    for i in range(calls):
+        t = time.perf_counter()
+        await limiter.is_allowed(f"10.0.{i % keys // 256}.{i % 256}",
+                                 limit=calls, window=60)
+        latencies.append(time.perf_counter() - t)
+    result = summarize(latencies)
+    result["ops_per_sec"] = round(calls / sum(latencies), 1)
+    return result
+
+
+async def bench_restore_data(data: Dict, rounds: int) -> Dict:
+    """导入数据，每轮使用新用户；图标下载替换为空操作，不访问网络"""
+    async def skip_favicons(ids):
+        return None
+    original = website_tasks.download_favicons
+    website_tasks.download_favicons = skip_favicons
+    latencies: List[float] = []
+    try:
+        for i in range(rounds):
+            user = await User.create(username=f"import{i}",
+                                     password_hash="-")
+            # 分类名全局唯一，每轮使用不同的名称
+            payload = dict(data, categories=[
+                dict(c, name=f"{c['name']}#{i}") for c in data["categories"]])
+            t = time.perf_counter()
+            await website_tasks.restore_data(payload, user)
+            latencies.append(time.perf_counter() - t)
+    finally:
+        website_tasks.download_favicons = original
+    result = summarize(latencies)
+    result["websites"] = len(data["websites"])
+    result["rows_per_sec"] = round(
+        len(data["websites"]) * rounds / sum(latencies), 1)
+    return result
+
+
+async def main(args: argparse.Namespace) -> Dict:
+    """造数并运行全部微基准"""
+    backend = "postgres" if args.postgres else "sqlite"
+    await open_db(db_config(backend))
+    try:
+        await seed(args.categories, args.websites)
+        build = onenav_dataset if args.onenav else synthetic_dataset
+        dataset = build(args.import_categories, args.import_websites)
+        results = {
+            "backend": backend,
+            "rows": args.categories * args.websites,
+            "list_websites": await bench_list_websites(args.repeat),
+            "get_current_user": await bench_get_current_user(
+                args.repeat * 10),
+            "rate_limiter": await bench_rate_limiter(args.calls, args.keys),
+            "restore_data": await bench_restore_data(dataset, args.rounds),
+            "rss_mb": rss_mb(),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+    finally:
+        await Tortoise.close_connections()
+    return save_results("micro", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--postgres", action="store_true")
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--websites", type=int, default=100,
+                        help="每个分类的网址数")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--calls", type=int, default=100000)
+    parser.add_argument("--keys", type=int, default=1000)
+    parser.add_argument("--onenav", action="store_true")
+    parser.add_argument("--import-categories", type=int, default=20)
+    parser.add_argument("--import-websites", type=int, default=25)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("-o", "--output", default=None)
+    report = asyncio.run(main(parser.parse_args()))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
@@ -0,0 +1,132 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-12-03 14:07:33
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-12-03 14:07:33
+ # @ Description: OneNav 迁移基准：直接导入与流式 JSON 转换
+
+ 按规模生成 OneNav 数据库文件(.db3)，分别统计:
+   - import_onenav 直接写入数据库的耗时、每秒行数、跳过的重复网址
+   - depends/utils 中 convert_onenav_db3 流式转换为 JSON 的耗时
+   - 两者的 Python 内存分配峰值(tracemalloc，单独一轮，不计入耗时)，
+     规模增大时应基本不变
+
+ 用法:
+    python -m benchmarks.onenav --links 10000 100000 -o bench_results/onenav.json
+    python -m benchmarks.onenav --links 100000 --batch-size 1000
+ '''
+
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Tuple
+from tortoise import Tortoise
+from app.db.models import User, Website
+from app.tasks.onenav import import_onenav
+from benchmarks.common import db_config, open_db, peak_rss_mb, save_results
+from benchmarks.datagen import UTILS_DIR, onenav_db3
+
+
+async def traced(run: Callable[[], Awaitable]) -> Tuple[float, float]:
+    """运行一次，返回 (秒, Python 内存分配峰值 MB)"""
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        await run()
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return seconds, round(peak / 1024 / 1024, 2)
+
+
+async def run_import(source: Path, target: Path,
+                     batch_size: int) -> Dict:
+    """导入到新建的数据库"""
+    await open_db(db_config("sqlite", str(target)))
+    try:
+        user = await User.create(username="onenav", password_hash="-")
+        summary = await import_onenav(str(source), user, batch_size)
+        summary["rows"] = await Website.filter(owner_id=user.id).count()
+    finally:
+        await Tortoise.close_connections()
+    target.unlink(missing_ok=True)
+    return summary
+
+
+async def run_size(links: int, args: argparse.Namespace,
+                   workdir: Path) -> Dict:
+    """单个规模：生成数据库后导入与转换"""
+    per_category = max(1, links // args.categories)
+    source = onenav_db3(workdir / f"onenav_{links}.db3",
+                        args.categories, per_category)
+    target = workdir / f"mynavi_{links}.sqlite3"
+    total = args.categories * per_category
+
+    start = time.perf_counter()
+    summary = await run_import(source, target, args.batch_size)
+    import_seconds = time.perf_counter() - start
+    _, import_peak = await traced(
+        lambda: run_import(source, target, args.batch_size))
+
+    if str(UTILS_DIR) not in sys.path:
+        sys.path.append(str(UTILS_DIR))
+    from website_data_convert import convert_onenav_db3
+    output = workdir / f"websites_{links}.json"
+
+    async def convert() -> None:
+        # 转换脚本会打印统计信息，避免混入 JSON 输出
+        with contextlib.redirect_stdout(sys.stderr):
+            convert_onenav_db3(str(source), str(output))
+
+    start = time.perf_counter()
+    await convert()
+    convert_seconds = time.perf_counter() - start
+    _, convert_peak = await traced(convert)
+    return {
+        "links": total,
+        "batch_size": args.batch_size,
+        "import": {
+            "seconds": round(import_seconds, 2),
+            "rows_per_sec": round(total / import_seconds, 1),
+            "peak_alloc_mb": import_peak,
+            "summary": summary,
+        },
+        "convert_json": {
+            "seconds": round(convert_seconds, 2),
+            "rows_per_sec": round(total / convert_seconds, 1),
+            "peak_alloc_mb": convert_peak,
+            "output_mb": round(output.stat().st_size / 1024 / 1024, 2),
+        },
+    }
+
+
+async def main(args: argparse.Namespace) -> Dict:
+    """运行各规模"""
+    workdir = Path(tempfile.mkdtemp(prefix="onenav_bench_"))
+    try:
+        results = {"runs": []}
+        for links in args.links:
+            results["runs"].append(await run_size(links, args, workdir))
+        results["peak_rss_mb"] = peak_rss_mb()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return save_results("onenav", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--links", type=int, nargs="*",
+                        default=[10000, 100000])
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("-o", "--output", default=None)
+    report = asyncio.run(main(parser.parse_args()))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
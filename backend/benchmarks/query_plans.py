@@ -0,0 +1,119 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-11-22 15:42:10
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-11-22 15:42:10
+ # @ Description: 检查列表、筛选、导出查询的执行计划是否命中索引
+
+ 用法:
+    python -m benchmarks.query_plans              # SQLite
+    python -m benchmarks.query_plans --postgres   # 使用 POSTGRES_* 环境变量
+    python -m pytest tests/test_query_plans.py    # 断言检查，供 CI 执行
+ '''
+
+import argparse
+import asyncio
+import json
+import sys
+from typing import Dict, List, Optional
+from tortoise import Tortoise
+from tortoise.transactions import in_transaction
+from tortoise.expressions import Q
+from tortoise.queryset import QuerySet
+from app.db.models import User, Category, Website, SORT_RULE
+from app.urls import url_hash
+from .common import db_config, open_db, seed
+
+
+async def queries() -> Dict[str, QuerySet]:
+    """与接口实现一致的主要查询"""
+    user = await User.first()
+    cid = await Category.filter(created_user_id=user.id).first().values_list(
+        "id", flat=True)
+    return {
+        "list_websites": Website.filter(Q()).order_by(*SORT_RULE),
+        "filter_websites": Website.filter(
+            Q(category_id=cid)).order_by(*SORT_RULE),
+        "list_categories": Category.filter(Q()).order_by(*SORT_RULE),
+        "dump_websites": Website.filter(owner_id=user.id),
+        "dump_categories": Category.filter(created_user=user),
+        "bookmarked": Website.filter(url_hash__in=[
+            url_hash(f"https://s0-{cid}-{i}.example.com/") for i in range(5)
+        ]),
+    }
+
+
+def check_sqlite(plan: List) -> List[str]:
+    """SQLite: 不允许全表扫描和临时排序"""
+    problems = []
+    for row in plan:
+        detail = row["detail"]
+        if detail.startswith("SCAN") and "INDEX" not in detail:
+            problems.append(detail)
+        if "TEMP B-TREE" in detail:
+            problems.append(detail)
+    return problems
+
+
+def check_postgres(plan: List) -> List[str]:
+    """Postgres: 不允许 Seq Scan 和 Sort 节点"""
+    problems = []
+
+    def walk(node: Dict) -> None:
+        if node["Node Type"] in ("Seq Scan", "Sort"):
+            problems.append(f'{node["Node Type"]} on {node.get("Relation Name", "-")}')
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+    return problems
+
+
+async def collect_problems(
+    postgres: bool, categories: int, websites: int,
+    sqlite_path: Optional[str] = None
+) -> Dict[str, List[str]]:
+    """造数并检查执行计划，返回 {查询名: 问题列表}"""
+    backend = "postgres" if postgres else "sqlite"
+    await open_db(db_config(backend, sqlite_path))
+    try:
+        await seed(categories, websites, owners=2)
+        # SET 只对当前连接生效，与 EXPLAIN 放在同一个事务(同一连接)中执行
+        async with in_transaction("default") as conn:
+            if postgres:
+                # 小数据量下规划器会倾向顺序扫描，这里只验证索引可用
+                await conn.execute_script(
+                    "ANALYZE; SET LOCAL enable_seqscan = off; "
+                    "SET LOCAL enable_sort = off;")
+                check = check_postgres
+            else:
+                await conn.execute_script("ANALYZE;")
+                check = check_sqlite
+            results = {}
+            for name, qs in (await queries()).items():
+                plan = await qs.using_db(conn).explain()
+                if postgres and isinstance(plan[0], str):
+                    plan = json.loads(plan[0])
+                results[name] = check(plan)
+    finally:
+        await Tortoise.close_connections()
+    return results
+
+
+async def main(postgres: bool, categories: int, websites: int) -> int:
+    """输出检查结果，返回失败数量"""
+    results = await collect_problems(postgres, categories, websites)
+    for name, problems in results.items():
+        print(f"{'FAIL' if problems else 'ok  '} {name}")
+        for problem in problems:
+            print(f"       {problem}")
+    return sum(bool(problems) for problems in results.values())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--postgres", action="store_true")
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--websites", type=int, default=50)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.postgres, args.categories, args.websites)))
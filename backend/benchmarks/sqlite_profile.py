@@ -0,0 +1,168 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-11-23 10:18:36
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-11-23 10:18:36
+ # @ Description: 对比不同 SQLite PRAGMA 配置下的读写并发
+
+ 模拟首页列表读取与图标任务写入同时进行：一个写线程不断提交小事务，
+ 多个读线程(各自独立连接)不断读取列表，统计吞吐与延迟。
+
+ 用法:
+    python -m benchmarks.sqlite_profile --seconds 5 --readers 4
+ '''
+
+import argparse
+import json
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+from app.config import DatabaseSettings
+
+
+PROFILES: Dict[str, Dict] = {
+    # SQLite 库默认值：回滚日志 + FULL 同步
+    "rollback": {"journal_mode": "DELETE", "synchronous": "FULL"},
+    # Tortoise 默认值：WAL + FULL 同步，无其他调优
+    "tortoise_default": {"journal_mode": "WAL", "synchronous": "FULL",
+                         "journal_size_limit": 16384},
+    # 当前配置
+    "tuned": DatabaseSettings(db_type="sqlite").sqlite_pragmas,
+}
+
+SCHEMA = """
+CREATE TABLE websites (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(128) NOT NULL,
+    url VARCHAR(255) NOT NULL,
+    icon VARCHAR(255) NOT NULL DEFAULT 'default.webp',
+    sort_order INT NOT NULL DEFAULT 0,
+    category_id INT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX idx_websites_sort ON websites (sort_order DESC, created_at);
+"""
+LIST_SQL = ("SELECT * FROM websites ORDER BY sort_order DESC, created_at "
+            "LIMIT 500")
+WRITE_SQL = "UPDATE websites SET icon = ? WHERE id = ?"
+
+
+def connect(path: str, pragmas: Dict) -> sqlite3.Connection:
+    """按配置建立连接"""
+    conn = sqlite3.connect(path, timeout=5, isolation_level=None,
+                           check_same_thread=False)
+    for key, value in pragmas.items():
+        conn.execute(f"PRAGMA {key}={value}")
+    return conn
+
+
+def percentile(values: List[float], p: float) -> float:
+    """计算百分位(毫秒)"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return round(values[index] * 1000, 3)
+
+
+def run_profile(name: str, pragmas: Dict, rows: int,
+                seconds: float, readers: int) -> Dict:
+    """运行单个配置"""
+    workdir = tempfile.mkdtemp(prefix=f"sqlite_{name}_")
+    path = str(Path(workdir) / "bench.sqlite3")
+    setup = connect(path, pragmas)
+    setup.executescript(SCHEMA)
+    setup.execute("BEGIN")
+    setup.executemany(
+        "INSERT INTO websites (name, url, sort_order, category_id) "
+        "VALUES (?, ?, ?, ?)",
+        [(f"site {i}", f"https://s{i}.example.com/", i, i % 20)
+         for i in range(rows)])
+    setup.execute("COMMIT")
+    setup.close()
+
+    stop = threading.Event()
+    read_latency: List[float] = []
+    write_latency: List[float] = []
+    errors = {"read": 0, "write": 0}
+    lock = threading.Lock()
+
+    def reader() -> None:
+        conn = connect(path, pragmas)
+        local: List[float] = []
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                conn.execute(LIST_SQL).fetchall()
+                local.append(time.perf_counter() - start)
+            except sqlite3.OperationalError:
+                errors["read"] += 1
+        with lock:
+            read_latency.extend(local)
+        conn.close()
+
+    def writer() -> None:
+        conn = connect(path, pragmas)
+        i = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(WRITE_SQL, (f"{i}.ico", i % rows + 1))
+                conn.execute("COMMIT")
+                write_latency.append(time.perf_counter() - start)
+            except sqlite3.OperationalError:
+                errors["write"] += 1
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+            i += 1
+        conn.close()
+
+    threads = [threading.Thread(target=writer)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "profile": name,
+        "pragmas": pragmas,
+        "reads_per_sec": round(len(read_latency) / seconds, 1),
+        "writes_per_sec": round(len(write_latency) / seconds, 1),
+        "read_p50_ms": percentile(read_latency, 50),
+        "read_p95_ms": percentile(read_latency, 95),
+        "read_p99_ms": percentile(read_latency, 99),
+        "write_p50_ms": percentile(write_latency, 50),
+        "write_p95_ms": percentile(write_latency, 95),
+        "read_mean_ms": round(statistics.fmean(read_latency) * 1000, 3)
+        if read_latency else 0.0,
+        "errors": errors,
+    }
+
+
+def main() -> None:
+    """运行全部配置并输出 JSON"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--profiles", nargs="*", default=list(PROFILES))
+    args = parser.parse_args()
+    results = [
+        run_profile(name, PROFILES[name], args.rows, args.seconds, args.readers)
+        for name in args.profiles
+    ]
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-12-04 14:18:52
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-12-04 14:18:52
+ # @ Description: 启动耗时基准
+
+ 在独立的 SQLite 数据库上反复启动 uvicorn 子进程，统计从启动进程到
+ /health 返回 200 的时间(中位数与最大值):
+   - cold: 新数据库，需要建表、迁移并创建超级管理员
+   - warm: 结构指纹未变化，跳过建表与迁移(容器重启、扩容的常见情况)
+   - warm_full_init: 删除结构指纹后重启，即每次启动都执行完整初始化
+ 另外单独统计 import app.main 的耗时与导入后已加载的慢模块
+ (httpx、aiofiles、jose.jwt、passlib、asyncpg 应推迟到首次使用)。
+
+ 用法:
+    python -m benchmarks.startup --rounds 5 -o bench_results/startup.json
+ '''
+
+import os
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+from typing import Callable, Dict, List
+import httpx
+from benchmarks.common import save_results
+
+
+# 启动阶段不应导入的模块
+DEFERRED_MODULES = ("httpx", "aiofiles", "jose.jwt", "passlib.context",
+                    "asyncpg")
+IMPORT_SCRIPT = """
+import sys, json, time, types
+start = time.perf_counter()
+import app.main
+print(json.dumps({
+    "seconds": time.perf_counter() - start,
+    # 延迟导入的模块在 sys.modules 中是尚未执行的 _LazyModule
+    "loaded": [m for m in %r
+               if type(sys.modules.get(m)) is types.ModuleType],
+}))
+"""
+
+
+def server_env(sqlite_path: Path) -> Dict[str, str]:
+    """子进程环境：独立数据库，关闭后台任务"""
+    return {
+        **os.environ,
+        "POSTGRES_DB_TYPE": "sqlite",
+        "POSTGRES_SQLITE_DB_PATH": str(sqlite_path),
+        "BACKUP_ENABLED": "false",
+        "LINK_CHECK_ENABLED": "false",
+        "SUPERADMIN_NAME": "admin",
+        "SUPERADMIN_PASSWORD": "startup-bench",
+    }
+
+
+def measure_import(env: Dict[str, str]) -> Dict:
+    """在新进程中导入 app.main"""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT % (DEFERRED_MODULES,)],
+        env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def boot(port: int, env: Dict[str, str], timeout: float = 30) -> float:
+    """启动 uvicorn，返回到 /health 可用的秒数"""
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = start + timeout
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}",
+                          timeout=1) as client:
+            while time.perf_counter() < deadline:
+                if server.poll() is not None:
+                    raise RuntimeError("Server exited during startup")
+                try:
+                    if client.get("/health").status_code == 200:
+                        return time.perf_counter() - start
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.005)
+        raise RuntimeError("Server did not become ready")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def drop_fingerprint(sqlite_path: Path) -> None:
+    """删除结构指纹，下次启动执行完整初始化"""
+    with sqlite3.connect(sqlite_path) as conn:
+        conn.execute("DELETE FROM schema_version WHERE version = 0")
+
+
+def rounds(run: Callable[[], float], count: int) -> Dict:
+    """多次运行，返回中位数与最大值(毫秒)"""
+    samples: List[float] = [run() for _ in range(count)]
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 1),
+        "max_ms": round(max(samples) * 1000, 1),
+    }
+
+
+def main(args: argparse.Namespace) -> Dict:
+    """运行各场景"""
+    workdir = Path(tempfile.mkdtemp(prefix="startup_bench_"))
+    sqlite_path = workdir / "startup.sqlite3"
+    env = server_env(sqlite_path)
+    # 从 backend 目录导入 app
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(Path(__file__).resolve().parents[1]),
+                      env.get("PYTHONPATH")]))
+    try:
+        imports = [measure_import(env) for _ in range(args.rounds)]
+
+        def cold() -> float:
+            sqlite_path.unlink(missing_ok=True)
+            return boot(args.port, env)
+
+        def full_init() -> float:
+            drop_fingerprint(sqlite_path)
+            return boot(args.port, env)
+
+        results = {
+            "import_app": {
+                "median_ms": round(statistics.median(
+                    i["seconds"] for i in imports) * 1000, 1),
+                "deferred_loaded": imports[-1]["loaded"],
+            },
+            "cold": rounds(cold, args.rounds),
+            "warm": rounds(lambda: boot(args.port, env), args.rounds),
+            "warm_full_init": rounds(full_init, args.rounds),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return save_results("startup", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--port", type=int, default=18090)
+    parser.add_argument("-o", "--output", default=None)
+    report = main(parser.parse_args())
+    print(json.dumps(report, indent=2, ensure_ascii=False))
@@ -0,0 +1,190 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-12-05 15:36:08
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-12-05 15:36:08
+ # @ Description: 多 worker 扩展性压测
+
+ 在同一份造数数据库上，按 --workers 依次以 gunicorn.py 配置启动服务
+ (WEB_CONCURRENCY=N，未安装 gunicorn 时改用 uvicorn --workers N)，
+ 用 --clients 个独立进程运行 benchmarks.load 的混合场景，避免压测端
+ 成为瓶颈，统计:
+   - 每秒操作数合计、相对单 worker 的加速比与各操作 p95
+   - 压测结束时主进程与各 worker 的 RSS/PSS(PSS 按共享页平摊，
+     能看出预加载后写时复制共享的效果)
+ 加速比受本机 CPU 数限制(见结果中的 cpus)，worker 数超过 CPU 数后不再提升。
+
+ 用法:
+    python -m benchmarks.workers --workers 1 2 4 --seconds 20 -o bench_results/workers.json
+ '''
+
+import os
+import sys
+import json
+import shutil
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Dict, List
+from benchmarks.common import db_config, rss_mb, save_results
+from benchmarks.load import (
+    PASSWORD, USERNAME, prepare_database, wait_ready)
+
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def start_server(workers: int, port: int, env: Dict[str, str],
+                 workdir: Path) -> subprocess.Popen:
+    """以生产配置启动 N 个 worker"""
+    gunicorn = shutil.which("gunicorn")
+    if gunicorn:
+        command = [gunicorn, "-c", "gunicorn.py", "app.main:app",
+                   "--pid", str(workdir / "gunicorn.pid")]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "app.main:app",
+                   "--host", "127.0.0.1", "--port", str(port),
+                   "--workers", str(workers)]
+    return subprocess.Popen(
+        command, cwd=BACKEND_DIR,
+        env={**os.environ, **env,
+             "WEB_CONCURRENCY": str(workers),
+             "GUNICORN_BIND": f"127.0.0.1:{port}",
+             "GUNICORN_ACCESS_LOG": "",
+             "GUNICORN_LOG_LEVEL": "warning"},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def child_pids(pid: int) -> List[int]:
+    """子进程(worker)列表，仅 Linux"""
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", encoding="utf-8") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def pss_mb(pid: int) -> float:
+    """按共享页平摊后的内存(MB，仅 Linux)"""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return 0.0
+
+
+def memory(pid: int) -> Dict:
+    """主进程与各 worker 的内存"""
+    workers = child_pids(pid)
+    return {
+        "master_rss_mb": rss_mb(str(pid)),
+        "worker_rss_mb": [rss_mb(str(p)) for p in workers],
+        "total_pss_mb": round(
+            sum(pss_mb(p) for p in [pid, *workers]), 1),
+    }
+
+
+async def run_clients(base_url: str, args: argparse.Namespace,
+                      workdir: Path) -> List[Dict]:
+    """多个压测进程同时运行 benchmarks.load"""
+    clients = []
+    for i in range(args.clients):
+        output = workdir / f"client_{i}.json"
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "benchmarks.load", "--url", base_url,
+            "--username", USERNAME, "--password", PASSWORD,
+            "--seconds", str(args.seconds),
+            "--concurrency", str(args.concurrency),
+            "-o", str(output),
+            cwd=BACKEND_DIR, stdout=asyncio.subprocess.DEVNULL)
+        clients.append((process, output))
+    results = []
+    for process, output in clients:
+        if await process.wait() != 0:
+            raise RuntimeError("Load client failed")
+        results.append(
+            json.loads(output.read_text(encoding="utf-8"))["results"])
+    return results
+
+
+async def run_workers(workers: int, args: argparse.Namespace, env: Dict,
+                      workdir: Path) -> Dict:
+    """单个 worker 数：启动服务、压测并记录内存"""
+    server = start_server(workers, args.port, env, workdir)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        await wait_ready(base_url, timeout=60)
+        clients = await run_clients(base_url, args, workdir)
+        used = memory(server.pid)
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+    ops = {}
+    for op in clients[0]["operations"]:
+        ops[op] = {
+            "p95_ms": max(c["operations"][op]["p95_ms"] for c in clients),
+            "errors": sum(c["operations"][op]["errors"] for c in clients),
+        }
+    return {
+        "workers": workers,
+        "operations_per_sec": round(
+            sum(c["operations_per_sec"] for c in clients), 1),
+        "operations": ops,
+        **used,
+    }
+
+
+async def main(args: argparse.Namespace) -> Dict:
+    """准备数据库并依次压测各 worker 数"""
+    workdir = Path(tempfile.mkdtemp(prefix="mynavi_workers_"))
+    sqlite_path = str(workdir / "load.sqlite3")
+    await prepare_database(db_config("sqlite", sqlite_path),
+                           args.categories, args.websites)
+    env = {
+        "POSTGRES_DB_TYPE": "sqlite",
+        "POSTGRES_SQLITE_DB_PATH": sqlite_path,
+        "RUNTIME_DIR": str(workdir / "runtime"),
+        "RATE_LIMIT_ENABLED": "false",
+        "BACKUP_ENABLED": "false",
+        "LINK_CHECK_ENABLED": "false",
+        "PROFILER_ENABLED": "false",
+    }
+    try:
+        runs = [await run_workers(n, args, env, workdir)
+                for n in args.workers]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    base = runs[0]["operations_per_sec"] or 1
+    for run in runs:
+        run["speedup"] = round(run["operations_per_sec"] / base, 2)
+    results = {
+        "cpus": len(os.sched_getaffinity(0)),
+        "clients": args.clients,
+        "concurrency_per_client": args.concurrency,
+        "runs": runs,
+    }
+    return save_results("workers", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="*", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=2,
+                        help="压测进程数")
+    parser.add_argument("--concurrency", type=int, default=10,
+                        help="每个压测进程的并发数")
+    parser.add_argument("--port", type=int, default=18100)
+    parser.add_argument("--categories", type=int, default=50)
+    parser.add_argument("--websites", type=int, default=100,
+                        help="每个分类的网址数")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("-o", "--output", default=None)
+    report = asyncio.run(main(parser.parse_args()))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
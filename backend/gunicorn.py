@@ -3,26 +3,144 @@
 @File    :   gunicorn.py
 @Time    :   2025/02/17 15:56:16
 @Author  :   Alucard Zheng
-@Version :   1.0
+@Version :   1.1
 @Contact :   zheng.hanbin@sihanfu.cn
-@Desc    :   None
+@Desc    :   生产环境 gunicorn 配置
+
+worker 数默认取可用 CPU 数(考虑 cgroup 配额)，并按可用内存与单个 worker 的
+内存预算(GUNICORN_WORKER_MEMORY_MB)封顶，可用 WEB_CONCURRENCY 直接指定。
+preload_app 在主进程中导入应用、完成一次数据库初始化并提前加载延迟导入的模块，
+fork 出的 worker 以写时复制方式共享这些内存；worker 处理 GUNICORN_MAX_REQUESTS
+个请求后自动重启，避免内存碎片持续增长。
+worker 数通过 WEB_CONCURRENCY 传给应用，大于 1 时限流状态、SSE 事件转发
+与定时任务锁改为同机进程间共享(共享文件位于 RUNTIME_DIR)。
 '''
 
 # here put the import lib
+import os
+import gc
+import asyncio
+import importlib.util
+
+try:
+    from uvicorn_worker import UvicornWorker
+except ImportError:  # 旧版本 uvicorn 自带的 worker
+    from uvicorn.workers import UvicornWorker
+
+
+def _env_int(name: str, default: int) -> int:
+    """读取整数环境变量"""
+    value = os.environ.get(name, "").strip()
+    return int(value) if value else default
+
+
+def available_cpus() -> int:
+    """可用 CPU 数：CPU 亲和性与 cgroup v2 配额取小"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max", encoding="utf-8") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, -(-int(quota) // int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def available_memory_mb() -> int:
+    """可用内存(MB)：系统可用内存与 cgroup v2 限制取小，未知时返回 0"""
+    memory = 0
+    try:
+        with open("/proc/meminfo", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    memory = int(line.split()[1]) // 1024
+                    break
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/memory.max", encoding="utf-8") as f:
+            limit = f.read().strip()
+        if limit != "max":
+            limit_mb = int(limit) // 1024 // 1024
+            memory = min(memory, limit_mb) if memory else limit_mb
+    except (OSError, ValueError):
+        pass
+    return memory
+
+
+def default_workers() -> int:
+    """按 CPU 与内存计算 worker 数"""
+    count = min(available_cpus(), _env_int("GUNICORN_MAX_WORKERS", 8))
+    memory = available_memory_mb()
+    if memory:
+        # 预留四分之一给主进程、nginx 与系统页缓存
+        budget = _env_int("GUNICORN_WORKER_MEMORY_MB", 256)
+        count = min(count, memory * 3 // 4 // budget)
+    return max(1, count)
+
+
+class AppWorker(UvicornWorker):
+    """已安装 uvloop/httptools 时使用，否则回退到 asyncio/h11"""
+    CONFIG_KWARGS = {
+        "loop": "uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        "http": "httptools" if importlib.util.find_spec("httptools")
+        else "h11",
+    }
+
+
 # 并行工作进程数
-workers = 1
-worker_class = "uvicorn.workers.UvicornWorker"
-# 指定每个工作者的线程数
-threads = 2
-# 监听内网端口5000
-bind = 'unix:/tmp/gunicorn.sock'
+workers = _env_int("WEB_CONCURRENCY", 0) or default_workers()
+worker_class = AppWorker
+# 传给应用(主进程预加载前设置)，决定是否在 worker 之间共享状态
+raw_env = [f"WEB_CONCURRENCY={workers}"]
+# 主进程预加载应用，worker 共享已导入的代码
+preload_app = True
+# 处理一定数量请求后重启 worker，抖动避免所有 worker 同时重启
+max_requests = _env_int("GUNICORN_MAX_REQUESTS", 20000)
+max_requests_jitter = max(1, max_requests // 10)
+timeout = _env_int("GUNICORN_TIMEOUT", 60)
+graceful_timeout = 30
+keepalive = 5
+# 默认监听 unix socket，由 nginx 转发；压测时可改为 127.0.0.1:8000
+bind = os.environ.get("GUNICORN_BIND", "unix:/tmp/gunicorn.sock")
 # bind = 'unix:/tmp/my-comfyui-client.sock'
 # 设置守护进程,将进程交给supervisor管理
 # daemon = 'true'
 # 设置进程文件目录
 pidfile = './pid.pid'
-# 设置访问日志和错误信息日志路径
-accesslog = '-'
+# 设置访问日志和错误信息日志路径，GUNICORN_ACCESS_LOG 为空时关闭访问日志
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-") or None
 errorlog = '-'
 # 设置日志记录水平
-loglevel = 'debug'
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+
+def on_starting(server) -> None:
+    """主进程(应用已预加载)：初始化数据库并提前导入延迟加载的模块
+
+    建表、迁移与超级管理员检查只在这里执行一次，worker 启动时
+    结构指纹一致，直接跳过
+    """
+    from app.config import db_settings
+    from app.db.init import init_db, close_db
+    from app.lazy import load_all
+
+    async def prepare() -> None:
+        await init_db(config=db_settings.db_config)
+        await close_db()
+
+    asyncio.run(prepare())
+    load_all()
+    server.log.info("Workers: %s, loop: %s, http: %s", workers,
+                    AppWorker.CONFIG_KWARGS["loop"],
+                    AppWorker.CONFIG_KWARGS["http"])
+
+
+def when_ready(server) -> None:
+    """fork 前冻结已有对象，避免 worker 中的垃圾回收改写共享页"""
+    gc.collect()
+    gc.freeze()
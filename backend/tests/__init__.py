@@ -0,0 +1,6 @@
+"""
+自动化测试
+
+在 backend 目录下运行:
+    python -m pytest
+"""
@@ -0,0 +1,93 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-12-08 09:40:22
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-12-08 09:40:22
+ # @ Description: 变更日志的游标顺序
+
+ 同步游标要求 id 小于已见游标的记录都已提交。Postgres 上并发事务写入
+ 变更时由咨询锁串行化，后写入的事务需等待先持锁的事务提交。
+ 设置 POSTGRES_DB_TYPE=postgres 时检查 POSTGRES_* 指向的库
+ (会清空其中的数据表，请使用专用的测试库)。
+ '''
+
+import os
+import asyncio
+import pytest
+from tortoise import Tortoise
+from tortoise.transactions import in_transaction
+from app.db.models import ChangeLog, Website
+from benchmarks.common import db_config, open_db
+
+
+async def recorded_ids() -> list:
+    """按游标顺序排列的对象 id"""
+    return await ChangeLog.all().order_by("id").values_list(
+        "object_id", flat=True)
+
+
+async def record_in_and_out_of_transaction() -> list:
+    """事务内、事务外写入，以及回滚的事务"""
+    await ChangeLog.record(Website, [1])
+    async with in_transaction("default") as tx:
+        await ChangeLog.record(Website, [2], using_db=tx)
+    with pytest.raises(RuntimeError):
+        async with in_transaction("default") as tx:
+            await ChangeLog.record(Website, [3], using_db=tx)
+            raise RuntimeError("rollback")
+    return await recorded_ids()
+
+
+async def concurrent_commits() -> list:
+    """先持锁的事务未提交时，其他写入(事务外)需等待"""
+    recorded, release = asyncio.Event(), asyncio.Event()
+
+    async def first() -> None:
+        async with in_transaction("default") as tx:
+            await ChangeLog.record(Website, [10], using_db=tx)
+            recorded.set()
+            await release.wait()
+
+    async def second() -> None:
+        await recorded.wait()
+        await ChangeLog.record(Website, [20])
+
+    holder = asyncio.create_task(first())
+    waiter = asyncio.create_task(second())
+    await recorded.wait()
+    await asyncio.sleep(0.2)
+    assert not waiter.done()
+    release.set()
+    await asyncio.gather(holder, waiter)
+    return await recorded_ids()
+
+
+def run(backend: str, scenario, sqlite_path: str = None) -> list:
+    """在新建的库上运行场景"""
+    async def main() -> list:
+        await open_db(db_config(backend, sqlite_path))
+        try:
+            return await scenario()
+        finally:
+            await Tortoise.close_connections()
+    return asyncio.run(main())
+
+
+def test_sqlite_record(tmp_path):
+    assert run("sqlite", record_in_and_out_of_transaction,
+               str(tmp_path / "changes.sqlite3")) == [1, 2]
+
+
+postgres = pytest.mark.skipif(
+    os.environ.get("POSTGRES_DB_TYPE") != "postgres",
+    reason="需要 POSTGRES_DB_TYPE=postgres 与本地测试库")
+
+
+@postgres
+def test_postgres_record():
+    assert run("postgres", record_in_and_out_of_transaction) == [1, 2]
+
+
+@postgres
+def test_postgres_ids_follow_commit_order():
+    assert run("postgres", concurrent_commits) == [10, 20]
@@ -0,0 +1,32 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-12-06 10:20:14
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-12-06 10:20:14
+ # @ Description: 列表、筛选、导出查询必须命中复合索引
+
+ SQLite 使用临时数据库文件；设置 POSTGRES_DB_TYPE=postgres 时同时检查
+ POSTGRES_* 指向的库(会清空其中的数据表，请使用专用的测试库)。
+ '''
+
+import os
+import asyncio
+import pytest
+from benchmarks.query_plans import collect_problems
+
+
+def assert_indexed(postgres: bool, sqlite_path: str = None) -> None:
+    """所有查询的执行计划中都不应出现全表扫描或排序"""
+    results = asyncio.run(collect_problems(postgres, 20, 50, sqlite_path))
+    failed = {name: problems for name, problems in results.items() if problems}
+    assert not failed, failed
+
+
+def test_sqlite_plans_use_indexes(tmp_path):
+    assert_indexed(False, str(tmp_path / "plans.sqlite3"))
+
+
+@pytest.mark.skipif(os.environ.get("POSTGRES_DB_TYPE") != "postgres",
+                    reason="需要 POSTGRES_DB_TYPE=postgres 与本地测试库")
+def test_postgres_plans_use_indexes():
+    assert_indexed(True)
@@ -0,0 +1,103 @@
+'''
+ # @ Author: Alucard
+ # @ Create Time: 2025-12-08 14:05:37
+ # @ Modified by: Alucard
+ # @ Modified time: 2025-12-08 14:05:37
+ # @ Description: 旧版本数据库升级
+
+ 用最初版本(无 url_hash 字段、无排序索引)的建表语句创建 SQLite 数据库，
+ 写入数据后运行 init_db，检查迁移全部执行、索引建立在真实字段上、
+ 数据库完整性检查通过且可以继续写入。
+ '''
+
+import sqlite3
+import asyncio
+import pytest
+from app.db.init import init_db, close_db
+from app.db.models import SchemaVersion, User, Website
+from app.db.migrations import MIGRATIONS
+from benchmarks.common import db_config
+
+
+# 最初版本 generate_schemas 生成的 SQLite 结构
+BASELINE_SCHEMA = """
+CREATE TABLE "users" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "username" VARCHAR(64) NOT NULL UNIQUE,
+    "password_hash" VARCHAR(255) NOT NULL,
+    "created_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX "idx_users_usernam_266d85" ON "users" ("username");
+CREATE TABLE "categories" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "name" VARCHAR(64) NOT NULL UNIQUE,
+    "description" TEXT,
+    "icon" VARCHAR(128) NOT NULL DEFAULT 'bookmark',
+    "sort_order" INT NOT NULL DEFAULT 0,
+    "created_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "created_user_id" INT NOT NULL REFERENCES "users" ("id") ON DELETE CASCADE
+);
+CREATE INDEX "idx_categories_name_c47ef4" ON "categories" ("name");
+CREATE TABLE "websites" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "name" VARCHAR(128) NOT NULL,
+    "url" VARCHAR(255) NOT NULL,
+    "back_url" VARCHAR(255),
+    "description" TEXT,
+    "sort_order" INT NOT NULL DEFAULT 0,
+    "icon" VARCHAR(255) NOT NULL DEFAULT 'default.webp',
+    "created_at" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "category_id" INT REFERENCES "categories" ("id") ON DELETE RESTRICT,
+    "owner_id" INT NOT NULL REFERENCES "users" ("id") ON DELETE CASCADE
+);
+CREATE INDEX "idx_websites_name_c87078" ON "websites" ("name");
+"""
+
+
+def baseline_database(path: str, sites_per_owner: int) -> None:
+    """按旧结构建库，两个用户各写入若干网址(含规范化后重复的网址)"""
+    urls = ["http://e1.com/", "https://www.e1.com", "http://e2.com/"]
+    with sqlite3.connect(path) as conn:
+        conn.executescript(BASELINE_SCHEMA)
+        for owner in (1, 2):
+            conn.execute("INSERT INTO users (username, password_hash) "
+                         "VALUES (?, '-')", (f"old{owner}",))
+            conn.executemany(
+                "INSERT INTO websites (name, url, owner_id) VALUES (?, ?, ?)",
+                [(f"w{i}", url, owner)
+                 for i, url in enumerate(urls[:sites_per_owner])])
+    conn.close()
+
+
+async def upgrade(path: str) -> dict:
+    """运行 init_db 后检查迁移结果并继续写入"""
+    try:
+        await init_db(db_config("sqlite", path))
+        owner = await User.get(username="old1")
+        await Website.create(name="new", url="http://new.com/",
+                             url_hash="new", owner=owner)
+        return {
+            "versions": set(await SchemaVersion.filter(
+                version__gt=0).values_list("version", flat=True)),
+            "hashed": await Website.filter(url_hash__isnull=False).count(),
+        }
+    finally:
+        await close_db()
+
+
+@pytest.mark.parametrize("sites_per_owner", [1, 3])
+def test_upgrade_baseline_database(tmp_path, sites_per_owner):
+    path = str(tmp_path / "baseline.sqlite3")
+    baseline_database(path, sites_per_owner)
+    result = asyncio.run(upgrade(path))
+    assert result["versions"] == {version for version, _, _ in MIGRATIONS}
+    # 规范化后重复的网址只有最早的一条写入摘要，另加新建的一条
+    assert result["hashed"] == 2 * min(sites_per_owner, 2) + 1
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+        for index, columns in (
+                ("idx_websites_owner_url_hash", ["owner_id", "url_hash"]),
+                ("idx_websites_url_hash", ["url_hash"])):
+            assert [row[2] for row in conn.execute(
+                f"SELECT * FROM pragma_index_info('{index}')")] == columns
+    conn.close()
@@ -17,4 +17,5 @@ cd /app
 nginx
 # 启动主应用
 echo "Starting main application..."
-exec gunicorn -c gunicorn.py app.main:app -k uvicorn.workers.UvicornWorker 
+# worker 类型与数量由 gunicorn.py 决定，可用 WEB_CONCURRENCY 指定 worker 数
+exec gunicorn -c gunicorn.py app.main:app
@@ -74,6 +74,20 @@ export const updateCategoryApi = async (
   return response.json()
 }
 
+// 按拖拽后的顺序批量更新分类排序
+export const reorderCategoriesApi = async (ids: number[]): Promise<void> => {
+  const response = await fetch('/api/categories/order', {
+    method: 'PATCH',
+    headers: getAuthHeaders(),
+    body: JSON.stringify({ ids }),
+  })
+
+  if (!response.ok) {
+    const error = await response.json()
+    throw new Error(error.detail || '更新分类顺序失败')
+  }
+}
+
 // 删除分类
 export const deleteCategoryApi = async (categoryId: number): Promise<void> => {
   const response = await fetch(`/api/categories/${categoryId}`, {
@@ -0,0 +1,32 @@
+// 网址可用性检测 API
+import { getAuthHeaders } from './common'
+
+export interface LinkStatus {
+  website_id: number
+  ok: boolean
+  status_code: number | null
+  latency_ms: number | null
+  error: string | null
+  failures: number
+  back_ok: boolean | null
+  checked_at: string
+}
+
+export interface LinkStatusResponse {
+  running: boolean
+  dead_after: number
+  links: LinkStatus[]
+}
+
+// 获取服务端最近一次检测结果
+export const getLinkStatusApi = async (): Promise<LinkStatusResponse> => {
+  const response = await fetch('/api/links', {
+    headers: getAuthHeaders(),
+  })
+
+  if (!response.ok) {
+    throw new Error('获取网址检测结果失败')
+  }
+
+  return response.json()
+}
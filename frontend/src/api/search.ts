@@ -0,0 +1,44 @@
+// 统一搜索 API(本地书签 + SearXNG，NDJSON 流)
+import { getAuthHeaders } from './common'
+import type { SearXNGResult } from './system'
+
+export type FederatedMessage =
+  | { type: 'local'; websites: any[]; categories: any[] }
+  | ({ type: 'web' } & SearXNGResult)
+  | { type: 'error'; source: string; error: string }
+  | { type: 'done'; local: number; web: number; elapsed_ms: number }
+
+// 逐条回调搜索结果：先本地匹配，再 SearXNG 结果
+export const federatedSearch = async (
+  q: string,
+  onMessage: (message: FederatedMessage) => void,
+  options: { web?: boolean; signal?: AbortSignal } = {},
+): Promise<void> => {
+  const params = new URLSearchParams({ q, web: String(options.web ?? true) })
+  const response = await fetch(`/api/search?${params}`, {
+    headers: getAuthHeaders(),
+    signal: options.signal,
+  })
+  if (!response.ok || !response.body) {
+    throw new Error(`Search failed: ${response.status}`)
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+    const lines = buffer.split('\n')
+    buffer = lines.pop() ?? ''
+    for (const line of lines) {
+      if (line.trim()) {
+        onMessage(JSON.parse(line))
+      }
+    }
+  }
+  if (buffer.trim()) {
+    onMessage(JSON.parse(buffer))
+  }
+}
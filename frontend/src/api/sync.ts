@@ -0,0 +1,30 @@
+// 增量同步 API
+import { getAuthHeaders } from './common'
+import type { WebsiteResponse } from './websites'
+import type { CategoryResponse } from './categories'
+
+export interface SyncResponse {
+  cursor: number
+  reset: boolean
+  has_more: boolean
+  websites: WebsiteResponse[]
+  categories: CategoryResponse[]
+  deleted: {
+    websites: number[]
+    categories: number[]
+  }
+}
+
+// 获取游标之后的变更，不传 since 时只返回当前游标
+export const getChangesApi = async (since?: number): Promise<SyncResponse> => {
+  const query = since === undefined ? '' : `?since=${since}`
+  const response = await fetch(`/api/sync${query}`, {
+    headers: getAuthHeaders(),
+  })
+
+  if (!response.ok) {
+    throw new Error('同步数据失败')
+  }
+
+  return response.json()
+}
@@ -2,10 +2,12 @@
 import { getAuthHeaders } from './common'
 
 export interface SearXNGHealthResponse {
-  status: 'healthy' | 'unhealthy' | 'timeout' | 'unavailable' | 'error'
+  status: 'healthy' | 'unhealthy' | 'timeout' | 'unavailable' | 'error' | 'unknown'
   available: boolean
   url?: string
   error?: string
+  circuit?: 'closed' | 'open' | 'half_open'
+  checked_at?: number
 }
 
 export interface SearXNGConfigResponse {
@@ -57,3 +59,45 @@ export const getSearXNGConfig = async (): Promise<SearXNGConfigResponse | null>
   }
 }
 
+
+export interface SearXNGResult {
+  url: string
+  title: string
+  content?: string
+  engine?: string
+}
+
+export interface SearXNGSearchResponse {
+  query: string
+  page: number
+  results: SearXNGResult[]
+  suggestions: string[]
+  answers: unknown[]
+  unresponsive_engines: unknown[]
+}
+
+// 通过后端代理搜索 SearXNG
+export const searchSearXNG = async (
+  q: string,
+  page = 1,
+  engines?: string[],
+): Promise<SearXNGSearchResponse | null> => {
+  const params = new URLSearchParams({ q, page: String(page) })
+  if (engines && engines.length) {
+    params.set('engines', engines.join(','))
+  }
+  try {
+    const response = await fetch(`/api/system/searxng/search?${params}`, {
+      headers: getAuthHeaders(),
+    })
+
+    if (!response.ok) {
+      return null
+    }
+
+    return response.json()
+  } catch (error) {
+    console.error('Failed to search SearXNG:', error)
+    return null
+  }
+}
@@ -93,6 +93,34 @@ export const updateWebsiteApi = async (
   return response.json()
 }
 
+// 批量移动网站到指定分类
+export const moveWebsitesApi = async (ids: number[], categoryId?: number): Promise<void> => {
+  const response = await fetch('/api/websites/move', {
+    method: 'PATCH',
+    headers: getAuthHeaders(),
+    body: JSON.stringify({ ids, category_id: categoryId ?? null }),
+  })
+
+  if (!response.ok) {
+    const error = await response.json()
+    throw new Error(error.detail || '移动网站失败')
+  }
+}
+
+// 按拖拽后的顺序批量更新网站排序
+export const reorderWebsitesApi = async (ids: number[]): Promise<void> => {
+  const response = await fetch('/api/websites/order', {
+    method: 'PATCH',
+    headers: getAuthHeaders(),
+    body: JSON.stringify({ ids }),
+  })
+
+  if (!response.ok) {
+    const error = await response.json()
+    throw new Error(error.detail || '更新网站顺序失败')
+  }
+}
+
 // 删除网站
 export const deleteWebsiteApi = async (websiteId: number): Promise<void> => {
   const response = await fetch(`/api/websites/${websiteId}`, {
@@ -149,3 +177,89 @@ export const loadWebsitesApi = async (file: File): Promise<void> => {
   }
 }
 
+export interface BookmarkImportResult {
+  status: string
+  categories: number
+  reused_categories: number
+  websites: number
+  duplicates: number
+  skipped: number
+}
+
+// 导入浏览器导出的书签文件(HTML)
+export const importBookmarksApi = async (file: File): Promise<BookmarkImportResult> => {
+  const formData = new FormData()
+  formData.append('file', file)
+
+  const token = localStorage.getItem('access_token')
+  const headers: Record<string, string> = {}
+  if (token) {
+    headers['Authorization'] = `Bearer ${token}`
+  }
+
+  const response = await fetch('/api/data/bookmarks', {
+    method: 'POST',
+    headers,
+    body: formData,
+  })
+
+  if (!response.ok) {
+    const error = await response.json()
+    throw new Error(error.detail || '导入书签失败')
+  }
+
+  return response.json()
+}
+
+
+export interface WebsiteUsageResponse extends WebsiteResponse {
+  visits: number
+  last_visited_at: string | null
+}
+
+// 上报一次访问（只计数，不等待结果；页面跳转后请求仍会发出）
+export const visitWebsiteApi = (websiteId: number): void => {
+  fetch(`/api/websites/${websiteId}/visit`, {
+    method: 'POST',
+    headers: getAuthHeaders(),
+    keepalive: true,
+  }).catch(() => undefined)
+}
+
+// 获取常用(most)或最近访问(recent)的网站
+export const getUsageApi = async (
+  order: 'most' | 'recent' = 'most',
+  limit = 20,
+): Promise<WebsiteUsageResponse[]> => {
+  const response = await fetch(`/api/websites/usage?order=${order}&limit=${limit}`, {
+    headers: getAuthHeaders(),
+  })
+
+  if (!response.ok) {
+    throw new Error('获取常用网站失败')
+  }
+
+  return response.json()
+}
+
+// 规范化网址相同的网站分组中的一条
+export interface DuplicateWebsite {
+  id: number
+  name: string
+  url: string
+  category_id: number | null
+  created_at: string
+}
+
+// 获取重复网址分组(每组第一条为最早添加的)
+export const getDuplicatesApi = async (): Promise<DuplicateWebsite[][]> => {
+  const response = await fetch('/api/websites/duplicates', {
+    headers: getAuthHeaders(),
+  })
+
+  if (!response.ok) {
+    throw new Error('获取重复网址失败')
+  }
+
+  return response.json()
+}
@@ -7,14 +7,20 @@ import {
   getCategoriesApi, 
   createCategoryApi,
   updateCategoryApi,
+  reorderCategoriesApi,
   deleteCategoryApi 
 } from '@/api/categories'
 import {
   getWebsitesApi,
   createWebsiteApi,
   updateWebsiteApi,
+  moveWebsitesApi,
+  reorderWebsitesApi,
   deleteWebsiteApi
 } from '@/api/websites'
+import { getChangesApi } from '@/api/sync'
+import { getLinkStatusApi } from '@/api/links'
+import type { SyncResponse } from '@/api/sync'
 import { handleApiError } from '@/api/common'
 
 export const useWebsitesStore = defineStore('websites', () => {
@@ -25,6 +31,9 @@ export const useWebsitesStore = defineStore('websites', () => {
   const searchQuery = ref('')
   const isLoading = ref(false)
   const error = ref<string | null>(null)
+  // 增量同步游标，null 表示尚未同步
+  const syncCursor = ref<number | null>(null)
+  let syncing: Promise<void> | null = null
 
   // 获取过滤后的网站列表
   const filteredWebsites = computed(() => {
@@ -158,6 +167,20 @@ export const useWebsitesStore = defineStore('websites', () => {
     }
   }
 
+  // 按顺序批量保存分类排序
+  const reorderCategories = async (ids: number[]) => {
+    error.value = null
+
+    try {
+      await reorderCategoriesApi(ids)
+      // 服务端只调整必要记录的 sort_order，重新获取以同步
+      await fetchCategories()
+    } catch (err) {
+      error.value = handleApiError(err)
+      throw err
+    }
+  }
+
   // 删除分类
   const deleteCategory = async (categoryId: number) => {
     isLoading.value = true
@@ -230,6 +253,27 @@ export const useWebsitesStore = defineStore('websites', () => {
     }
   }
 
+  // 保存某个分类内的网站顺序（含跨分类移动），最多两次请求
+  const saveWebsiteOrder = async (categoryId: number, ids: number[]) => {
+    error.value = null
+
+    try {
+      const moved = ids.filter(id => {
+        const site = websites.value.find(w => w.id === id)
+        return site && site.category_id !== categoryId
+      })
+      if (moved.length > 0) {
+        await moveWebsitesApi(moved, categoryId)
+      }
+      if (ids.length > 0) {
+        await reorderWebsitesApi(ids)
+      }
+    } catch (err) {
+      error.value = handleApiError(err)
+      throw err
+    }
+  }
+
   // 删除网站
   const deleteWebsite = async (websiteId: number) => {
     isLoading.value = true
@@ -278,6 +322,103 @@ export const useWebsitesStore = defineStore('websites', () => {
     }
   }
 
+  // 合并一页增量变更
+  const applyChanges = (changes: SyncResponse) => {
+    const removedWebsites = new Set(changes.deleted.websites)
+    const removedCategories = new Set(changes.deleted.categories)
+    const changedWebsites = new Map(changes.websites.map(w => [w.id, w]))
+    const changedCategories = new Map(changes.categories.map(c => [c.id, c]))
+
+    if (removedWebsites.size || changedWebsites.size) {
+      const merged = websites.value
+        .filter(w => !removedWebsites.has(w.id))
+        .map(w => {
+          const changed = changedWebsites.get(w.id)
+          if (!changed) return w
+          changedWebsites.delete(w.id)
+          // 保留前端维护的连接状态
+          return { ...w, ...changed }
+        })
+      websites.value = [...merged, ...changedWebsites.values()]
+    }
+
+    if (removedCategories.size || changedCategories.size) {
+      const merged = categories.value
+        .filter(c => !removedCategories.has(c.id))
+        .map(c => {
+          const changed = changedCategories.get(c.id)
+          if (!changed) return c
+          changedCategories.delete(c.id)
+          return { ...c, ...changed }
+        })
+      categories.value = [...merged, ...changedCategories.values()]
+        .sort((a, b) => (b.sort_order || 0) - (a.sort_order || 0) || a.id - b.id)
+    }
+  }
+
+  // 拉取并合并自上次同步以来的变更，游标失效时全量重新加载
+  const syncChanges = async () => {
+    if (syncing) return syncing
+    syncing = (async () => {
+      try {
+        if (syncCursor.value === null) {
+          syncCursor.value = (await getChangesApi()).cursor
+          return
+        }
+        let changes: SyncResponse
+        do {
+          changes = await getChangesApi(syncCursor.value)
+          if (changes.reset) {
+            // 先记录游标再加载，加载期间的变更会在下次同步时合并
+            syncCursor.value = changes.cursor
+            await Promise.all([fetchCategories(), fetchWebsites()])
+            return
+          }
+          applyChanges(changes)
+          syncCursor.value = changes.cursor
+        } while (changes.has_more)
+      } catch (err) {
+        console.error('Failed to sync changes:', err)
+      } finally {
+        syncing = null
+      }
+    })()
+    return syncing
+  }
+
+  // 页面重新可见时同步其他标签页或设备上的修改
+  const handleVisibilityChange = () => {
+    if (document.visibilityState === 'visible') {
+      syncChanges()
+    }
+  }
+
+  // 服务端推送：收到变更通知后合并短时间内的多次通知再同步
+  let eventSource: EventSource | null = null
+  let syncTimer: ReturnType<typeof setTimeout> | null = null
+  const scheduleSync = () => {
+    if (syncTimer) return
+    syncTimer = setTimeout(() => {
+      syncTimer = null
+      syncChanges()
+    }, 200)
+  }
+
+  const connectEvents = () => {
+    if (eventSource || typeof EventSource === 'undefined') return
+    eventSource = new EventSource('/api/events')
+    eventSource.addEventListener('change', scheduleSync)
+    // 积压过多被服务端丢弃时同样通过增量同步补齐
+    eventSource.addEventListener('resync', scheduleSync)
+    // 断线重连后补齐断开期间的变更
+    eventSource.onopen = scheduleSync
+  }
+
+  const disconnectEvents = () => {
+    eventSource?.close()
+    eventSource = null
+  }
+
   // 检测单 URL 的连接状 
   const checkUrlConnection = async (url: string, timeout = 3000): Promise<boolean> => {
     const controller = new AbortController()
@@ -348,10 +489,43 @@ export const useWebsitesStore = defineStore('websites', () => {
     status.lastChecked = new Date()
   }
 
+  // 使用服务端检测结果，返回已有结果的网站 id
+  const applyServerLinkStatus = async (): Promise<Set<number>> => {
+    const checked = new Set<number>()
+    try {
+      const { links, dead_after } = await getLinkStatusApi()
+      const byId = new Map(links.map(link => [link.website_id, link]))
+      for (const website of websites.value) {
+        const link = byId.get(website.id)
+        if (!link) continue
+        checked.add(website.id)
+        // 偶发失败未达到阈值时仍视为可用
+        const dead = !link.ok && link.failures >= dead_after
+        const backAvailable = dead && !!website.back_url && link.back_ok === true
+        website.connectionStatus = {
+          websiteId: website.id,
+          urlStatus: !dead
+            ? ConnectionStatus.AVAILABLE
+            : backAvailable ? ConnectionStatus.BACKUP_AVAILABLE : ConnectionStatus.UNAVAILABLE,
+          backUrlStatus: !website.back_url || link.back_ok === null
+            ? ConnectionStatus.UNTESTED
+            : link.back_ok ? ConnectionStatus.AVAILABLE : ConnectionStatus.UNAVAILABLE,
+          preferredUrl: backAvailable ? 'back_url' : 'url',
+          lastChecked: new Date(link.checked_at)
+        }
+      }
+    } catch (err) {
+      console.error('Failed to load link status:', err)
+    }
+    return checked
+  }
+
   // 批量检测所有网站（按排序顺序）
   const checkAllWebsitesConnection = async () => {
+    // 服务端已检测过的网站直接使用结果，其余在浏览器中检测
+    const checked = await applyServerLinkStatus()
     //  sort_order 排序
-    const sortedWebsites = [...websites.value].sort((a, b) => {
+    const sortedWebsites = [...websites.value].filter(w => !checked.has(w.id)).sort((a, b) => {
       return (b.sort_order || 0) - (a.sort_order || 0)
     })
 
@@ -384,11 +558,16 @@ export const useWebsitesStore = defineStore('websites', () => {
   const initData = async () => {
     // 先加载可见性设 
     loadCategoryVisibility()
-    
+
+    // 在加载列表前取得游标，加载期间发生的修改不会丢失
+    await syncChanges()
     await Promise.all([
       fetchCategories(),
       fetchWebsites()
     ])
+    document.removeEventListener('visibilitychange', handleVisibilityChange)
+    document.addEventListener('visibilitychange', handleVisibilityChange)
+    connectEvents()
 
     // 等待页面完全加载后再开始检测连接状态
     const startConnectionCheck = () => {
@@ -431,12 +610,16 @@ export const useWebsitesStore = defineStore('websites', () => {
     isCategoryHidden,
     addCategory,
     updateCategory,
+    reorderCategories,
     deleteCategory,
     addWebsite,
     updateWebsite,
+    saveWebsiteOrder,
     deleteWebsite,
     fetchCategories,
     fetchWebsites,
+    syncChanges,
+    disconnectEvents,
     initData,
     checkWebsiteConnection,
     checkAllWebsitesConnection,